@@ -1,101 +1,77 @@
-import numpy as np
-import matplotlib.pyplot as plt
-from scipy import constants
-from scipy.optimize import curve_fit
-
-# ------------------------ Read POSCAR for volume and Li count ----------------------------
-def read_poscar(poscar_path='POSCAR'):
-    with open(poscar_path, 'r') as f:
-        lines = f.readlines()
-
-    scale = float(lines[1].strip())
-    lattice = np.array([
-        list(map(float, lines[2].split())),
-        list(map(float, lines[3].split())),
-        list(map(float, lines[4].split())),
-    ])
-    lattice *= scale
-
-    volume = abs(np.linalg.det(lattice))  # Supercell volume in Å³
-
-    elements = lines[5].split()
-    numbers = list(map(int, lines[6].split()))
-
-    if 'Li' in elements:
-        li_index = elements.index('Li')
-        li_count = numbers[li_index]
-    else:
-        raise ValueError('Li element not found in POSCAR.')
-
-    return volume, li_count
-
-# ------------------------ Physical constants ----------------------------
-kB = constants.Boltzmann  # J/K
-e_charge = constants.e     # C
-
-# ------------------------ Parameters ----------------------------
-T = 600  # Temperature in K
-poscar_volume_A3, ion_num = read_poscar('POSCAR')  # Get supercell volume and Li count
-cell_volume_cm3 = poscar_volume_A3 * 1e-24  # Convert Å³ to cm³
-
-# Ionic concentration (ions/cm³)
-c_ion_cm3 = ion_num / cell_volume_cm3
-print(f"Ionic concentration c_ion_cm3 = {c_ion_cm3:.3e} ions/cm³")
-
-# ------------------------ Load MSD data ----------------------------
-data = np.loadtxt('msd_Li.out', comments='#')
-time_steps_raw = data[:, 0]
-time_step_zero = time_steps_raw[0]
-relative_time_fs = time_steps_raw - time_step_zero  # Set first step as t=0
-relative_time_ps = relative_time_fs * 1e-3          # Convert to ps
-msd_A2 = data[:, 1]                                 # MSD in Å²
-
-# ------------------------ Auto fit range ----------------------------
-fit_start = int(data[0, 0])
-fit_end = int(data[-1, 0])
-
-mask = (data[:, 0] >= fit_start) & (data[:, 0] <= fit_end)
-fit_time_s = relative_time_fs[mask] * 1e-15  # Convert to seconds
-fit_msd_m2 = msd_A2[mask] * 1e-20            # Convert to m²
-
-# ------------------------ Linear fit for diffusivity ----------------------------
-def linear_func(x, a, b):
-    return a * x + b
-
-popt, _ = curve_fit(linear_func, fit_time_s, fit_msd_m2)
-slope = popt[0]
-D_m2_s = slope / 6  # Einstein relation: D = slope / 6
-D_cm2_s = D_m2_s * 1e4  # Convert to cm²/s
-
-# ------------------------ Nernst-Einstein conductivity ----------------------------
-sigma_S_cm = (D_cm2_s * e_charge**2 * c_ion_cm3) / (kB * T)  # in S/cm
-
-# ------------------------ Plot MSD and fit ----------------------------
-plt.rcParams['font.family'] = 'Times New Roman'
-plt.figure(figsize=(8,6))
-plt.plot(relative_time_ps, msd_A2, label='MSD data', lw=2)
-fit_line_ps = fit_time_s * 1e12  # Convert s → ps for plotting
-plt.plot(fit_line_ps, linear_func(fit_time_s, *popt) * 1e20, 'r--', label='Linear fit')
-
-plt.xlabel('Time (ps)', fontsize=14)
-plt.ylabel(r'MSD ($\mathrm{\AA}^2$)', fontsize=14)
-plt.title('Li MSD and Diffusion Fitting', fontsize=16)
-plt.legend(fontsize=14)
-
-# Annotate diffusivity and conductivity
-textstr = f'Diffusivity = {D_cm2_s:.3e} cm²/s\nConductivity = {sigma_S_cm:.3e} S/cm'
-plt.text(0.05 * max(relative_time_ps), 0.15 * max(msd_A2), textstr,
-         fontsize=13, bbox=dict(facecolor='white', alpha=0.7))
-
-plt.grid(True)
-plt.tight_layout()
-plt.savefig('msd_fit.png', dpi=300)
-plt.show()
-
-# ------------------------ Print results ----------------------------
-print(f"Volume from POSCAR: V = {poscar_volume_A3:.3f} Å³")
-print(f"Number of Li atoms = {ion_num}")
-print(f"Ionic concentration c_ion_cm3 = {c_ion_cm3:.3e} ions/cm³")
-print(f"Fitting range: {fit_start} - {fit_end} steps")
-print(f"Diffusivity D = {D_cm2_s:.3e} cm²/s")
-print(f"Ionic conductivity σ = {sigma_S_cm:.3e} S/cm")
\ No newline at end of file
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # mlp_ap_se from a checkout
+from mlp_ap_se import ap_analyze, instrument, result_cache
+from mlp_ap_se.instrument import stage
+
+# ------------------------ Single-origin MSD from msd_Li.out ----------------------------
+def report_msd(res):
+    print(f"Volume from POSCAR: V = {res['volume_A3']:.3f} Å³")
+    print(f"Number of Li atoms = {res['n_Li']}")
+    print(f"Ionic concentration c_ion_cm3 = {res['c_ion_cm3']:.3e} ions/cm³")
+    print(f"Fitting range: 0 - {res['lag_time_fs'][-1]:.0f} fs")
+    print(f"Diffusivity D = {res['D_cm2_s']:.3e} ± {res['D_err']:.1e} cm²/s")
+    print(f"Ionic conductivity σ = {res['sigma_S_cm']:.3e} ± {res['sigma_err']:.1e} S/cm")
+
+# ------------------------ Multi-origin FFT MSD from the trajectory ----------------------------
+# The single-origin c_msd_Li[4] above is noisy; when the dump is available,
+# average over all time origins, fit only the diffusive window and get the
+# true conductivity from the collective (charge) MSD.
+def report_trajectory(res, dump_file, results_file='msd_multi_origin_results.txt'):
+    lag_ps = res['lag_time_fs'] * 1e-3
+    print(f"\nMulti-origin MSD from {dump_file} (V = {res['volume_A3']:.3f} Å³)")
+    for name, sp in res['species'].items():
+        start, end = sp['window']
+        print(f"{name:>2}: D = {sp['D_cm2_s']:.3e} ± {sp['D_err']:.1e} cm²/s, "
+              f"σ_NE = {sp['sigma_NE_S_cm']:.3e} ± {sp['sigma_NE_err']:.1e} S/cm, "
+              f"fit window {lag_ps[start]:.1f} - {lag_ps[end - 1]:.1f} ps, "
+              f"frames for 5% error: {sp['n_frames_required']}")
+    print(f"Collective (charge MSD) conductivity σ = {res['charge']['sigma_S_cm']:.3e} "
+          f"± {res['charge']['sigma_err']:.1e} S/cm (frames for 5% error: {res['charge']['n_frames_required']})")
+    if 'li_collective' in res:
+        li_c = res['li_collective']
+        print(f"Li D_σ = {li_c['D_sigma_cm2_s']:.3e} cm²/s, Haven ratio H_R = {li_c['haven_ratio']:.3f}")
+
+    with open(results_file, 'w') as f:
+        f.write(f"Temperature: {res['T']} K\n")
+        f.write(f"Volume: {res['volume_A3']:.5f} Å³\n")
+        for name, sp in res['species'].items():
+            f.write(f"D_{name}: {sp['D_cm2_s']:.5e} +- {sp['D_err']:.2e} cm²/s\n")
+            f.write(f"sigma_NE_{name}: {sp['sigma_NE_S_cm']:.5e} +- {sp['sigma_NE_err']:.2e} S/cm\n")
+            f.write(f"frames_required_{name}: {sp['n_frames_required']}\n")
+        f.write(f"sigma_collective: {res['charge']['sigma_S_cm']:.5e} +- {res['charge']['sigma_err']:.2e} S/cm\n")
+        f.write(f"frames_required_collective: {res['charge']['n_frames_required']}\n")
+        if 'li_collective' in res:
+            f.write(f"D_sigma_Li: {res['li_collective']['D_sigma_cm2_s']:.5e} cm²/s\n")
+            f.write(f"Haven_ratio_Li: {res['li_collective']['haven_ratio']:.5f}\n")
+
+# ------------------------ Main entry point ----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Li MSD fit (msd_Li.out) and multi-origin MSD (traj_all.lammpstrj)")
+    parser.add_argument('directory', nargs='?', default='.')
+    parser.add_argument('--T', type=float, default=600.0, help="Temperature in K")
+    parser.add_argument('--timestep-fs', type=float, default=1.0, help="LAMMPS metal units default (0.001 ps)")
+    parser.add_argument('--dump-file', default='traj_all.lammpstrj', help="Used for the multi-origin MSD when present")
+    parser.add_argument('--no-show', action='store_true', help="Save figures without opening a window")
+    instrument.add_report_argument(parser)
+    result_cache.add_cache_arguments(parser)
+    args = parser.parse_args()
+    show = not args.no_show
+    instrument.start("plot_msd&fit", args.report)
+    result_cache.enable_from_args(args)
+
+    res = ap_analyze.analyze('msd', args.directory, plot=True, show=show, T=args.T, timestep_fs=args.timestep_fs)
+    report_msd(res)
+
+    dump_path = os.path.join(args.directory, args.dump_file)
+    if os.path.exists(dump_path):
+        res = ap_analyze.traj(args.directory, args.T, args.timestep_fs, dump_file=args.dump_file)
+        with stage("plot_traj"):
+            ap_analyze.plot_traj(res, args.directory, show)
+        report_trajectory(res, dump_path, os.path.join(args.directory, 'msd_multi_origin_results.txt'))
+
+    report = instrument.finish(os.path.join(args.directory, 'msd_report.json'))
+    if report:
+        print(f"Run report saved to {report}")
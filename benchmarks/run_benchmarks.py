@@ -0,0 +1,234 @@
+import os
+import sys
+import json
+import time
+import glob
+import shutil
+import socket
+import platform
+import argparse
+import resource
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.join(HERE, "..")]
+
+from synthetic import generate
+
+# ==========================
+# Parser / fitter benchmarks on synthetic outputs.
+#   python benchmarks/run_benchmarks.py --size small
+# Every stage runs in a fresh forked process, so its peak RSS is its own.
+# Results are compared with benchmarks/baselines/<size>.json (written on the
+# first run, or with --save-baseline) and the run fails on a regression.
+# ==========================
+SIZES = {
+    'small': (100, 1000),      # frames, atoms
+    'medium': (1000, 5000),
+    'large': (10000, 10000),
+}
+
+
+def _data_area(directory):
+    from mlp_ap_se.analyze_nemd import get_box_dimensions
+    _, ly, lz = get_box_dimensions(os.path.join(directory, "lammps.data"))
+    return ly * lz
+
+# ---------- Stages: (name, input files, item unit, function(directory) -> items processed) ----------
+def stage_read_lammps_data(d):
+    from mlp_ap_se.plot_Li_migration_XY import read_lammps_data
+    return len(read_lammps_data(os.path.join(d, "lammps.data"), scale=1.0)[1])
+
+
+def stage_read_poscar(d):
+    from mlp_ap_se.transport import read_poscar
+    read_poscar(os.path.join(d, "POSCAR"))
+    return 1
+
+
+def stage_dump_stream(d):
+    from mlp_ap_se.plot_Li_migration_XY import extract_li_trajectories_xy
+    return extract_li_trajectories_xy(os.path.join(d, "traj_all.lammpstrj"), scale=1.0, use_cache=False)[1].shape[0]
+
+
+def stage_dump_cache_build(d):
+    from mlp_ap_se.lammps_dump import build_trajectory_cache, default_cache_dir
+    dump = os.path.join(d, "traj_all.lammpstrj")
+    shutil.rmtree(default_cache_dir(dump), ignore_errors=True)
+    build_trajectory_cache(dump)
+    with open(os.path.join(default_cache_dir(dump), "meta.json")) as f:
+        return json.load(f)['n_frames']
+
+
+def stage_dump_cache_read(d):
+    from mlp_ap_se.plot_Li_migration_XY import extract_li_trajectories_xy
+    return extract_li_trajectories_xy(os.path.join(d, "traj_all.lammpstrj"), scale=1.0, use_cache=True)[1].shape[0]
+
+
+def stage_msd_fft(d):
+    from mlp_ap_se.transport import analyze_trajectory
+    return len(analyze_trajectory(os.path.join(d, "traj_all.lammpstrj"), 600.0)['lag_time_fs'])
+
+
+def stage_load_msd_file(d):
+    from mlp_ap_se.transport import load_msd_file
+    return len(load_msd_file(os.path.join(d, "msd_Li.out"))[0])
+
+
+def stage_load_temperature(d):
+    from mlp_ap_se.analyze_nemd import load_temperature_blocks
+    return load_temperature_blocks(os.path.join(d, "temp_profile.dat"))[2].shape[0]
+
+
+def stage_compute_heat_flux(d):
+    from mlp_ap_se.analyze_nemd import compute_heat_flux
+    filename = os.path.join(d, "heatflow.dat")
+    compute_heat_flux(filename, _data_area(d))
+    return sum(1 for _ in open(filename)) - 1
+
+
+def stage_expansion(d):
+    from mlp_ap_se.analyze_thermal_expansion import find_expansion_files, summarize_file
+    return sum(summarize_file(f)['rows'] for f in find_expansion_files(d))
+
+
+def stage_load_lcurve(d):
+    from mlp_ap_se.plot_loss import load_lcurve
+    return len(load_lcurve(os.path.join(d, "lcurve.out"))[1])
+
+
+STAGES = [
+    ('read_lammps_data', ["lammps.data"], 'atoms', stage_read_lammps_data),
+    ('read_poscar', ["POSCAR"], 'files', stage_read_poscar),
+    ('dump_stream_parse', ["traj_all.lammpstrj"], 'frames', stage_dump_stream),
+    ('dump_cache_build', ["traj_all.lammpstrj"], 'frames', stage_dump_cache_build),
+    ('dump_cache_read', ["traj_all.lammpstrj.cache/coords.f32"], 'frames', stage_dump_cache_read),
+    ('msd_fft', ["traj_all.lammpstrj.cache/coords.f32"], 'frames', stage_msd_fft),
+    ('load_msd_file', ["msd_Li.out"], 'rows', stage_load_msd_file),
+    ('load_temperature', ["temp_profile.dat"], 'blocks', stage_load_temperature),
+    ('compute_heat_flux', ["heatflow.dat"], 'rows', stage_compute_heat_flux),
+    ('expansion_summarize', ["thermal_expansion_*K.txt"], 'rows', stage_expansion),
+    ('load_lcurve', ["lcurve.out"], 'rows', stage_load_lcurve),
+]
+
+# ---------- Measurement ----------
+def preload():
+    # Import every analysis module (and its lazily imported dependencies) in the
+    # parent, so forked stages time parsing and fitting rather than imports
+    import pandas, scipy.fft
+    from mlp_ap_se import (plot_Li_migration_XY, lammps_dump, transport, analyze_nemd,
+                           analyze_thermal_expansion, plot_loss)
+
+
+def _measure(func, directory):
+    # Runs in the forked child: wall time and the RSS high-water mark of this stage
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    items = func(directory)
+    seconds = time.perf_counter() - t0
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {'seconds': seconds, 'items': int(items),
+            'peak_rss_mb': rss_peak / 1024, 'rss_increase_mb': (rss_peak - rss_before) / 1024}
+
+
+def run_stage(name, patterns, unit, func, directory, repeat=1):
+    n_bytes = sum(os.path.getsize(f) for p in patterns for f in glob.glob(os.path.join(directory, p)))
+    ctx = multiprocessing.get_context('fork')
+    runs = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            runs.append(pool.submit(_measure, func, directory).result())
+    best = min(runs, key=lambda r: r['seconds'])
+    return {'stage': name, 'unit': unit, 'bytes': n_bytes, 'items': best['items'], 'seconds': best['seconds'],
+            'mb_per_s': n_bytes / 1e6 / best['seconds'], 'items_per_s': best['items'] / best['seconds'],
+            'peak_rss_mb': max(r['peak_rss_mb'] for r in runs),
+            'rss_increase_mb': max(r['rss_increase_mb'] for r in runs)}
+
+
+def environment():
+    return {'host': socket.gethostname(), 'python': platform.python_version(), 'numpy': np.__version__,
+            'cpus': os.cpu_count(), 'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+# ---------- Baseline comparison ----------
+def compare(results, baseline, time_tol=0.25, memory_tol=0.25, time_slack_s=0.02, memory_slack_mb=10.0):
+    # A stage regresses when it is slower than (1 + time_tol) x baseline + time_slack_s, or
+    # its RSS increase exceeds (1 + memory_tol) x baseline + memory_slack_mb (the slacks
+    # keep millisecond stages on small inputs from flagging timer noise)
+    reference = {r['stage']: r for r in baseline['stages']}
+    regressions = []
+    for r in results['stages']:
+        base = reference.get(r['stage'])
+        if base is None:
+            r['change'] = None
+            continue
+        r['change'] = r['seconds'] / base['seconds'] - 1
+        if r['seconds'] > (1 + time_tol) * base['seconds'] + time_slack_s:
+            regressions.append(f"{r['stage']}: {r['seconds']:.3f} s vs {base['seconds']:.3f} s baseline "
+                               f"({100 * r['change']:+.0f}%)")
+        if r['rss_increase_mb'] > (1 + memory_tol) * base['rss_increase_mb'] + memory_slack_mb:
+            regressions.append(f"{r['stage']}: RSS +{r['rss_increase_mb']:.1f} MB vs "
+                               f"+{base['rss_increase_mb']:.1f} MB baseline")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'stage':<20} {'s':>9} {'MB/s':>9} {'items/s':>12} {'unit':<7} {'RSS+ MB':>9} {'peak MB':>9} {'vs base':>8}")
+    for r in results['stages']:
+        change = f"{100 * r['change']:+.0f}%" if r.get('change') is not None else "-"
+        print(f"{r['stage']:<20} {r['seconds']:9.4f} {r['mb_per_s']:9.1f} {r['items_per_s']:12.1f} {r['unit']:<7} "
+              f"{r['rss_increase_mb']:9.1f} {r['peak_rss_mb']:9.1f} {change:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the DPMD parsers and fitters on synthetic outputs")
+    parser.add_argument('--size', choices=sorted(SIZES), default='small')
+    parser.add_argument('--frames', type=int, default=None, help="Override the preset frame count")
+    parser.add_argument('--atoms', type=int, default=None, help="Override the preset atom count")
+    parser.add_argument('--data-dir', default=None, help="Where synthetic files are kept (default: bench_data/<size>)")
+    parser.add_argument('--stages', nargs='+', default=None, choices=[s[0] for s in STAGES])
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per stage; the fastest is kept")
+    parser.add_argument('--baseline', default=None, help="Baseline JSON (default: benchmarks/baselines/<size>.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="Overwrite the baseline with this run")
+    parser.add_argument('--time-tol', type=float, default=0.25)
+    parser.add_argument('--memory-tol', type=float, default=0.25)
+    parser.add_argument('--time-slack', type=float, default=0.02, help="Seconds tolerated on top of --time-tol")
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args()
+
+    n_frames, n_atoms = SIZES[args.size]
+    n_frames, n_atoms = args.frames or n_frames, args.atoms or n_atoms
+    label = args.size if (n_frames, n_atoms) == SIZES[args.size] else f"{n_frames}x{n_atoms}"
+    data_dir = args.data_dir or os.path.join("bench_data", label)
+    t0 = time.perf_counter()
+    generate(data_dir, n_frames, n_atoms)
+    print(f"Synthetic data in {data_dir} ({n_frames} frames x {n_atoms} atoms, {time.perf_counter() - t0:.1f} s)")
+
+    preload()
+    stages = [s for s in STAGES if args.stages is None or s[0] in args.stages]
+    results = {'label': label, 'n_frames': n_frames, 'n_atoms': n_atoms, 'environment': environment(),
+               'stages': [run_stage(*s, data_dir, args.repeat) for s in stages]}
+
+    baseline_path = args.baseline or os.path.join(HERE, "baselines", f"{label}.json")
+    regressions = []
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.time_tol, args.memory_tol, args.time_slack)
+        results['baseline'] = {'file': baseline_path, 'environment': baseline['environment'],
+                               'regressions': regressions}
+    print_table(results)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.save_baseline or not os.path.exists(baseline_path):
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump({k: v for k, v in results.items() if k != 'baseline'}, f, indent=2)
+        print(f"Baseline written to {baseline_path}")
+    for message in regressions:
+        print(f"REGRESSION: {message}")
+    print(f"Results saved to {args.output}")
+    sys.exit(1 if regressions else 0)
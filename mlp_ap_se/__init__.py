@@ -0,0 +1,4 @@
+# DeePMD training and MD analysis tools for Li3OCl1-xBrx anti-perovskite solid electrolytes.
+# Every tool is a module with its own command line: python -m mlp_ap_se.<module> --help
+# (LAMMPS input templates are in mlp_ap_se/lammps/)
+__version__ = "0.1.0"
@@ -0,0 +1,458 @@
+import os
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from .uncertainty import (summarize, bootstrap_slope, statistical_inefficiency, batched_slope,
+                         detect_equilibration)
+from .runpaths import parse_run_path
+from .lammps_dump import increasing_rows
+from .instrument import stage
+from .result_cache import cached
+from . import instrument
+from . import result_cache
+
+# === Step 0: Automatically read LAMMPS box dimensions ===
+def get_box_dimensions(data_file, replicate_x=1):
+    # replicate_x: replication along x applied in in.conductivity (see read_replication_factor)
+    with open(data_file, 'r') as f:
+        lines = f.readlines()
+        for i in range(len(lines)):
+            if "xlo xhi" in lines[i]:
+                xlo, xhi = map(float, lines[i].split()[:2])
+            if "ylo yhi" in lines[i]:
+                ylo, yhi = map(float, lines[i].split()[:2])
+            if "zlo zhi" in lines[i]:
+                zlo, zhi = map(float, lines[i].split()[:2])
+                break
+    lx = (xhi - xlo) * replicate_x  # replicated in x-direction
+    ly = yhi - ylo
+    lz = zhi - zlo
+    return lx * 1e-10, ly * 1e-10, lz * 1e-10  # Convert to meters
+
+# === Step 0.5: Replication factor = atoms binned by ave/chunk / atoms in lammps.data ===
+def read_data_atom_count(data_file):
+    with open(data_file, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1] == "atoms":
+                return int(parts[0])
+    raise ValueError(f"No atom count found in {data_file}")
+
+def replication_factor(data_file, total_counts):
+    return int(round(float(np.median(total_counts)) / read_data_atom_count(data_file)))
+
+def read_replication_factor(data_file, temp_file):
+    return replication_factor(data_file, load_temperature_blocks(temp_file)[3])
+
+# === Step 1: Load temperature distribution from temp_profile.dat ===
+def load_temperature_blocks(filename):
+    # ave/chunk output: a "Timestep Nchunks Total-count" line before every block of
+    # "Chunk Coord1 Ncount v_temp1" rows. Parsed in one C-level pass and reshaped,
+    # returns timesteps (n_blocks,), chunk_ids (n_chunks,), temps (n_blocks, n_chunks)
+    # and the total atom count of every block.
+    import pandas as pd
+    df = pd.read_csv(filename, sep=r'\s+', comment='#', header=None,
+                     names=["c0", "c1", "c2", "c3"], engine='c')
+    is_header = df["c3"].isna().to_numpy()
+    headers = df.loc[is_header, ["c0", "c1", "c2"]].to_numpy()
+    rows = df.loc[~is_header].to_numpy()
+
+    n_chunks = int(headers[0, 1])
+    n_blocks = min(len(headers), len(rows) // n_chunks)  # drop a partially written last block
+    rows = rows[:n_blocks * n_chunks].reshape(n_blocks, n_chunks, 4)
+    keep = increasing_rows(headers[:n_blocks, 0], filename)  # a resumed run repeats its restart block
+    timesteps = headers[keep, 0].astype(np.int64)
+    chunk_ids = rows[0, :, 0].astype(int)
+    return timesteps, chunk_ids, rows[keep, :, 3], headers[keep, 2]
+
+def load_temperature(filename, start_block=0):
+    # Profile averaged over blocks [start_block:] (all blocks by default)
+    _, chunk_ids, temps, _ = load_temperature_blocks(filename)
+    return chunk_ids, temps[start_block:].mean(axis=0)
+
+# === Step 1.5: Plot temperature profile ===
+def plot_temperature(x, temps, output_img="temp_profile.png", show=True):
+    import matplotlib.pyplot as plt
+
+    plt.figure()
+    plt.plot(x, temps, 'o-', label='Temperature profile')
+    plt.xlabel('x position (m)')
+    plt.ylabel('Temperature (K)')
+    plt.title('Temperature Profile from NEMD')
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(output_img, dpi=300)
+    if show:
+        plt.show()
+    plt.close()
+
+# === Step 2: Compute heat flux from heatflow.dat ===
+def load_heat_flow(filename):
+    # fix print rows "Time E_Hot E_Cold" after the title line, one per distinct step
+    data = np.loadtxt(filename, skiprows=1, ndmin=2)
+    return data[increasing_rows(data[:, 0], filename)]
+
+def compute_heat_flux(filename, area, start_time=None):
+    # Fit from start_time on (e.g. the detected steady state); default: second half
+    data = load_heat_flow(filename)
+    times = data[:, 0]
+    EL = data[:, 1]
+    ER = data[:, 2]
+
+    N = len(times) // 2 if start_time is None else int(np.searchsorted(times, start_time))
+    slope_L = np.polyfit(times[N:], EL[N:], 1)[0]
+    slope_R = np.polyfit(times[N:], ER[N:], 1)[0]
+
+    J = (slope_L - slope_R) / (2 * area)  # eV/fs/m²
+    J *= 1.60218e-19 / 1e-15              # Convert to W/m²
+    return J
+
+# === Step 2.5: Heat flux uncertainty from the per-interval energy increments ===
+def heat_flux_uncertainty(filename, area, target_rel_err=0.05, start_time=None):
+    # The tallied energies grow linearly, so their increments are a stationary
+    # series whose mean is the slope; block averaging gives its error.
+    data = load_heat_flow(filename)
+    N = len(data) // 2 if start_time is None else int(np.searchsorted(data[:, 0], start_time))
+    times, EL, ER = data[N:, 0], data[N:, 1], data[N:, 2]
+    J_series = np.diff(EL - ER) / np.diff(times) / (2 * area) * 1.60218e-19 / 1e-15
+    stats = summarize(J_series, target_rel_err)
+    stats['steps_required'] = stats['n_required'] * np.mean(np.diff(times)) if np.isfinite(stats['n_required']) else np.nan
+    return stats
+
+# === Step 3: Fit linear temperature gradient and compute thermal conductivity ===
+def compute_k(x, T, J):
+    dT_dx = np.polyfit(x[10:-10], T[10:-10], 1)[0]  # Fit only central region
+    k = J / dT_dx  # W/m·K
+    return k, dT_dx
+
+# === Step 3.5: Thermal conductivity uncertainty ===
+def compute_k_uncertainty(x, T, J, J_err, n_boot=2000):
+    # Block bootstrap of the gradient over the central chunks, combined in quadrature with the flux error
+    xs, Ts = x[10:-10], T[10:-10]
+    block = int(np.ceil(statistical_inefficiency(Ts - np.polyval(np.polyfit(xs, Ts, 1), xs))))
+    dT_dx, dT_dx_err, _ = bootstrap_slope(xs, Ts, n_boot=n_boot, block_size=block)
+    k = J / dT_dx
+    k_err = abs(k) * np.sqrt((J_err / J) ** 2 + (dT_dx_err / dT_dx) ** 2)
+    return k_err, dT_dx_err
+
+# === Step 4: Time-resolved analysis and steady-state detection ===
+def gradient_series(x, temp_blocks, trim=10):
+    # dT/dx of every block profile at once (same central region as compute_k)
+    return batched_slope(x[trim:-trim], temp_blocks[:, trim:-trim])
+
+def heat_flux_series(filename, area):
+    # Instantaneous J between consecutive heatflow.dat rows (W/m²)
+    data = load_heat_flow(filename)
+    times, EL, ER = data[:, 0], data[:, 1], data[:, 2]
+    J = np.diff(EL - ER) / np.diff(times) / (2 * area) * 1.60218e-19 / 1e-15
+    return times, J
+
+def detect_steady_state(block_times, grad, flux_times, J):
+    # Steady state starts once both the gradient and the flux are stationary
+    t0_grad = block_times[detect_equilibration(grad)[0]]
+    t0_flux = flux_times[1:][detect_equilibration(J)[0]]
+    return max(t0_grad, t0_flux), t0_grad, t0_flux
+
+def sliding_k(block_times, temp_blocks, x, flux_file, area, window=20, trim=10):
+    """k(t) over a window of `window` ave/chunk blocks ending at each block time.
+
+    Window-averaged profiles come from cumulative sums, the flux from the
+    tallied energy difference across the window, so everything is vectorised.
+    """
+    data = load_heat_flow(flux_file)
+    dE = np.interp(block_times, data[:, 0], data[:, 1] - data[:, 2])
+    csum = np.concatenate([np.zeros((1, temp_blocks.shape[1])), np.cumsum(temp_blocks, axis=0)])
+    end = np.arange(window, len(block_times) + 1)
+    profiles = (csum[end] - csum[end - window]) / window
+    grad = gradient_series(x, profiles, trim)
+    t_end, t_start = block_times[end - 1], block_times[end - window]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        J = (dE[end - 1] - dE[end - window]) / (t_end - t_start) / (2 * area) * 1.60218e-19 / 1e-15
+        k = J / grad
+    return t_end, grad, J, k
+
+def plot_k_vs_time(times, k, t_steady, output_img="k_vs_time.png", show=True):
+    import matplotlib.pyplot as plt
+
+    plt.figure()
+    plt.plot(times, k, '-', label='k (sliding window)')
+    plt.axvline(t_steady, color='r', linestyle='--', label='Steady state')
+    plt.xlabel('Step')
+    plt.ylabel('k (W/m·K)')
+    plt.title('Time-resolved Thermal Conductivity')
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(output_img, dpi=300)
+    if show:
+        plt.show()
+    plt.close()
+
+# === Step 5: Full analysis of one NEMD run directory (no plotting, no files written) ===
+def analyze_run(directory=".", data_file="lammps.data", temp_file="temp_profile.dat",
+                energy_file="heatflow.dat", target_rel_err=0.05):
+    data_file, temp_file, energy_file = (os.path.join(directory, f) for f in (data_file, temp_file, energy_file))
+    # Reused from the result cache while the three inputs and target_rel_err are unchanged
+    return cached("analyze_nemd.analyze_run", [data_file, temp_file, energy_file], {'target_rel_err': target_rel_err},
+                  lambda: _analyze_run_files(data_file, temp_file, energy_file, target_rel_err),
+                  modules=('analyze_nemd', 'uncertainty'))
+
+def _analyze_run_files(data_file, temp_file, energy_file, target_rel_err):
+    # Per-block temperature profiles (parsed once; the replication factor comes from their atom counts)
+    with stage("load_temperature", files=[temp_file]) as st:
+        block_times, chunk_ids, temp_blocks, total_counts = load_temperature_blocks(temp_file)
+        st['frames'] = len(block_times)
+
+    # Box dimensions
+    replicate_x = replication_factor(data_file, total_counts)
+    lx, ly, lz = get_box_dimensions(data_file, replicate_x)
+    area = ly * lz
+
+    # Temperature profiles sorted along x
+    x_positions = chunk_ids / max(chunk_ids) * lx
+    sorted_indices = np.argsort(x_positions)
+    x_positions = x_positions[sorted_indices]
+    temp_blocks = temp_blocks[:, sorted_indices]
+
+    # Steady state of both the temperature gradient and the heat flux
+    with stage("steady_state", files=[energy_file]):
+        flux_times, J_inst = heat_flux_series(energy_file, area)
+        t_steady, t_grad, t_flux = detect_steady_state(block_times, gradient_series(x_positions, temp_blocks),
+                                                       flux_times, J_inst)
+    start_block = int(np.searchsorted(block_times, t_steady))
+    temps = temp_blocks[start_block:].mean(axis=0)
+
+    # Heat flux and thermal conductivity
+    with stage("heat_flux", files=[energy_file]) as st:
+        J = compute_heat_flux(energy_file, area, start_time=t_steady)
+        flux_stats = heat_flux_uncertainty(energy_file, area, target_rel_err, start_time=t_steady)
+        st['rows'] = len(J_inst) + 1
+    with stage("k_fit_bootstrap"):
+        k, gradT = compute_k(x_positions, temps, J)
+        k_err, gradT_err = compute_k_uncertainty(x_positions, temps, J, flux_stats['sem'])
+
+    # k(t) over a sliding window; converged once the window values agree within target_rel_err
+    window = max(min(20, (len(block_times) - start_block) // 2), 2)
+    with stage("sliding_k", files=[energy_file]):
+        k_times, k_grad, k_flux, k_t = sliding_k(block_times, temp_blocks, x_positions, energy_file, area, window)
+    k_recent = k_t[k_times >= t_steady]
+    converged = len(k_recent) > 1 and np.std(k_recent) / abs(np.mean(k_recent)) < target_rel_err
+
+    return {'replicate_x': replicate_x, 'length_x': lx, 'area': area,
+            'n_blocks': len(block_times), 'start_block': start_block,
+            't_steady': t_steady, 't_grad': t_grad, 't_flux': t_flux,
+            'x': x_positions, 'temps': temps,
+            'J': J, 'J_err': flux_stats['sem'], 'flux_stats': flux_stats,
+            'gradT': gradT, 'gradT_err': gradT_err, 'k': k, 'k_err': k_err,
+            'k_times': k_times, 'k_grad': k_grad, 'k_flux': k_flux, 'k_t': k_t, 'converged': converged}
+
+# === Step 6: Ensemble of runs (different replicate_x and seeds), analysed in parallel ===
+def find_nemd_runs(root, temp_file="temp_profile.dat", energy_file="heatflow.dat", data_file="lammps.data"):
+    runs = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        if all(f in filenames for f in (temp_file, energy_file, data_file)):
+            runs.append(dirpath)
+    return runs
+
+def _analyze_run_row(directory):
+    # Scalar summary of one run for the ensemble table (profiles and k(t) are dropped)
+    T, composition = parse_run_path(directory)
+    row = {'run_dir': directory, 'composition': composition, 'T': T}
+    try:
+        res = analyze_run(directory)
+    except Exception as exc:  # one broken run must not sink the whole ensemble
+        row['error'] = repr(exc)
+        return row
+    row.update({key: res[key] for key in ('replicate_x', 'length_x', 'area', 't_steady', 'J', 'J_err',
+                                          'gradT', 'gradT_err', 'k', 'k_err', 'converged')})
+    row['T_mean'] = float(np.mean(res['temps']))
+    return row
+
+ENSEMBLE_COLUMNS = ['run_dir', 'composition', 'T', 'replicate_x', 'length_x', 'area', 't_steady', 'J', 'J_err',
+                    'gradT', 'gradT_err', 'k', 'k_err', 'converged', 'T_mean']
+LENGTH_COLUMNS = ['composition', 'T', 'replicate_x', 'length_x', 'n_seeds', 'k_mean', 'k_std', 'k_sem']
+FIT_COLUMNS = ['composition', 'T', 'n_runs', 'n_lengths', 'k_bulk', 'k_bulk_err', 'slope_m_K_W', 'chi2_red']
+
+def analyze_ensemble(directories, workers=None):
+    import pandas as pd
+    if not directories:
+        return pd.DataFrame(columns=ENSEMBLE_COLUMNS)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = list(pool.map(_analyze_run_row, directories))
+    runs_df = pd.DataFrame(rows)
+    for column in ('composition', 'T'):
+        runs_df[column] = runs_df[column].fillna('-')
+    return runs_df
+
+def length_table(runs_df):
+    # Seed ensemble at every length: mean k, scatter between seeds and its standard error
+    import pandas as pd
+    if runs_df.empty or 'replicate_x' not in runs_df:  # no run, or every run failed
+        return pd.DataFrame(columns=LENGTH_COLUMNS)
+    rows = []
+    for (composition, T, replicate_x), group in runs_df.groupby(['composition', 'T', 'replicate_x']):
+        k = group['k'].to_numpy()
+        std = np.std(k, ddof=1) if len(k) > 1 else np.nan
+        rows.append({'composition': composition, 'T': T, 'replicate_x': replicate_x,
+                     'length_x': group['length_x'].iloc[0], 'n_seeds': len(k), 'k_mean': k.mean(),
+                     'k_std': std, 'k_sem': std / np.sqrt(len(k)) if len(k) > 1 else group['k_err'].iloc[0]})
+    return pd.DataFrame(rows, columns=LENGTH_COLUMNS)
+
+# === Step 7: Size extrapolation 1/k = 1/k_bulk + c / Lx ===
+def fit_size_extrapolation(length_x, k, k_err):
+    """Weighted linear fit of 1/k against 1/Lx; returns k_bulk, its error and the fit.
+
+    Weights come from k_err (the seed-ensemble SEM per length, see
+    extrapolation_table); when the points scatter more than those errors
+    allow (reduced chi² > 1) the covariance is scaled up by chi².
+    """
+    length_x, k, k_err = (np.asarray(a, dtype=float) for a in (length_x, k, k_err))
+    ok = np.isfinite(k) & (k > 0) & np.isfinite(length_x)
+    length_x, k, k_err = length_x[ok], k[ok], k_err[ok]
+    if len(np.unique(length_x)) < 2:
+        return {'k_bulk': np.nan, 'k_bulk_err': np.nan, 'intercept': np.nan, 'slope': np.nan,
+                'cov': np.full((2, 2), np.nan), 'chi2_red': np.nan, 'n_runs': len(k)}
+
+    x, y = 1.0 / length_x, 1.0 / k
+    sigma_y = k_err / k ** 2
+    w = 1.0 / sigma_y ** 2 if np.all(np.isfinite(sigma_y) & (sigma_y > 0)) else np.ones_like(y)
+    A = np.column_stack([np.ones_like(x), x])
+    cov = np.linalg.inv(A.T @ (w[:, None] * A))
+    intercept, slope = cov @ A.T @ (w * y)
+    dof = len(y) - 2
+    chi2_red = np.sum(w * (y - intercept - slope * x) ** 2) / dof if dof > 0 else np.nan
+    if np.isfinite(chi2_red):
+        cov = cov * max(chi2_red, 1.0)
+    return {'k_bulk': 1.0 / intercept, 'k_bulk_err': np.sqrt(cov[0, 0]) / intercept ** 2,
+            'intercept': intercept, 'slope': slope, 'cov': cov, 'chi2_red': chi2_red, 'n_runs': len(k)}
+
+def extrapolation_table(lengths_df):
+    # One point per length: seed-averaged k with the spread between seeds as its error
+    import pandas as pd
+    rows = []
+    for (composition, T), group in lengths_df.groupby(['composition', 'T']):
+        fit = fit_size_extrapolation(group['length_x'], group['k_mean'], group['k_sem'])
+        rows.append({'composition': composition, 'T': T, 'n_runs': group['n_seeds'].sum(),
+                     'n_lengths': fit['n_runs'], 'k_bulk': fit['k_bulk'],
+                     'k_bulk_err': fit['k_bulk_err'], 'slope_m_K_W': fit['slope'], 'chi2_red': fit['chi2_red']})
+    return pd.DataFrame(rows, columns=FIT_COLUMNS)
+
+def plot_size_extrapolation(runs_df, fits_df, output_img="nemd_size_extrapolation.png", show=True):
+    import matplotlib.pyplot as plt
+
+    plt.figure()
+    for (composition, T), group in runs_df.groupby(['composition', 'T']):
+        fit = fits_df[(fits_df['composition'] == composition) & (fits_df['T'] == T)].iloc[0]
+        inv_L = 1e-9 / group['length_x']  # 1/nm
+        line = plt.errorbar(inv_L, 1 / group['k'], yerr=group['k_err'] / group['k'] ** 2, fmt='o',
+                            label=f"{composition} {T} K")
+        if np.isfinite(fit['k_bulk']):
+            xs = np.linspace(0, inv_L.max() * 1.05, 50)
+            plt.plot(xs, 1 / fit['k_bulk'] + fit['slope_m_K_W'] * xs * 1e9, '--', color=line[0].get_color())
+    plt.xlabel('1/Lx (nm$^{-1}$)')
+    plt.ylabel('1/k (m·K/W)')
+    plt.title('NEMD Size Extrapolation')
+    plt.xlim(left=0)
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(output_img, dpi=300)
+    if show:
+        plt.show()
+    plt.close()
+
+def run_ensemble(roots, workers=None, output="nemd_ensemble.csv", plot=False, show=True):
+    directories = [d for root in roots for d in find_nemd_runs(root)]
+    print(f"Found {len(directories)} NEMD run directories")
+    runs_df = analyze_ensemble(directories, workers)
+    if 'error' in runs_df:
+        failed = runs_df[runs_df['error'].notna()]
+        for _, row in failed.iterrows():
+            print(f"Failed: {row['run_dir']}: {row['error']}")
+        runs_df = runs_df[runs_df['error'].isna()].drop(columns='error')
+        if runs_df.empty:
+            print(f"All {len(failed)} runs failed; nothing to extrapolate")
+
+    lengths_df = length_table(runs_df)
+    fits_df = extrapolation_table(lengths_df)
+    base = os.path.splitext(output)[0]
+    runs_df.to_csv(output, index=False)
+    lengths_df.to_csv(base + '_lengths.csv', index=False)
+    fits_df.to_csv(base + '_fit.csv', index=False)
+    print(lengths_df.to_string(index=False))
+    for _, fit in fits_df.iterrows():
+        print(f"{fit['composition']} {fit['T']} K: bulk k = {fit['k_bulk']:.3f} ± {fit['k_bulk_err']:.3f} W/m·K "
+              f"({fit['n_runs']} runs, {fit['n_lengths']} lengths, reduced chi² = {fit['chi2_red']:.2f})")
+    if plot and not fits_df.empty:
+        plot_size_extrapolation(runs_df, fits_df, show=show)
+    return runs_df, lengths_df, fits_df
+
+# === Main program ===
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="NEMD thermal conductivity: one run (default) or a size/seed ensemble")
+    parser.add_argument('--ensemble', nargs='*', default=None, metavar='ROOT',
+                        help="Analyse every run directory under ROOT(s) (default: .) and extrapolate 1/k vs 1/Lx")
+    parser.add_argument('--workers', type=int, default=None, help="Process pool size (default: all cores)")
+    parser.add_argument('--output', default='nemd_ensemble.csv')
+    parser.add_argument('--plot', action='store_true', help="Ensemble mode: write nemd_size_extrapolation.png")
+    parser.add_argument('--no-show', action='store_true', help="Save figures without opening a window (batch jobs)")
+    instrument.add_report_argument(parser)
+    result_cache.add_cache_arguments(parser)
+    args = parser.parse_args()
+    instrument.start("analyze_nemd", args.report)
+    result_cache.enable_from_args(args)
+    if args.ensemble is not None:
+        with stage("ensemble"):
+            run_ensemble(args.ensemble or ['.'], args.workers, args.output, args.plot, show=not args.no_show)
+        instrument.finish(os.path.splitext(args.output)[0] + "_report.json")
+    else:
+        res = analyze_run(".")
+        replicate_x, length_x, area = res['replicate_x'], res['length_x'], res['area']
+        print(f"Replication along x: {replicate_x}")
+        print(f"Box dimensions: Lx = {length_x:.2e} m, Area = {area:.2e} m²")
+        print(f"Steady state from step {res['t_steady']} (gradient: {res['t_grad']}, heat flux: {res['t_flux']}); "
+              f"averaging {res['n_blocks'] - res['start_block']} of {res['n_blocks']} blocks")
+
+        # Save temperature distribution to CSV (e.g., for plotting in Origin)
+        data = pd.DataFrame({
+            'X_Position': res['x'],
+            'Temperature': res['temps']})
+        data.to_csv('temperature_distribution.csv', index=False)
+        with stage("plot_temperature"):
+            plot_temperature(res['x'], res['temps'], show=not args.no_show)
+
+        J, J_err, k, k_err = res['J'], res['J_err'], res['k'], res['k_err']
+        gradT, gradT_err, flux_stats, converged = res['gradT'], res['gradT_err'], res['flux_stats'], res['converged']
+        print(f"Heat flux J = {J:.3e} ± {J_err:.1e} W/m²")
+        print(f"Temperature gradient ∂T/∂x = {gradT:.3f} ± {gradT_err:.1e} K/m")
+        print(f"Thermal conductivity k = {k:.3f} ± {k_err:.3f} W/m·K")
+        print(f"Steps of NEMD needed for a 5% heat-flux error: {flux_stats['steps_required']:.0f}")
+
+        pd.DataFrame({'Step': res['k_times'], 'dT_dx': res['k_grad'], 'J': res['k_flux'],
+                      'k': res['k_t']}).to_csv('k_vs_time.csv', index=False)
+        print(f"Sliding-window k converged: {'yes' if converged else 'no'}")
+        with stage("plot_k_vs_time"):
+            plot_k_vs_time(res['k_times'], res['k_t'], res['t_steady'], show=not args.no_show)
+
+        # Save results to file
+        with open("thermal_conductivity_results.txt", "w") as f:
+            f.write(f"Replication along x: {replicate_x}\n")
+            f.write(f"Steady state from step: {res['t_steady']}\n")
+            f.write(f"Box length (x): {length_x:.5e} m\n")
+            f.write(f"Cross-sectional area: {area:.5e} m²\n")
+            f.write(f"Heat flux J: {J:.5e} W/m²\n")
+            f.write(f"Temperature gradient dT/dx: {gradT:.5f} K/m\n")
+            f.write(f"Thermal conductivity k: {k:.5f} W/m·K\n")
+            f.write(f"Heat flux error (block SEM): {J_err:.5e} W/m²\n")
+            f.write(f"Temperature gradient error (bootstrap): {gradT_err:.5e} K/m\n")
+            f.write(f"Thermal conductivity error: {k_err:.5f} W/m·K\n")
+            f.write(f"Heat flux statistical inefficiency: {flux_stats['g']:.2f}\n")
+            f.write(f"Steps needed for 5% heat-flux error: {flux_stats['steps_required']:.0f}\n")
+            f.write(f"Sliding-window k converged: {'yes' if converged else 'no'}\n")
+        print("Results saved to thermal_conductivity_results.txt")
+        if instrument.finish("thermal_conductivity_report.json"):
+            print("Run report saved to thermal_conductivity_report.json")
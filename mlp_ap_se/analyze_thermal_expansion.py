@@ -0,0 +1,253 @@
+import os
+import glob
+import re
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from .uncertainty import summarize, batched_slope, detect_equilibration
+from .lammps_dump import increasing_rows
+from .instrument import stage
+from .result_cache import cached
+from . import instrument
+from . import result_cache
+
+FILE_PATTERN = "thermal_expansion_*K.txt"
+TARGET_REL_ERR = 1e-4   # Default target relative SEM of <V> and <Lx> per temperature (--target-rel-err)
+MIN_ROWS = 10           # Fewer rows than this are too few to trim and block-average
+
+# ---------- Extract data ----------
+def find_expansion_files(directory="."):
+    # All thermal_expansion_XXXK.txt files, sorted by temperature
+    files = glob.glob(os.path.join(directory, FILE_PATTERN))
+    return sorted(files, key=lambda x: int(re.search(r"(\d+)K", os.path.basename(x)).group(1)))
+
+def summarize_rows(fname, data, trim=True, target_rel_err=TARGET_REL_ERR):
+    # Columns: step, temperature, volume, Lx, Ly, Lz (fix ave/time in in.expansion).
+    # The NPT transient is dropped from where the volume series becomes stationary
+    start = detect_equilibration(data[:, 2])[0] if trim else 0
+    prod = data[start:]
+    vol_stats = summarize(prod[:, 2], target_rel_err)
+    lx_stats = summarize(prod[:, 3], target_rel_err)
+    return {'file': fname, 'rows': len(data), 'trimmed_rows': start,
+            'temp': np.mean(prod[:, 1]),   # Temperature
+            'volume': vol_stats['mean'],   # Volume
+            'length': lx_stats['mean'],    # Lx (assuming cubic cell)
+            'volume_err': vol_stats['sem'], 'length_err': lx_stats['sem'],
+            'g': vol_stats['g'], 'rows_required': vol_stats['n_required']}
+
+def _summarize_file(fname, trim=True, target_rel_err=TARGET_REL_ERR):
+    # Recorded only when called in the reporting process (not inside pool workers)
+    with stage("load_expansion_file", files=[fname]) as st:
+        data = np.loadtxt(fname, comments="#", ndmin=2)
+        data = data[increasing_rows(data[:, 0], fname)]
+        st['rows'] = len(data)
+    return summarize_rows(fname, data, trim, target_rel_err)
+
+def summarize_file(fname, trim=True, target_rel_err=TARGET_REL_ERR):
+    # Reused from the result cache while the file contents are unchanged; identical
+    # contents under another name share the entry, hence the 'file' override
+    row = cached("expansion.summarize_file", [fname], {'trim': trim, 'target_rel_err': target_rel_err},
+                 lambda: _summarize_file(fname, trim, target_rel_err),
+                 modules=('analyze_thermal_expansion', 'uncertainty'))
+    return dict(row, file=fname)
+
+def summarize_files(files, trim=True, workers=None, target_rel_err=TARGET_REL_ERR):
+    # Per-temperature files are parsed and trimmed concurrently
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(summarize_file, files, [trim] * len(files), [target_rel_err] * len(files)))
+
+# ---------- Fitting ----------
+def fit_expansion(rows, n_boot=5000, rng=None):
+    temps = np.array([r['temp'] for r in rows])
+    volumes = np.array([r['volume'] for r in rows])
+    lengths = np.array([r['length'] for r in rows])
+    volume_errs = np.array([r['volume_err'] for r in rows])
+    length_errs = np.array([r['length_err'] for r in rows])
+
+    # Fit Volume vs. Temperature
+    vol_fit = np.polyfit(temps, volumes, 1)
+    alpha_V = vol_fit[0] / volumes[0]   # Volume thermal expansion coefficient
+
+    # Fit Lattice Constant vs. Temperature
+    len_fit = np.polyfit(temps, lengths, 1)
+    alpha_L = len_fit[0] / lengths[0]   # Linear thermal expansion coefficient
+
+    # Parametric bootstrap of the fits (all replicas fitted at once)
+    rng = np.random.default_rng(rng)
+    vol_reps = volumes + rng.standard_normal((n_boot, len(temps))) * volume_errs
+    len_reps = lengths + rng.standard_normal((n_boot, len(temps))) * length_errs
+    alpha_V_err = np.std(batched_slope(temps, vol_reps) / vol_reps[:, 0], ddof=1)
+    alpha_L_err = np.std(batched_slope(temps, len_reps) / len_reps[:, 0], ddof=1)
+
+    return {'temps': temps, 'volumes': volumes, 'lengths': lengths,
+            'volume_errs': volume_errs, 'length_errs': length_errs,
+            'vol_fit': vol_fit, 'len_fit': len_fit,
+            'alpha_V': alpha_V, 'alpha_L': alpha_L,
+            'alpha_V_err': alpha_V_err, 'alpha_L_err': alpha_L_err}
+
+# ---------- Print and save results ----------
+def write_results(fit, filename="expansion_coefficients.txt"):
+    with open(filename, "w") as f:
+        f.write("Thermal Expansion Coefficients (from LAMMPS output)\n")
+        f.write("-----------------------------------------------------\n")
+        f.write(f"Volume thermal expansion coefficient α_V = {fit['alpha_V']:.6e} K^-1\n")
+        f.write(f"Linear thermal expansion coefficient α_L = {fit['alpha_L']:.6e} K^-1\n")
+        f.write(f"Fitted V(T): V = {fit['vol_fit'][0]:.6f} * T + {fit['vol_fit'][1]:.3f}\n")
+        f.write(f"Fitted L(T): L = {fit['len_fit'][0]:.6f} * T + {fit['len_fit'][1]:.3f}\n")
+        f.write(f"Bootstrap std of α_V = {fit['alpha_V_err']:.6e} K^-1\n")
+        f.write(f"Bootstrap std of α_L = {fit['alpha_L_err']:.6e} K^-1\n")
+
+def print_results(rows, fit, target_rel_err=TARGET_REL_ERR):
+    for r in rows:
+        print(f"{r['file']}: V = {r['volume']:.3f} ± {r['volume_err']:.3f} Å³ (g = {r['g']:.1f}, "
+              f"{r['trimmed_rows']} of {r['rows']} rows discarded as equilibration, "
+              f"rows needed for {target_rel_err:.0e} rel. error: {r['rows_required']})")
+    print(f" Volume thermal expansion coefficient α_V = {fit['alpha_V']:.3e} ± {fit['alpha_V_err']:.1e} K^-1")
+    print(f" Linear thermal expansion coefficient α_L = {fit['alpha_L']:.3e} ± {fit['alpha_L_err']:.1e} K^-1")
+
+# ---------- Visualization and save figure ----------
+def plot_expansion(fit, output_img="thermal_expansion.png", show=True):
+    import matplotlib.pyplot as plt
+
+    temps = fit['temps']
+    plt.figure(figsize=(10, 5))
+
+    plt.subplot(1, 2, 1)
+    plt.errorbar(temps, fit['volumes'], yerr=fit['volume_errs'], fmt='o-', label='Volume (avg)', color='blue')
+    plt.plot(temps, np.polyval(fit['vol_fit'], temps), '--', label='Linear Fit', color='navy')
+    plt.xlabel("Temperature (K)")
+    plt.ylabel("Volume (Å³)")
+    plt.title("Thermal Expansion (Volume)")
+    plt.legend()
+    plt.grid(True)
+
+    plt.subplot(1, 2, 2)
+    plt.errorbar(temps, fit['lengths'], yerr=fit['length_errs'], fmt='o-', label='Lattice Const (Lx)', color='green')
+    plt.plot(temps, np.polyval(fit['len_fit'], temps), '--', label='Linear Fit', color='darkgreen')
+    plt.xlabel("Temperature (K)")
+    plt.ylabel("Lattice Constant (Å)")
+    plt.title("Thermal Expansion (Lattice)")
+    plt.legend()
+    plt.grid(True)
+
+    plt.tight_layout()
+    plt.savefig(output_img, dpi=300)
+    if show:
+        plt.show()
+    plt.close()
+
+# ---------- Watch mode: follow the in.expansion temperature loop while it runs ----------
+class ExpansionTail:
+    # Reads only the bytes appended since the last poll; a partially written
+    # last line is kept back until LAMMPS finishes it
+    def __init__(self, fname):
+        self.fname = fname
+        self.offset = 0
+        self.pending = b""
+        self.rows = None
+
+    def poll(self):
+        with open(self.fname, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+            self.offset = f.tell()
+        if not chunk:
+            return 0
+        text = self.pending + chunk
+        cut = text.rfind(b"\n") + 1
+        self.pending = text[cut:]
+        lines = [line for line in text[:cut].splitlines() if line.strip() and not line.startswith(b"#")]
+        if not lines:
+            return 0
+        new = np.loadtxt(lines, ndmin=2)
+        new = new[increasing_rows(new[:, 0], self.fname, None if self.rows is None else self.rows[-1, 0])]
+        self.rows = new if self.rows is None else np.concatenate([self.rows, new])
+        return len(new)
+
+def watch(directory=".", interval=60.0, rows_per_temperature=None, stop_rel_err=None, n_temperatures=None,
+          target_rel_err=TARGET_REL_ERR):
+    """Update α_V/α_L each time a temperature of the sweep completes.
+
+    A temperature counts as complete once the next temperature's file exists
+    (the LAMMPS loop moved on) or it has rows_per_temperature rows; one
+    completed with fewer than MIN_ROWS rows is counted but left out of the fit. With
+    stop_rel_err, returns as soon as both α have a bootstrap relative error
+    below it, so the remaining temperatures can be cancelled. Also returns
+    once n_temperatures temperatures are complete.
+    """
+    tails = {}
+    done = {}
+    fit = None
+    while True:
+        files = find_expansion_files(directory)
+        for fname in files:
+            tails.setdefault(fname, ExpansionTail(fname)).poll()
+        for i, fname in enumerate(files):
+            rows = tails[fname].rows
+            if rows is None:
+                continue
+            complete = i < len(files) - 1 or (rows_per_temperature and len(rows) >= rows_per_temperature)
+            if not complete or fname in done:
+                continue
+            if len(rows) < MIN_ROWS:
+                done[fname] = None
+                print(f"Completed {fname} with only {len(rows)} rows; left out of the fit")
+                continue
+            done[fname] = summarize_rows(fname, rows, target_rel_err=target_rel_err)
+            print(f"Completed {fname}: V = {done[fname]['volume']:.3f} ± {done[fname]['volume_err']:.3f} Å³")
+            fitted = [done[f] for f in files if done.get(f)]
+            if len(fitted) >= 2:
+                fit = fit_expansion(fitted)
+                write_results(fit, os.path.join(directory, "expansion_coefficients.txt"))
+                print(f"  α_V = {fit['alpha_V']:.3e} ± {fit['alpha_V_err']:.1e} K^-1, "
+                      f"α_L = {fit['alpha_L']:.3e} ± {fit['alpha_L_err']:.1e} K^-1 "
+                      f"({len(fitted)} temperatures)")
+                if stop_rel_err and len(fitted) >= 3 and \
+                        fit['alpha_V_err'] / abs(fit['alpha_V']) < stop_rel_err and \
+                        fit['alpha_L_err'] / abs(fit['alpha_L']) < stop_rel_err:
+                    print(f"Expansion fit converged below {stop_rel_err:.0%} relative error; the sweep can be stopped.")
+                    return fit
+        if n_temperatures and len(done) >= n_temperatures:
+            return fit
+        time.sleep(interval)
+
+# ---------- Main entry point ----------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Thermal expansion coefficients from thermal_expansion_*K.txt")
+    parser.add_argument('directory', nargs='?', default='.')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-trim', action='store_true', help="Average from row 0 (keep the NPT transient)")
+    parser.add_argument('--watch', action='store_true', help="Follow a running in.expansion loop")
+    parser.add_argument('--interval', type=float, default=60.0, help="Watch polling interval (s)")
+    parser.add_argument('--rows-per-temperature', type=int, default=1000,
+                        help="Rows in a finished file (run 1000000 / fix ave/time every 1000 steps)")
+    parser.add_argument('--n-temperatures', type=int, default=8, help="Temperatures in the in.expansion loop")
+    parser.add_argument('--stop-rel-err', type=float, default=None,
+                        help="In watch mode, stop once α_V and α_L reach this relative error")
+    parser.add_argument('--target-rel-err', type=float, default=TARGET_REL_ERR,
+                        help="Relative SEM of <V> and <Lx> the rows-needed estimate aims at")
+    instrument.add_report_argument(parser)
+    result_cache.add_cache_arguments(parser)
+    args = parser.parse_args()
+    instrument.start("analyze_thermal_expansion", args.report)
+    result_cache.enable_from_args(args)
+
+    if args.watch:
+        watch(args.directory, args.interval, args.rows_per_temperature, args.stop_rel_err, args.n_temperatures,
+              args.target_rel_err)
+    else:
+        files = find_expansion_files(args.directory)
+        with stage("summarize_files", files=files) as st:
+            rows = summarize_files(files, trim=not args.no_trim, workers=args.workers,
+                                   target_rel_err=args.target_rel_err)
+            st['rows'] = sum(r['rows'] for r in rows)
+        with stage("fit_bootstrap"):
+            fit = fit_expansion(rows)
+        print_results(rows, fit, args.target_rel_err)
+        write_results(fit, os.path.join(args.directory, "expansion_coefficients.txt"))
+        with stage("plot"):
+            plot_expansion(fit, os.path.join(args.directory, "thermal_expansion.png"))
+    report = instrument.finish(os.path.join(args.directory, "expansion_report.json"))
+    if report:
+        print(f"Run report saved to {report}")
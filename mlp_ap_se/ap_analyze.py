@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from . import instrument
+from . import result_cache
+
+# ==========================
+# Per-directory analyses behind one importable API and one CLI:
+#   from mlp_ap_se.ap_analyze import nemd
+#   res = nemd("runs/Li3OCl/300K/rep_x_8")      # dict of NumPy arrays and floats
+#   ap-analyze msd|nemd|expansion|traj|loss <dir> [<dir> ...] [--plot] [--show]
+# The analysis modules, and with them pandas/scipy/matplotlib, are imported by
+# the subcommand that needs them. Nothing is plotted unless asked for, and then
+# with the Agg backend (no window) unless --show is given.
+# ==========================
+def run_temperature(directory, T=None):
+    # Explicit T, else parsed from the path (runs/Li3OCl/600K/, .../T600/)
+    if T is not None:
+        return float(T)
+    from .runpaths import parse_run_path
+    T = parse_run_path(directory)[0]
+    if T is None:
+        raise ValueError(f"No temperature in the path {directory}; pass T explicitly")
+    return T
+
+# ==========================
+# Analyses: each takes a run directory and returns a dict (no plotting, no files written)
+# ==========================
+def msd(directory=".", T=None, timestep_fs=1.0, msd_file="msd_Li.out", poscar="POSCAR"):
+    from .transport import analyze_msd_file
+    return analyze_msd_file(os.path.join(directory, msd_file), os.path.join(directory, poscar),
+                            run_temperature(directory, T), timestep_fs)
+
+
+def traj(directory=".", T=None, timestep_fs=1.0, stride=1, dump_file="traj_all.lammpstrj"):
+    from .transport import analyze_trajectory
+    return analyze_trajectory(os.path.join(directory, dump_file), run_temperature(directory, T),
+                              timestep_fs=timestep_fs, stride=stride)
+
+
+def nemd(directory=".", target_rel_err=0.05):
+    from .analyze_nemd import analyze_run
+    return analyze_run(directory, target_rel_err=target_rel_err)
+
+
+def expansion(directory=".", trim=True, workers=1, target_rel_err=1e-4):
+    # workers=1 keeps everything in the calling process (no pool start-up per directory)
+    from .analyze_thermal_expansion import find_expansion_files, summarize_file, summarize_files, fit_expansion
+    files = find_expansion_files(directory)
+    if len(files) < 2:
+        raise ValueError(f"Need at least two thermal_expansion_*K.txt files in {directory}")
+    if workers == 1:
+        rows = [summarize_file(f, trim, target_rel_err) for f in files]
+    else:
+        rows = summarize_files(files, trim, workers, target_rel_err)
+    res = fit_expansion(rows)
+    res['files'] = files
+    res['trimmed_rows'] = np.array([r['trimmed_rows'] for r in rows])
+    return res
+
+
+def loss(directory=".", lcurve="lcurve.out", window=50):
+    from . import plot_loss
+    columns, data = plot_loss.load_lcurve(os.path.join(directory, lcurve))
+    steps = data[:, columns.index('step')]
+    val_name = plot_loss.validation_column(columns)
+    values = data[:, columns.index(val_name)]
+    res = {'columns': columns, 'data': data, 'n_rows': len(data), 'last_step': steps[-1],
+           'validation_column': val_name, 'best_validation': np.nanmin(values),
+           'best_step': steps[np.nanargmin(values)],
+           'messages': plot_loss.check_training(steps, values, window=window)}
+    res.update({f"final_{name}": data[-1, i] for i, name in enumerate(columns) if name != 'step'})
+    return res
+
+# ==========================
+# Plots (written next to the data); matplotlib is imported only here
+# ==========================
+def use_backend(show=False):
+    import matplotlib
+    if not show:
+        matplotlib.use('Agg')
+
+
+def plot_msd(res, directory=".", show=False):
+    import matplotlib.pyplot as plt
+
+    lag_ps = res['lag_time_fs'] * 1e-3
+    plt.rcParams['font.family'] = 'Times New Roman'
+    plt.figure(figsize=(8, 6))
+    plt.plot(lag_ps, res['msd_A2'], label='MSD data', lw=2)
+    plt.plot(lag_ps, np.polyval(res['fit'], res['lag_time_fs']), 'r--', label='Linear fit')
+    plt.xlabel('Time (ps)', fontsize=14)
+    plt.ylabel(r'MSD ($\mathrm{\AA}^2$)', fontsize=14)
+    plt.title('Li MSD and Diffusion Fitting', fontsize=16)
+    plt.legend(fontsize=14)
+
+    # Annotate diffusivity and conductivity
+    textstr = f"Diffusivity = {res['D_cm2_s']:.3e} cm²/s\nConductivity = {res['sigma_S_cm']:.3e} S/cm"
+    plt.text(0.05 * max(lag_ps), 0.15 * max(res['msd_A2']), textstr,
+             fontsize=13, bbox=dict(facecolor='white', alpha=0.7))
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(os.path.join(directory, 'msd_fit.png'), dpi=300)
+    if show:
+        plt.show()
+    plt.close()
+
+
+def plot_traj(res, directory=".", show=False):
+    import matplotlib.pyplot as plt
+
+    lag_ps = res['lag_time_fs'] * 1e-3
+    plt.figure(figsize=(8, 6))
+    for name, sp in res['species'].items():
+        line, = plt.plot(lag_ps, sp['msd'], lw=2, label=f'{name} MSD')
+        start, end = sp['window']
+        plt.plot(lag_ps[start:end], np.polyval(sp['fit'], res['lag_time_fs'][start:end]), '--',
+                 color=line.get_color())
+    plt.xlabel('Time (ps)', fontsize=14)
+    plt.ylabel(r'MSD ($\mathrm{\AA}^2$)', fontsize=14)
+    plt.title('Multi-origin MSD and Diffusive Fits', fontsize=16)
+    plt.legend(fontsize=14)
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(os.path.join(directory, 'msd_multi_origin.png'), dpi=300)
+    if show:
+        plt.show()
+    plt.close()
+
+
+def plot_nemd(res, directory=".", show=False):
+    from .analyze_nemd import plot_temperature, plot_k_vs_time
+    plot_temperature(res['x'], res['temps'], os.path.join(directory, "temp_profile.png"), show)
+    plot_k_vs_time(res['k_times'], res['k_t'], res['t_steady'], os.path.join(directory, "k_vs_time.png"), show)
+
+
+def plot_expansion(res, directory=".", show=False):
+    from .analyze_thermal_expansion import plot_expansion as plot_fit
+    plot_fit(res, os.path.join(directory, "thermal_expansion.png"), show)
+
+
+def plot_loss_curves(res, directory=".", show=False, lcurve="lcurve.out"):
+    import matplotlib.pyplot as plt
+    from . import plot_loss
+    tail = plot_loss.LcurveTail(os.path.join(directory, lcurve))
+    tail.poll()
+    fig, axes, lines = plot_loss.create_figure(tail.columns)
+    plot_loss.update_figure(fig, axes, lines, tail, directory)
+    if show:
+        plt.show()
+    plt.close(fig)
+
+
+# Subcommand -> (analysis, plot, analysis options taken from the command line)
+ANALYSES = {
+    'msd': (msd, plot_msd, ('T', 'timestep_fs')),
+    'traj': (traj, plot_traj, ('T', 'timestep_fs', 'stride')),
+    'nemd': (nemd, plot_nemd, ('target_rel_err',)),
+    'expansion': (expansion, plot_expansion, ('trim', 'workers', 'target_rel_err')),
+    'loss': (loss, plot_loss_curves, ('window',)),
+}
+
+
+def analyze(kind, directory=".", plot=False, show=False, **kwargs):
+    """Run one analysis on one directory (optionally plotting it) and return its result dict."""
+    analysis, plotter, _ = ANALYSES[kind]
+    with instrument.stage(kind):
+        res = analysis(directory, **kwargs)
+    if plot:
+        use_backend(show)
+        with instrument.stage(f"plot_{kind}"):
+            plotter(res, directory, show)
+    return res
+
+
+def scalars(result, prefix=""):
+    # Flat {name: number/str} view of a result; nested dicts (e.g. traj species) are
+    # prefixed with their key, arrays are left out
+    flat = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(scalars(value, f"{name}_"))
+        elif isinstance(value, (str, bool)) or value is None:
+            flat[name] = value
+        elif isinstance(value, list) and all(isinstance(v, str) for v in value):
+            flat[name] = value
+        elif np.ndim(value) == 0 and np.isscalar(value):
+            flat[name] = value.item() if isinstance(value, np.generic) else value
+    return flat
+
+# ==========================
+# Command line: one JSON line per directory on stdout
+# ==========================
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('directories', nargs='*', default=['.'])
+    common.add_argument('--plot', action='store_true', help="Write the usual PNGs into each directory")
+    common.add_argument('--show', action='store_true', help="Open plot windows (default: Agg, no window)")
+    instrument.add_report_argument(common)
+    result_cache.add_cache_arguments(common)
+
+    parser = argparse.ArgumentParser(prog='ap-analyze', description="Analyse MD/training run directories in one process")
+    sub = parser.add_subparsers(dest='kind', required=True)
+    for kind in ('msd', 'traj'):
+        p = sub.add_parser(kind, parents=[common])
+        p.add_argument('--T', type=float, default=None, help="Temperature (K); default parsed from the path")
+        p.add_argument('--timestep-fs', type=float, default=1.0)
+        if kind == 'traj':
+            p.add_argument('--stride', type=int, default=1)
+    p = sub.add_parser('nemd', parents=[common])
+    p.add_argument('--target-rel-err', type=float, default=0.05)
+    p = sub.add_parser('expansion', parents=[common])
+    p.add_argument('--no-trim', dest='trim', action='store_false')
+    p.add_argument('--workers', type=int, default=1)
+    p.add_argument('--target-rel-err', type=float, default=1e-4)
+    p = sub.add_parser('loss', parents=[common])
+    p.add_argument('--window', type=int, default=50, help="Rows compared by the plateau/divergence check")
+    args = parser.parse_args(argv)
+
+    options = {name: getattr(args, name) for name in ANALYSES[args.kind][2]}
+    result_cache.enable_from_args(args)  # unchanged directories are read back, not recomputed
+    failed = 0
+    for directory in args.directories:
+        # One run report per directory (--report or $AP_RUN_REPORT), written next to its results
+        instrument.start(f"ap-analyze {args.kind}", args.report)
+        try:
+            res = analyze(args.kind, directory, args.plot, args.show, **options)
+            line = {'directory': directory, 'kind': args.kind}
+            line.update({k: None if isinstance(v, float) and not np.isfinite(v) else v  # NaN is not JSON
+                         for k, v in scalars(res).items()})
+        except Exception as exc:  # keep going over the remaining directories
+            failed += 1
+            line = {'directory': directory, 'kind': args.kind, 'error': repr(exc)}
+        report = instrument.finish(os.path.join(directory, f"{args.kind}_report.json"))
+        if report:
+            line['report'] = report
+        print(json.dumps(line), flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import os
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from .transport import (read_poscar, load_msd_file, fit_diffusivity, nernst_einstein_conductivity,
+                       analyze_trajectory)
+from .runpaths import parse_run_path
+
+kB_eV = 8.617333262e-5  # eV/K
+
+# ------------------------ Run directory discovery ----------------------------
+# A run directory holds msd_Li.out (+ POSCAR) or traj_all.lammpstrj; temperature and
+# composition are read from its path (runpaths.parse_run_path)
+def find_run_dirs(root, msd_file='msd_Li.out', dump_file='traj_all.lammpstrj'):
+    runs = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.endswith('.cache'))
+        if msd_file in filenames or dump_file in filenames:
+            temperature, composition = parse_run_path(dirpath)
+            if temperature is not None:
+                runs.append((dirpath, temperature, composition or os.path.basename(os.path.dirname(dirpath))))
+    return runs
+
+
+# ------------------------ Per-directory analysis (runs in worker processes, no plotting) ----------------------------
+def analyze_run(run_dir, T, composition, timestep_fs=1.0, use_trajectory=True,
+                msd_file='msd_Li.out', dump_file='traj_all.lammpstrj', poscar='POSCAR'):
+    row = {'run_dir': run_dir, 'composition': composition, 'T': T}
+    dump_path = os.path.join(run_dir, dump_file)
+    if use_trajectory and os.path.exists(dump_path):
+        res = analyze_trajectory(dump_path, T, timestep_fs=timestep_fs, species=[1])
+        li = res['species']['Li']
+        row.update(source='trajectory', n_Li=li['n_ions'], volume_A3=res['volume_A3'],
+                   D_cm2_s=li['D_cm2_s'], D_err=li['D_err'], sigma_NE_S_cm=li['sigma_NE_S_cm'],
+                   sigma_S_cm=res['charge']['sigma_S_cm'], sigma_err=res['charge']['sigma_err'],
+                   haven_ratio=res.get('li_collective', {}).get('haven_ratio', np.nan))
+    else:
+        volume_A3, n_li = read_poscar(os.path.join(run_dir, poscar))
+        lag_time_fs, msd_A2 = load_msd_file(os.path.join(run_dir, msd_file), timestep_fs)
+        D, *_ = fit_diffusivity(lag_time_fs, msd_A2)
+        sigma_NE = nernst_einstein_conductivity(D, n_li, volume_A3, T)
+        row.update(source='msd_file', n_Li=n_li, volume_A3=volume_A3, D_cm2_s=D,
+                   sigma_NE_S_cm=sigma_NE, sigma_S_cm=sigma_NE, haven_ratio=np.nan)
+    return row
+
+
+def _analyze_run_star(args):
+    run_dir, T, composition, kwargs = args
+    try:
+        return analyze_run(run_dir, T, composition, **kwargs)
+    except Exception as exc:  # one broken run must not sink the whole batch
+        return {'run_dir': run_dir, 'composition': composition, 'T': T, 'error': repr(exc)}
+
+
+RUN_COLUMNS = ['run_dir', 'composition', 'T', 'source', 'n_Li', 'volume_A3', 'D_cm2_s', 'D_err',
+               'sigma_NE_S_cm', 'sigma_S_cm', 'sigma_err', 'haven_ratio']
+
+
+def analyze_runs(runs, workers=None, **kwargs):
+    import pandas as pd
+    if not runs:
+        return pd.DataFrame(columns=RUN_COLUMNS)
+    tasks = [(run_dir, T, comp, kwargs) for run_dir, T, comp in runs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = list(pool.map(_analyze_run_star, tasks))
+    return pd.DataFrame(rows).sort_values(['composition', 'T']).reset_index(drop=True)
+
+
+# ------------------------ Arrhenius fit ----------------------------
+def fit_arrhenius(T, sigma_S_cm, T_target=300.0):
+    """Fit ln(sigma T) = ln A - Ea / (kB T); returns Ea (eV), its std and sigma(T_target)."""
+    T = np.asarray(T, dtype=float)
+    sigma = np.asarray(sigma_S_cm, dtype=float)
+    ok = np.isfinite(sigma) & (sigma > 0)
+    T, sigma = T[ok], sigma[ok]
+    if len(T) < 2:
+        return np.nan, np.nan, np.nan
+    x = 1.0 / T
+    y = np.log(sigma * T)
+    if len(T) > 2:
+        (slope, intercept), cov = np.polyfit(x, y, 1, cov=True)
+        Ea_err = np.sqrt(cov[0, 0]) * kB_eV
+    else:
+        slope, intercept = np.polyfit(x, y, 1)
+        Ea_err = np.nan
+    Ea = -slope * kB_eV
+    sigma_target = np.exp(intercept + slope / T_target) / T_target
+    return Ea, Ea_err, sigma_target
+
+
+def arrhenius_table(runs_df, T_target=300.0, column='sigma_S_cm'):
+    import pandas as pd
+    rows = []
+    for composition, group in runs_df.groupby('composition'):
+        Ea, Ea_err, sigma_target = fit_arrhenius(group['T'], group[column], T_target)
+        D_Ea, D_Ea_err, _ = fit_arrhenius(group['T'], group['D_cm2_s'] / group['T'], T_target)
+        rows.append({'composition': composition, 'n_temperatures': len(group),
+                     'Ea_eV': Ea, 'Ea_err_eV': Ea_err,
+                     f'sigma_{int(T_target)}K_S_cm': sigma_target,
+                     'Ea_D_eV': D_Ea, 'Ea_D_err_eV': D_Ea_err})
+    return pd.DataFrame(rows)
+
+
+# ------------------------ Deferred plotting ----------------------------
+def plot_arrhenius(runs_df, output_img='arrhenius.png', column='sigma_S_cm'):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    plt.rcParams['font.family'] = 'Times New Roman'
+    plt.figure(figsize=(8, 6))
+    for composition, group in runs_df.groupby('composition'):
+        x = 1000.0 / group['T']
+        y = np.log10(group[column] * group['T'])
+        plt.plot(x, y, 'o-', label=composition)
+    plt.xlabel('1000/T (K$^{-1}$)', fontsize=14)
+    plt.ylabel(r'log$_{10}$($\sigma$T) (S K cm$^{-1}$)', fontsize=14)
+    plt.title('Arrhenius Plot of Ionic Conductivity', fontsize=16)
+    plt.legend(fontsize=12)
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(output_img, dpi=300)
+    plt.close()
+
+
+# ------------------------ Main entry point ----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch MSD fits over run directories and Arrhenius analysis")
+    parser.add_argument('root', nargs='?', default='.', help="Directory tree holding the runs")
+    parser.add_argument('--workers', type=int, default=None, help="Process pool size (default: all cores)")
+    parser.add_argument('--timestep-fs', type=float, default=1.0)
+    parser.add_argument('--msd-only', action='store_true', help="Fit msd_Li.out even when a dump is present")
+    parser.add_argument('--T-target', type=float, default=300.0, help="Extrapolation temperature (K)")
+    parser.add_argument('--output', default='arrhenius_results.csv')
+    parser.add_argument('--plot', action='store_true', help="Write arrhenius.png after all fits finish")
+    args = parser.parse_args()
+
+    runs = find_run_dirs(args.root)
+    print(f"Found {len(runs)} run directories under {args.root}")
+    if not runs:
+        raise SystemExit("Nothing to fit: no directory with msd_Li.out or traj_all.lammpstrj "
+                         "under a <T>K or T<T> directory")
+    runs_df = analyze_runs(runs, workers=args.workers, timestep_fs=args.timestep_fs,
+                           use_trajectory=not args.msd_only)
+    if 'error' in runs_df:
+        for _, row in runs_df[runs_df['error'].notna()].iterrows():
+            print(f"Failed: {row['run_dir']}: {row['error']}")
+        runs_df = runs_df[runs_df['error'].isna()].drop(columns='error')
+
+    fits_df = arrhenius_table(runs_df, T_target=args.T_target)
+    runs_df.to_csv(args.output, index=False)
+    fits_df.to_csv(os.path.splitext(args.output)[0] + '_fit.csv', index=False)
+    print(fits_df.to_string(index=False))
+
+    if args.plot:
+        plot_arrhenius(runs_df)
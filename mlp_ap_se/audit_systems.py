@@ -0,0 +1,221 @@
+import os
+import glob
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from itertools import product
+from scipy.spatial import cKDTree
+from concurrent.futures import ProcessPoolExecutor
+
+# ==========================
+# Training settings from input.json / input_v2_compat.json
+# ==========================
+def load_training_input(input_file):
+    # Returns (systems as absolute paths, type_map, rcut, sel). input.json carries
+    # no sel, so it is taken from input_v2_compat.json next to it when available
+    with open(input_file) as f:
+        config = json.load(f)
+    base = os.path.dirname(os.path.abspath(input_file))
+    training_data = config['training'].get('training_data', config['training'])
+    systems = [os.path.normpath(os.path.join(base, s)) for s in training_data['systems']]
+    descriptor = config['model']['descriptor']
+    sel = descriptor.get('sel')
+    compat = os.path.join(base, "input_v2_compat.json")
+    if sel is None and os.path.exists(compat):
+        with open(compat) as f:
+            sel = json.load(f)['model']['descriptor'].get('sel')
+    return systems, config['model']['type_map'], descriptor['rcut'], sel
+
+# ==========================
+# Neighbour counting (periodic, any cell shape)
+# ==========================
+def image_shifts(box, rcut):
+    # Lattice translations of every periodic image that can lie within rcut
+    cell = np.asarray(box, dtype=float).reshape(3, 3)
+    volume = abs(np.linalg.det(cell))
+    widths = volume / np.linalg.norm(np.cross(cell[[1, 2, 0]], cell[[2, 0, 1]]), axis=1)
+    reps = np.ceil(rcut / widths).astype(int)
+    return np.array(list(product(*[range(-n, n + 1) for n in reps]))) @ cell
+
+
+def periodic_pairs(coord, box, rcut):
+    # All (center, neighbour, vector) within rcut, including repeated images of
+    # the same neighbour, as the DeePMD neighbour list sees them
+    coord = np.asarray(coord, dtype=float).reshape(-1, 3)
+    n_atoms = len(coord)
+    shifts = image_shifts(box, rcut)
+    images = (coord[None, :, :] + shifts[:, None, :]).reshape(-1, 3)
+    pairs = cKDTree(images).sparse_distance_matrix(cKDTree(coord), rcut, output_type='ndarray')
+    pairs = pairs[pairs['i'] != pairs['j'] + len(shifts) // 2 * n_atoms]  # the zero shift sits in the middle
+    return pairs['j'], pairs['i'] % n_atoms, images[pairs['i']] - coord[pairs['j']]
+
+
+def max_neighbors(coord, box, types, n_types, rcut):
+    # Largest number of type-t neighbours within rcut of any atom in one frame.
+    # Every periodic image within rcut is counted, as the DeePMD neighbour list
+    # does, so cells thinner than 2*rcut are handled correctly
+    shifts = image_shifts(box, rcut)
+    coord = np.asarray(coord, dtype=float).reshape(-1, 3)
+
+    counts = np.zeros(n_types, dtype=int)
+    for t in range(n_types):
+        own = coord[types == t]
+        if len(own) == 0:
+            continue
+        images = (own[None, :, :] + shifts[:, None, :]).reshape(-1, 3)
+        n = cKDTree(images).query_ball_point(coord, rcut, return_length=True)
+        n -= (types == t)  # the atom itself (zero shift image)
+        counts[t] = n.max()
+    return counts
+
+# ==========================
+# Single-system audit (runs in a worker process)
+# ==========================
+def robust_z(x):
+    # Deviation in units of the scaled median absolute deviation
+    med = np.median(x)
+    mad = 1.4826 * np.median(np.abs(x - med))
+    return np.zeros_like(x) if mad == 0 else (x - med) / mad
+
+def audit_system(system, type_map, rcut, frame_stride=1):
+    row = {'system': system, 'error': ''}
+    try:
+        types = np.loadtxt(os.path.join(system, "type.raw"), dtype=int, ndmin=1)
+        map_file = os.path.join(system, "type_map.raw")
+        system_map = list(np.loadtxt(map_file, dtype=str, ndmin=1)) if os.path.exists(map_file) else type_map
+        sets = sorted(glob.glob(os.path.join(system, "set.*")))
+        if not sets:
+            raise FileNotFoundError("no set.* directories")
+    except (OSError, ValueError) as err:
+        row['error'] = str(err)
+        return row, []
+
+    # Types are indexed into the system's own type_map.raw; remap them onto input.json's type_map
+    problems = []
+    unknown = [name for name in system_map if name not in type_map]
+    if unknown:
+        problems.append(f"types {unknown} not in type_map")
+    if types.max() >= len(system_map):
+        problems.append(f"type index {types.max()} outside type_map.raw")
+    if problems:
+        row['error'] = "; ".join(problems)
+        return row, []
+    types = np.array([type_map.index(system_map[t]) for t in types])
+    n_atoms = len(types)
+    row['n_atoms'] = n_atoms
+    for t, name in enumerate(type_map):
+        row[f'n_{name}'] = int(np.sum(types == t))
+
+    energies, max_forces, frame_ids = [], [], []
+    nei = np.zeros(len(type_map), dtype=int)
+    n_frames = 0
+    for s in sets:
+        try:
+            coord = np.load(os.path.join(s, "coord.npy"), mmap_mode='r')
+            box = np.load(os.path.join(s, "box.npy"), mmap_mode='r')
+            energy = np.load(os.path.join(s, "energy.npy"), mmap_mode='r')
+            force = np.load(os.path.join(s, "force.npy"), mmap_mode='r')
+        except OSError as err:
+            row['error'] = f"{os.path.basename(s)}: {err}"
+            return row, []
+        if os.path.exists(os.path.join(s, "virial.npy")):
+            virial = np.load(os.path.join(s, "virial.npy"), mmap_mode='r')
+            if virial.shape != (len(coord), 9):
+                problems.append(f"{os.path.basename(s)}: virial shape {virial.shape}")
+        if coord.shape != (len(energy), 3 * n_atoms) or force.shape != coord.shape or len(box) != len(coord):
+            problems.append(f"{os.path.basename(s)}: inconsistent array shapes")
+            continue
+
+        n_frames += len(coord)
+        energies.append(np.asarray(energy).ravel() / n_atoms)
+        f = np.asarray(force).reshape(len(force), n_atoms, 3)
+        max_forces.append(np.sqrt(np.einsum('fij,fij->fi', f, f)).max(axis=1))
+        frame_ids += [(os.path.basename(s), i) for i in range(len(coord))]
+        for i in range(0, len(coord), frame_stride):
+            nei = np.maximum(nei, max_neighbors(coord[i], box[i], types, len(type_map), rcut))
+
+    row['n_frames'] = n_frames
+    row['error'] = "; ".join(problems)
+    for t, name in enumerate(type_map):
+        row[f'max_nei_{name}'] = int(nei[t])
+    if not energies:
+        return row, []
+
+    energies = np.concatenate(energies)
+    max_forces = np.concatenate(max_forces)
+    row['e_per_atom_mean'] = energies.mean()
+    row['e_per_atom_std'] = energies.std()
+    row['max_force'] = max_forces.max()
+    row['non_finite_frames'] = int(np.sum(~np.isfinite(energies) | ~np.isfinite(max_forces)))
+    # Frames are only compared within their own system, whose composition is fixed
+    frames = [{'system': system, 'set': frame_ids[k][0], 'frame': frame_ids[k][1],
+               'e_per_atom': energies[k], 'max_force': max_forces[k]}
+              for k in range(len(energies))]
+    return row, frames
+
+def _audit_system_star(args):
+    return audit_system(*args)
+
+# ==========================
+# All systems in a process pool
+# ==========================
+def audit_systems(systems, type_map, rcut, sel=None, frame_stride=1, workers=None,
+                  z_energy=6.0, z_force=6.0, force_limit=None):
+    """Audit every system; returns (per-system DataFrame, outlier-frame DataFrame).
+
+    Energy outliers are judged within a system (robust z of energy per atom);
+    force outliers against the maximum atomic force of all frames in all
+    systems, or against force_limit (eV/Å) when given.
+    """
+    tasks = [(s, type_map, rcut, frame_stride) for s in systems]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_audit_system_star, tasks, chunksize=max(1, len(tasks) // 64)))
+    report = pd.DataFrame([row for row, _ in results])
+    frames = pd.DataFrame([f for _, fs in results for f in fs])
+
+    if sel is not None:
+        over = [report[f'max_nei_{name}'] > s for name, s in zip(type_map, sel)]
+        report['sel_overflow'] = np.any(over, axis=0)
+
+    if len(frames):
+        frames['z_energy'] = frames.groupby('system')['e_per_atom'].transform(lambda x: robust_z(x.to_numpy()))
+        frames['z_force'] = robust_z(frames['max_force'].to_numpy())
+        bad_force = frames['z_force'] > z_force if force_limit is None else frames['max_force'] > force_limit
+        bad = (frames['z_energy'].abs() > z_energy) | bad_force | \
+              ~np.isfinite(frames['e_per_atom']) | ~np.isfinite(frames['max_force'])
+        frames = frames[bad]
+        counts = frames.groupby('system').size()
+        report['n_outlier_frames'] = report['system'].map(counts).fillna(0).astype(int)
+    return report, frames
+
+# ==========================
+# Main entry point
+# ==========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the DeePMD training systems listed in input.json")
+    parser.add_argument('input', nargs='?', default='input_v2_compat.json')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--frame-stride', type=int, default=1, help="Check neighbour counts every n-th frame")
+    parser.add_argument('--z-energy', type=float, default=6.0, help="Robust z threshold for energy/atom outliers")
+    parser.add_argument('--z-force', type=float, default=6.0, help="Robust z threshold for max-force outliers")
+    parser.add_argument('--force-limit', type=float, default=None, help="Absolute max-force limit (eV/Å)")
+    args = parser.parse_args()
+
+    systems, type_map, rcut, sel = load_training_input(args.input)
+    report, outliers = audit_systems(systems, type_map, rcut, sel, args.frame_stride, args.workers,
+                                     args.z_energy, args.z_force, args.force_limit)
+    report.to_csv("audit_systems.csv", index=False)
+    outliers.to_csv("audit_outliers.csv", index=False)
+
+    failed = report[report['error'] != '']
+    print(f"Systems: {len(report)}, frames: {int(report['n_frames'].fillna(0).sum())}, with errors: {len(failed)}")
+    for _, r in failed.iterrows():
+        print(f"  ERROR {r['system']}: {r['error']}")
+    for name, s in zip(type_map, sel or []):
+        print(f"  max neighbours {name}: {int(report[f'max_nei_{name}'].max())} (sel {s})")
+    if 'sel_overflow' in report:
+        for system in report.loc[report['sel_overflow'], 'system']:
+            print(f"  SEL OVERFLOW {system}")
+    print(f"Outlier frames: {len(outliers)} in {outliers['system'].nunique() if len(outliers) else 0} systems")
+    print("Results saved to audit_systems.csv and audit_outliers.csv")
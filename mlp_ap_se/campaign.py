@@ -0,0 +1,400 @@
+import os
+import re
+import glob
+import json
+import time
+import shlex
+import shutil
+import argparse
+import itertools
+import threading
+import subprocess
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lammps")
+
+# LAMMPS input template of each job kind (shipped in mlp_ap_se/lammps/)
+KINDS = {
+    'ionic': 'in.ionic',
+    'expansion': 'in.expansion',
+    'conductivity': 'in.conductivity',
+    'greenkubo': 'in.greenkubo',
+}
+
+VARIABLE_PATTERN = re.compile(r"\$\{(\w+)\}")
+RESTART_PATTERN = re.compile(r"restart\.(\d+)\.bin$")
+
+# Commands that build or reset the state a restart file already holds: on resume they
+# are dropped up to the first run still to do (e.g. a second replicate would multiply
+# the restored, already replicated cell again). Later ones, such as the change_box
+# of in.conductivity when resuming during NPT, are kept.
+SETUP_COMMANDS = ('replicate', 'change_box', 'displace_atoms', 'delete_atoms', 'create_atoms',
+                  'minimize', 'reset_timestep')
+
+# ==========================
+# Template rendering
+# ==========================
+def logical_lines(text):
+    # LAMMPS input lines with '&' continuations joined
+    lines, pending = [], ""
+    for line in text.splitlines():
+        if line.rstrip().endswith("&"):
+            pending += line.rstrip()[:-1] + " "
+            continue
+        lines.append(pending + line.lstrip() if pending else line)
+        pending = ""
+    if pending:
+        lines.append(pending)
+    return lines
+
+
+def template_defaults(text):
+    # Default value of every 'variable NAME index ...' in the template (first value of the list)
+    defaults = {}
+    for line in logical_lines(text):
+        tokens = line.split('#')[0].split()
+        if len(tokens) > 3 and tokens[0] == 'variable' and tokens[2] == 'index':
+            defaults.setdefault(tokens[1], tokens[3])
+    return defaults
+
+
+def substitute(expression, values):
+    return VARIABLE_PATTERN.sub(lambda m: str(values[m.group(1)]), expression)
+
+
+def render_input(text, params, model=None, restart=None):
+    """Job input from a template: index variables set to params, the DP model path
+    made absolute, and, with restart = (step, file), rewritten to continue from
+    that checkpoint.
+
+    When resuming, read_data becomes read_restart, velocity creation and the
+    SETUP_COMMANDS before the checkpoint are dropped, runs already covered by
+    the checkpoint are skipped and the rest become 'run N upto'. Dumps and
+    fix output files are appended to instead of overwritten.
+    """
+    values = {**template_defaults(text), **params}
+    out = []
+    step = 0  # timestep reached at the end of the runs seen so far
+    resumed = False  # past the checkpoint: the first 'run ... upto' has been written
+    for line in logical_lines(text):
+        tokens = line.split('#')[0].split()
+        cmd = tokens[0] if tokens else ''
+        if cmd == 'variable' and len(tokens) > 3 and tokens[2] == 'index' and tokens[1] in params:
+            line = f"variable        {tokens[1]} index {params[tokens[1]]}"
+        elif cmd == 'pair_style' and 'deepmd' in tokens and model:
+            line = f"pair_style      deepmd {model}"
+        elif restart and cmd == 'read_data':
+            line = f"read_restart    {restart[1]}"
+        elif restart and not resumed and (cmd in SETUP_COMMANDS or (cmd == 'velocity' and 'create' in tokens)):
+            line = f"# {line.strip()}  (skipped: state comes from {restart[1]})"
+            if cmd == 'reset_timestep':
+                step = int(substitute(tokens[1], values))
+        elif cmd == 'reset_timestep':
+            step = int(substitute(tokens[1], values))
+        elif cmd == 'run':
+            step += int(substitute(tokens[1], values))
+            if restart and step <= restart[0]:
+                line = f"# {line.strip()}  (completed before {restart[1]})"
+            elif restart:
+                line = f"run             {step} upto"
+                resumed = True
+        elif restart and cmd == 'fix' and 'file' in tokens:
+            line = re.sub(r"\bfile\b", "append", line, count=1)
+        out.append(line)
+        if restart and cmd == 'dump':
+            out.append(f"dump_modify     {tokens[1]} append yes")
+    rendered = "\n".join(out) + "\n"
+    if restart:
+        check_resume_input(rendered)
+    return rendered
+
+
+def check_resume_input(text):
+    # A resumed input must not rebuild the restored cell: nothing that creates or
+    # replicates atoms after read_restart, and no setup command before its first run
+    seen_restart = running = False
+    for line in logical_lines(text):
+        tokens = line.split('#')[0].split()
+        cmd = tokens[0] if tokens else ''
+        if cmd == 'read_restart':
+            seen_restart = True
+        elif cmd == 'run':
+            running = True
+        elif seen_restart and cmd in ('read_data', 'create_box', 'replicate'):
+            raise ValueError(f"Resumed input still has '{line.strip()}' after read_restart")
+        elif seen_restart and not running and cmd in SETUP_COMMANDS:
+            raise ValueError(f"Resumed input repeats setup command '{line.strip()}' before its first run")
+
+
+def output_files(text, values):
+    # (file name, layout) of every dump and fix output file of an input. Layouts:
+    # 'dump' (ITEM: TIMESTEP frames), 'blocks' (ave/chunk and ave/time mode vector:
+    # a "step nrows" line before every block) and 'rows' (one row per step, step first)
+    files = []
+    for line in logical_lines(text):
+        tokens = line.split('#')[0].split()
+        if len(tokens) > 5 and tokens[0] == 'dump':
+            name, layout = tokens[5], 'dump'
+        elif len(tokens) > 3 and tokens[0] == 'fix' and ('file' in tokens or 'append' in tokens):
+            name = tokens[tokens.index('file' if 'file' in tokens else 'append') + 1]
+            vector = 'mode' in tokens[:-1] and tokens[tokens.index('mode') + 1] == 'vector'
+            layout = 'blocks' if tokens[3] == 'ave/chunk' or (tokens[3] == 'ave/time' and vector) else 'rows'
+        else:
+            continue
+        try:
+            files.append((substitute(name, values), layout))
+        except KeyError:  # set by a loop or equal-style variable; not known before the run
+            continue
+    return files
+
+
+def _record_starts(path, layout):
+    # (byte offset, timestep) of every frame, block or row of an output file
+    with open(path, 'rb') as f:
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                return
+            tokens = line.split()
+            if layout == 'dump':
+                if line.startswith(b"ITEM: TIMESTEP"):
+                    yield offset, int(f.readline().split()[0])
+            elif tokens and not tokens[0].startswith(b"#"):
+                yield offset, float(tokens[0])
+                if layout == 'blocks':
+                    for _ in range(int(tokens[1])):
+                        f.readline()
+
+
+def truncate_outputs(job_dir, text, values, step):
+    """Cut every output file of a job back to the frames and rows at or below step.
+
+    LAMMPS keeps writing output after its last restart checkpoint; a resumed
+    run appends from the checkpoint, so without this the steps in between
+    would appear twice. Returns the names of the files that were cut.
+    """
+    cut_files = []
+    for name, layout in output_files(text, values):
+        path = os.path.join(job_dir, name)
+        if not os.path.exists(path):
+            continue
+        cut = next((offset for offset, t in _record_starts(path, layout) if t > step), None)
+        if cut is not None:
+            os.truncate(path, cut)
+            cut_files.append(name)
+    return cut_files
+
+
+def latest_restart(job_dir):
+    # (step, file name) of the newest restart.<step>.bin checkpoint, or None
+    found = []
+    for path in glob.glob(os.path.join(job_dir, "restart.*.bin")):
+        m = RESTART_PATTERN.search(os.path.basename(path))
+        if m and os.path.getsize(path) > 0:
+            found.append((int(m.group(1)), os.path.basename(path)))
+    return max(found) if found else None
+
+# ==========================
+# Parameter grid -> jobs
+# ==========================
+def job_directory(root, kind, label, params):
+    # <root>/<kind>/<label>/<T>K/<name>_<value>... so arrhenius.py can walk the ionic runs
+    parts = [root, kind, label]
+    for name, value in params.items():
+        parts.append(f"{value}K" if name == 'T' else f"{name}_{value}")
+    return os.path.join(*parts)
+
+
+def build_jobs(kind, grid, data, root):
+    # grid: {name: [values]}; data: {label: lammps.data path}. One job per combination
+    jobs = []
+    names = list(grid)
+    for label, data_file in data.items():
+        for combo in itertools.product(*[grid[n] for n in names]):
+            params = dict(zip(names, combo))
+            job_dir = job_directory(root, kind, label, params)
+            jobs.append({'id': os.path.relpath(job_dir, root), 'kind': kind, 'label': label,
+                         'data': os.path.abspath(data_file), 'params': params, 'dir': job_dir})
+    return jobs
+
+# ==========================
+# Manifest of completed jobs (one JSON record per line)
+# ==========================
+def read_manifest(path):
+    records = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record['id']] = record
+    return records
+
+
+def append_manifest(path, record, lock):
+    with lock, open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def json_scalars(result):
+    # Scalar entries of an analysis result, as plain Python numbers/strings
+    clean = {}
+    for key, value in result.items():
+        if isinstance(value, (str, bool)) or value is None:
+            clean[key] = value
+        elif np.ndim(value) == 0 and np.isscalar(value):
+            clean[key] = float(value)
+    return clean
+
+# ==========================
+# Per-kind analysis, run as soon as a job finishes
+# ==========================
+def analyze_job(job, values, timestep_fs=1.0):
+    if job['kind'] == 'ionic':
+        from .arrhenius import analyze_run
+        return analyze_run(job['dir'], float(values['T']), job['label'], timestep_fs=timestep_fs)
+    if job['kind'] == 'expansion':
+        from .analyze_thermal_expansion import summarize_file, find_expansion_files
+        return summarize_file(find_expansion_files(job['dir'])[-1])
+    if job['kind'] == 'conductivity':
+        from .analyze_nemd import analyze_run
+        return analyze_run(job['dir'])
+    if job['kind'] == 'greenkubo':
+        from .greenkubo import green_kubo, find_flux_files
+        return green_kubo(find_flux_files([job['dir']]), timestep_fs=timestep_fs, workers=1)
+    raise ValueError(f"Unknown job kind {job['kind']}")
+
+# ==========================
+# Running one job
+# ==========================
+def run_job(job, template_text, lmp, cores_per_job, model=None, analyze=True, timestep_fs=1.0):
+    os.makedirs(job['dir'], exist_ok=True)
+    input_name = KINDS[job['kind']]
+    restart = latest_restart(job['dir'])
+    if restart is None:
+        shutil.copyfile(job['data'], os.path.join(job['dir'], "lammps.data"))
+        log_name = "log.lammps"
+    else:
+        input_name += ".restart"
+        log_name = f"log.restart_{restart[0]}.lammps"
+        values = {**template_defaults(template_text), **job['params']}
+        truncated = truncate_outputs(job['dir'], template_text, values, restart[0])
+    with open(os.path.join(job['dir'], input_name), "w") as f:
+        f.write(render_input(template_text, job['params'], model, restart))
+
+    command = shlex.split(lmp.format(cores=cores_per_job)) + ["-in", input_name, "-log", log_name]
+    # PYTHONPATH lets `--lmp "python -m mlp_ap_se.lmp_stub"` work from a checkout as well
+    env = {**os.environ, 'OMP_NUM_THREADS': str(cores_per_job), 'MPLBACKEND': 'Agg',
+           'PYTHONPATH': os.pathsep.join(filter(None, [PACKAGE_ROOT, os.environ.get('PYTHONPATH')]))}
+    start = time.time()
+    with open(os.path.join(job['dir'], "lammps.stdout"), "a") as out:
+        returncode = subprocess.run(command, cwd=job['dir'], stdout=out, stderr=subprocess.STDOUT, env=env).returncode
+
+    record = {'id': job['id'], 'kind': job['kind'], 'label': job['label'], 'params': job['params'],
+              'dir': job['dir'], 'returncode': returncode, 'wall_s': time.time() - start,
+              'resumed_from_step': restart[0] if restart else None,
+              'truncated_outputs': truncated if restart else [],
+              'status': 'done' if returncode == 0 else 'failed'}
+    if returncode == 0 and analyze:
+        try:
+            values = {**template_defaults(template_text), **job['params']}
+            record['analysis'] = json_scalars(analyze_job(job, values, timestep_fs))
+        except Exception as exc:  # the simulation is still complete; keep it in the manifest
+            record['analysis_error'] = repr(exc)
+    return record
+
+# ==========================
+# Bounded pool over the whole campaign
+# ==========================
+def run_campaign(jobs, root, lmp="lmp", cores=None, cores_per_job=1, model=None, analyze=True,
+                 timestep_fs=1.0, template=None):
+    """Run every job not yet recorded as done in <root>/manifest.jsonl.
+
+    At most cores // cores_per_job LAMMPS processes run at once. Interrupted
+    jobs resume from their newest restart.*.bin, with their outputs cut back
+    to that step first; each finished job is
+    analysed and appended to the manifest immediately.
+    """
+    os.makedirs(root, exist_ok=True)
+    manifest = os.path.join(root, "manifest.jsonl")
+    done = {k for k, r in read_manifest(manifest).items() if r['status'] == 'done'}
+    pending = [job for job in jobs if job['id'] not in done]
+    print(f"{len(jobs)} jobs, {len(jobs) - len(pending)} already done, {len(pending)} to run")
+
+    templates = {}
+    for job in pending:
+        path = template or os.path.join(TEMPLATE_DIR, KINDS[job['kind']])
+        if path not in templates:
+            with open(path) as f:
+                templates[path] = f.read()
+        job['template'] = path
+
+    workers = max(1, (cores or os.cpu_count()) // cores_per_job)
+    lock = threading.Lock()
+    records = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, job, templates[job['template']], lmp, cores_per_job,
+                               model, analyze, timestep_fs): job for job in pending}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                record = future.result()
+            except Exception as exc:
+                record = {'id': job['id'], 'kind': job['kind'], 'label': job['label'], 'params': job['params'],
+                          'dir': job['dir'], 'status': 'failed', 'error': repr(exc)}
+            append_manifest(manifest, record, lock)
+            records.append(record)
+            print(f"[{len(records)}/{len(pending)}] {record['id']}: {record['status']}"
+                  f"{' (resumed from step %d)' % record['resumed_from_step'] if record.get('resumed_from_step') else ''}"
+                  f"{'' if 'analysis_error' not in record else ', analysis failed: ' + record['analysis_error']}")
+    return records
+
+# ==========================
+# Main entry point
+# ==========================
+def parse_grid(items):
+    # ["T=600,800,1000", "seed=1,2"] -> {'T': ['600', '800', '1000'], 'seed': ['1', '2']}
+    return {name: values.split(',') for name, values in (item.split('=', 1) for item in items)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render and run in.ionic / in.expansion / in.conductivity over a parameter grid")
+    parser.add_argument('kind', choices=sorted(KINDS))
+    parser.add_argument('--data', nargs='+', default=['lammps.data'],
+                        help="label=path/to/lammps.data (or just a path; its directory is the label)")
+    parser.add_argument('--grid', nargs='+', default=[], help="name=v1,v2,... for any index variable of the template")
+    parser.add_argument('--root', default='campaign')
+    parser.add_argument('--model', default='../AP-compress.pb', help="DP model, relative to the current directory")
+    parser.add_argument('--template', default=None, help="Input template (default: mlp_ap_se/lammps/in.<kind>)")
+    parser.add_argument('--lmp', default='lmp', help="LAMMPS command; {cores} is replaced, e.g. 'mpirun -np {cores} lmp'")
+    parser.add_argument('--cores', type=int, default=None, help="Core budget for the whole campaign")
+    parser.add_argument('--cores-per-job', type=int, default=1)
+    parser.add_argument('--timestep-fs', type=float, default=1.0)
+    parser.add_argument('--no-analysis', action='store_true')
+    parser.add_argument('--dry-run', action='store_true', help="Only list the jobs still to run")
+    args = parser.parse_args()
+
+    data = {}
+    for item in args.data:
+        if '=' in item:
+            label, path = item.split('=', 1)
+        else:
+            path = item
+            label = os.path.relpath(os.path.dirname(os.path.abspath(item)))
+            if label == '.':
+                label = os.path.basename(os.getcwd())
+        data[label] = path
+    jobs = build_jobs(args.kind, parse_grid(args.grid), data, args.root)
+
+    if args.dry_run:
+        done = read_manifest(os.path.join(args.root, "manifest.jsonl"))
+        for job in jobs:
+            state = done.get(job['id'], {}).get('status', 'pending')
+            restart = latest_restart(job['dir'])
+            print(f"{job['id']}: {state}{' (restart at step %d)' % restart[0] if restart and state != 'done' else ''}")
+    else:
+        run_campaign(jobs, args.root, args.lmp, args.cores, args.cores_per_job, os.path.abspath(args.model),
+                     not args.no_analysis, args.timestep_fs, args.template)
@@ -0,0 +1,203 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.fft import rfft, irfft, next_fast_len
+from concurrent.futures import ProcessPoolExecutor
+from .lammps_dump import increasing_rows
+
+# kappa = 1 / (3 V kB T^2) * integral <J(0).J(t)> dt, with J the heat/flux output (J*V, eV·Å/ps)
+kB_eV = 8.617333262e-5                  # eV/K
+EV_PER_A_PS_K_TO_W_PER_M_K = 1.60218e3  # eV/(Å·ps·K) -> W/(m·K)
+
+FLUX_FILE = "heatflux.dat"
+
+# ==========================
+# Streaming heat-current autocorrelation
+# ==========================
+def correlate_block(x, y, max_lag):
+    # sum_t x[t] * y[t + tau] for tau < max_lag, t over the rows of x (y extends x by up to max_lag rows)
+    n = next_fast_len(len(y) + max_lag)
+    fx = rfft(x, n=n, axis=0)
+    fy = rfft(y, n=n, axis=0)
+    return irfft(fx.conj() * fy, n=n, axis=0)[:max_lag]
+
+
+def hcacf_file(filename, max_lag, chunk_rows=200000, timestep_fs=1.0):
+    """Heat-current autocorrelation of one flux file, per Cartesian component.
+
+    The file is read chunk_rows at a time; each chunk is correlated with
+    itself plus the first max_lag rows of the next, so the result is exact
+    while memory stays at one chunk. Returns a dict with lag times (ps),
+    the (max_lag, 3) autocorrelation in (eV·Å/ps)^2, and mean T and V.
+    """
+    chunk_rows = max(chunk_rows, max_lag)  # lags may not span more than two chunks
+    sums = np.zeros((max_lag, 3))
+    counts = np.zeros(max_lag)
+    steps, T_sum, V_sum, n_rows = [], 0.0, 0.0, 0
+    prev = last_step = None
+    try:
+        reader = pd.read_csv(filename, sep=r'\s+', comment='#', header=None, engine='c', chunksize=chunk_rows)
+    except pd.errors.EmptyDataError:  # no data rows at all, e.g. only the fix ave/time header
+        reader = []
+    for chunk in reader:
+        data = chunk.to_numpy(dtype=float)
+        data = data[increasing_rows(data[:, 0], filename, last_step)]  # restart boundaries
+        if not len(data):
+            continue
+        last_step = data[-1, 0]
+        if len(steps) < 2:
+            steps.extend(data[:2 - len(steps), 0])
+        T_sum += data[:, 4].sum()
+        V_sum += data[:, 5].sum()
+        n_rows += len(data)
+        J = data[:, 1:4]
+        if prev is not None:
+            sums += correlate_block(prev, np.concatenate([prev, J[:max_lag]]), max_lag)
+            counts += np.clip(len(prev) + np.minimum(len(J), max_lag) - np.arange(max_lag), 0, len(prev))
+        prev = J
+    if n_rows < 2:  # e.g. a run killed before its second flux sample
+        raise ValueError(f"{n_rows} flux samples in {filename}; at least two are needed for the HCACF")
+    sums += correlate_block(prev, prev, max_lag)
+    counts += np.clip(len(prev) - np.arange(max_lag), 0, None)
+
+    dt_ps = (steps[1] - steps[0]) * timestep_fs * 1e-3
+    with np.errstate(invalid='ignore', divide='ignore'):
+        acf = sums / counts[:, None]
+    return {'file': filename, 'n_rows': n_rows, 'dt_ps': dt_ps, 'lag_ps': np.arange(max_lag) * dt_ps,
+            'acf': acf, 'T': T_sum / n_rows, 'V': V_sum / n_rows}
+
+
+def _hcacf_file_star(args):
+    return hcacf_file(*args)
+
+# ==========================
+# Running integral, cutoff and error bars
+# ==========================
+def running_kappa(acf, dt_ps, T, V):
+    # Trapezoidal running integral of every component, in W/(m·K)
+    integral = np.concatenate([np.zeros((1,) + acf.shape[1:]),
+                               np.cumsum(0.5 * (acf[1:] + acf[:-1]) * dt_ps, axis=0)])
+    return integral / (V * kB_eV * T ** 2) * EV_PER_A_PS_K_TO_W_PER_M_K
+
+
+def select_cutoff(mean_acf, min_index=1):
+    # First zero crossing of the run- and component-averaged HCACF (first-dip rule);
+    # beyond it the integral only accumulates noise
+    normalized = mean_acf / mean_acf[0]
+    crossing = np.flatnonzero(normalized[min_index:] <= 0)
+    return int(crossing[0] + min_index) if crossing.size else len(normalized) - 1
+
+
+def green_kubo(files, max_lag_ps=20.0, timestep_fs=1.0, chunk_rows=200000, workers=None):
+    """Thermal conductivity from independent equilibrium runs.
+
+    Autocorrelations are computed per file in a process pool. The cutoff is
+    chosen on the ensemble-averaged HCACF, and the error bar is the standard
+    error over all (run, component) integrals at that cutoff.
+    """
+    # Sampling interval from the first file fixes the number of lags (one extra row: a restart may repeat one)
+    try:
+        head = pd.read_csv(files[0], sep=r'\s+', comment='#', header=None, nrows=3).to_numpy(dtype=float)
+        head = head[increasing_rows(head[:, 0], files[0])]
+    except pd.errors.EmptyDataError:
+        head = np.empty((0, 6))
+    if len(head) < 2:
+        raise ValueError(f"{len(head)} flux samples in {files[0]}; at least two are needed for the HCACF")
+    dt_ps = (head[1, 0] - head[0, 0]) * timestep_fs * 1e-3
+    max_lag = int(round(max_lag_ps / dt_ps)) + 1
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        runs = list(pool.map(_hcacf_file_star, [(f, max_lag, chunk_rows, timestep_fs) for f in files]))
+
+    kappa = np.stack([running_kappa(r['acf'], r['dt_ps'], r['T'], r['V']) for r in runs])  # (runs, lags, 3)
+    mean_acf = np.mean([r['acf'].mean(axis=1) for r in runs], axis=0)
+    cut = select_cutoff(mean_acf)
+
+    samples = kappa[:, cut, :].ravel()
+    kappa_mean = kappa.mean(axis=(0, 2))
+    kappa_sem = kappa.transpose(1, 0, 2).reshape(max_lag, -1).std(axis=1, ddof=1) / np.sqrt(samples.size)
+    return {'runs': runs, 'lag_ps': runs[0]['lag_ps'], 'hcacf': mean_acf / mean_acf[0],
+            'kappa_running': kappa_mean, 'kappa_running_sem': kappa_sem,
+            'cutoff_index': cut, 'cutoff_ps': runs[0]['lag_ps'][cut],
+            'k': samples.mean(), 'k_err': samples.std(ddof=1) / np.sqrt(samples.size),
+            'k_components': kappa[:, cut, :].mean(axis=0),
+            'k_per_run': kappa[:, cut, :].mean(axis=1)}
+
+
+def find_flux_files(paths, flux_file=FLUX_FILE):
+    # Flux files given directly, or found under directories (one per independent run)
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                if flux_file in filenames:
+                    files.append(os.path.join(dirpath, flux_file))
+        else:
+            files.append(path)
+    return files
+
+# ==========================
+# Plot (optional)
+# ==========================
+def plot_green_kubo(res, output_img="greenkubo.png"):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    lag = res['lag_ps']
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 4))
+    ax1.plot(lag, res['hcacf'], '-')
+    ax1.axvline(res['cutoff_ps'], color='r', linestyle='--', label='Cutoff')
+    ax1.axhline(0, color='k', linewidth=0.5)
+    ax1.set_xlabel('Lag time (ps)')
+    ax1.set_ylabel('Normalized HCACF')
+    ax1.legend()
+    ax1.grid(True)
+    ax2.plot(lag, res['kappa_running'], '-', label='Running integral')
+    ax2.fill_between(lag, res['kappa_running'] - res['kappa_running_sem'],
+                     res['kappa_running'] + res['kappa_running_sem'], alpha=0.3)
+    ax2.axvline(res['cutoff_ps'], color='r', linestyle='--', label='Cutoff')
+    ax2.set_xlabel('Lag time (ps)')
+    ax2.set_ylabel('k (W/m·K)')
+    ax2.legend()
+    ax2.grid(True)
+    fig.tight_layout()
+    fig.savefig(output_img, dpi=300)
+    plt.close(fig)
+
+# ==========================
+# Main entry point
+# ==========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Green–Kubo thermal conductivity from heatflux.dat of in.greenkubo runs")
+    parser.add_argument('paths', nargs='*', default=['.'], help="heatflux.dat files or directories containing them")
+    parser.add_argument('--max-lag-ps', type=float, default=20.0, help="Longest correlation time computed")
+    parser.add_argument('--timestep-fs', type=float, default=1.0)
+    parser.add_argument('--chunk-rows', type=int, default=200000, help="Rows read at a time from each flux file")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--plot', action='store_true')
+    args = parser.parse_args()
+
+    files = find_flux_files(args.paths)
+    res = green_kubo(files, args.max_lag_ps, args.timestep_fs, args.chunk_rows, args.workers)
+
+    for r, k in zip(res['runs'], res['k_per_run']):
+        print(f"{r['file']}: {r['n_rows']} rows, T = {r['T']:.1f} K, V = {r['V']:.1f} Å³, k = {k:.3f} W/m·K")
+    kx, ky, kz = res['k_components']
+    print(f"Cutoff (first zero of the averaged HCACF): {res['cutoff_ps']:.3f} ps")
+    print(f"k = {res['k']:.3f} ± {res['k_err']:.3f} W/m·K  (kx = {kx:.3f}, ky = {ky:.3f}, kz = {kz:.3f}; "
+          f"{len(files)} runs)")
+
+    pd.DataFrame({'lag_ps': res['lag_ps'], 'hcacf': res['hcacf'], 'k_running': res['kappa_running'],
+                  'k_running_sem': res['kappa_running_sem']}).to_csv("greenkubo_hcacf.csv", index=False)
+    with open("greenkubo_results.txt", "w") as f:
+        f.write(f"Runs: {len(files)}\n")
+        f.write(f"Cutoff time: {res['cutoff_ps']:.5f} ps\n")
+        f.write(f"Thermal conductivity k: {res['k']:.5f} W/m·K\n")
+        f.write(f"Thermal conductivity error (SEM over runs and components): {res['k_err']:.5f} W/m·K\n")
+        f.write(f"Components kx ky kz: {kx:.5f} {ky:.5f} {kz:.5f} W/m·K\n")
+    if args.plot:
+        plot_green_kubo(res)
+    print("Results saved to greenkubo_results.txt and greenkubo_hcacf.csv")
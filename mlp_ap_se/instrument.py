@@ -0,0 +1,201 @@
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import resource
+from contextlib import contextmanager, nullcontext
+
+# ==========================
+# Opt-in per-stage instrumentation for the analysis scripts.
+#   instrument.start("analyze_nemd", mode)      # mode: basic | cprofile | tracemalloc
+#   with instrument.stage("load_temperature", files=[temp_file]) as st:
+#       ...; st['frames'] = n_blocks
+#   instrument.finish("thermal_conductivity_report.json")
+# Each stage records wall time, bytes read, frames/rows parsed and peak memory;
+# cprofile adds the hottest functions per top-level stage (and a .prof file),
+# tracemalloc the peak Python allocation. With no active report (the default,
+# unless AP_RUN_REPORT is set) stage() is a no-op context.
+# ==========================
+ENV_VAR = "AP_RUN_REPORT"
+MODES = ('basic', 'cprofile', 'tracemalloc')
+
+_active = None
+
+
+def _read_bytes():
+    # Bytes read by this process so far (Linux /proc/self/io rchar: files, pipes, mmap faults excluded)
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM (Linux >= 4.0); elsewhere ru_maxrss is used as is
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _top_functions(profiler, n=15):
+    import pstats
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:n]
+    return [{'function': f"{os.path.basename(filename)}:{line}({name})", 'ncalls': nc,
+             'tottime': round(tt, 6), 'cumtime': round(ct, 6)}
+            for (filename, line, name), (_, nc, tt, ct, _) in rows]
+
+
+class RunReport:
+    def __init__(self, name, mode='basic'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown report mode {mode!r}; use one of {', '.join(MODES)}")
+        self.name = name
+        self.mode = mode
+        self.started = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.t0 = time.perf_counter()
+        self.bytes0 = _read_bytes()
+        self.stages = []
+        self.open = []        # records of the stages currently running (outermost first)
+        self.profilers = []
+        if mode == 'tracemalloc':
+            import tracemalloc
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, files=(), **counters):
+        record = {'stage': name, 'depth': len(self.open), 'start_s': time.perf_counter() - self.t0}
+        record.update(counters)
+        if files:
+            record['input_bytes'] = sum(os.path.getsize(f) for f in files if os.path.exists(f))
+        parent_peak = _peak_rss_mb()
+        _reset_peak_rss()
+        bytes0 = _read_bytes()
+        profiler = None
+        if self.mode == 'cprofile' and not self.open:  # cProfile profilers cannot nest
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        if self.mode == 'tracemalloc':
+            import tracemalloc
+            traced0, parent_traced_peak = tracemalloc.get_traced_memory()
+            if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+                tracemalloc.reset_peak()
+            else:  # 3.8: the peak runs from start(), so python_peak_mb is an upper bound
+                record['python_peak_since_start'] = True
+        self.open.append(record)
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - t0
+            self.open.pop()
+            if profiler is not None:
+                profiler.disable()
+                self.profilers.append(profiler)
+                record['profile_top'] = _top_functions(profiler)
+            if bytes0 is not None:
+                record['bytes_read'] = _read_bytes() - bytes0
+            # Peaks were reset for this stage: fold them back into the enclosing one
+            record['peak_rss_mb'] = max(_peak_rss_mb(), record.pop('_child_peak_rss_mb', 0))
+            if self.open:
+                self.open[-1]['_child_peak_rss_mb'] = max(self.open[-1].get('_child_peak_rss_mb', 0),
+                                                          record['peak_rss_mb'], parent_peak)
+            if self.mode == 'tracemalloc':
+                import tracemalloc
+                peak = max(tracemalloc.get_traced_memory()[1], record.pop('_child_traced_peak', 0))
+                record['python_peak_mb'] = (peak - traced0) / 1e6
+                if self.open:
+                    self.open[-1]['_child_traced_peak'] = max(self.open[-1].get('_child_traced_peak', 0),
+                                                              peak, parent_traced_peak)
+            # Throughput over the stage's declared inputs (bytes_read also counts module imports)
+            if record.get('input_bytes') and record['seconds'] > 0:
+                record['mb_per_s'] = record['input_bytes'] / 1e6 / record['seconds']
+            for unit in ('frames', 'rows'):
+                if record.get(unit) and record['seconds'] > 0:
+                    record[f'{unit}_per_s'] = record[unit] / record['seconds']
+            self.stages.append(record)
+
+    def summary(self):
+        import numpy as np
+        bytes1 = _read_bytes()
+        return {'script': self.name, 'mode': self.mode, 'argv': sys.argv, 'cwd': os.getcwd(),
+                'started': self.started, 'total_seconds': time.perf_counter() - self.t0,
+                'bytes_read': bytes1 - self.bytes0 if self.bytes0 is not None else None,
+                'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                'children_max_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,  # pool workers
+                'environment': {'host': socket.gethostname(), 'python': platform.python_version(),
+                                'numpy': np.__version__, 'cpus': os.cpu_count()},
+                'stages': sorted(self.stages, key=lambda r: r['start_s'])}
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        if self.profilers:
+            import pstats
+            stats = pstats.Stats(self.profilers[0])
+            for profiler in self.profilers[1:]:
+                stats.add(profiler)
+            stats.dump_stats(os.path.splitext(path)[0] + ".prof")
+        if self.mode == 'tracemalloc':
+            import tracemalloc
+            tracemalloc.stop()
+        return path
+
+# ==========================
+# Module-level switch used by the scripts and the library functions
+# ==========================
+def start(name, mode=None):
+    """Activate a report for this run; mode falls back to $AP_RUN_REPORT (1 = basic). Returns it or None."""
+    global _active
+    mode = mode or os.environ.get(ENV_VAR)
+    if not mode or mode == '0':
+        _active = None
+        return None
+    _active = RunReport(name, 'basic' if mode in ('1', 'true') else mode)
+    return _active
+
+
+def active():
+    return _active
+
+
+def stage(name, files=(), **counters):
+    # No-op (yielding a throwaway dict) unless a report is active
+    if _active is None:
+        return nullcontext({})
+    return _active.stage(name, files, **counters)
+
+
+def finish(path):
+    global _active
+    if _active is None:
+        return None
+    report, _active = _active, None
+    return report.write(path)
+
+
+def add_report_argument(parser):
+    parser.add_argument('--report', nargs='?', const='basic', default=None, choices=MODES,
+                        help=f"Write a JSON run report (per-stage time, bytes, frames, memory); "
+                             f"also enabled by ${ENV_VAR}")
@@ -0,0 +1,246 @@
+import os
+import json
+import numpy as np
+from collections import namedtuple
+from itertools import islice
+from .instrument import stage
+
+
+# ==========================
+# Timesteps across restarts
+# ==========================
+def increasing_rows(timesteps, source, after=None):
+    """Indices of the rows to keep from output whose first column is the timestep.
+
+    A resumed run writes its restart step again, so a repeated timestep is
+    dropped (the first copy is kept). A timestep that goes backwards means
+    the file was appended past its restart checkpoint and raises ValueError.
+    `after` is the last timestep already accepted (for files read in chunks).
+    """
+    timesteps = np.asarray(timesteps, dtype=float)
+    prev = np.concatenate([[-np.inf if after is None else after], timesteps[:-1]])
+    back = np.flatnonzero(timesteps < prev)
+    if back.size:
+        i = back[0]
+        raise ValueError(f"Timestep goes back from {prev[i]:g} to {timesteps[i]:g} in {source}; "
+                         f"output was appended past its restart checkpoint")
+    return np.flatnonzero(timesteps > prev)
+
+
+# ==========================
+# Stream frames from a LAMMPS text dump (dump custom ... id type x y z)
+# ==========================
+def _iter_raw_frames(dumpfile):
+    # Binary mode keeps f.tell() usable, so each frame also reports the byte
+    # offset of its ITEM: TIMESTEP line. A frame repeating the previous
+    # timestep (restart boundary) is skipped; a decreasing one raises.
+    with open(dumpfile, 'rb') as f:
+        last = None
+        timestep = None
+        n_atoms = None
+        box_bounds = None
+        offset = 0
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            if not line.startswith(b"ITEM:"):
+                continue
+            if b"TIMESTEP" in line:
+                offset = f.tell() - len(line)
+                timestep = int(f.readline().split()[0])
+            elif b"NUMBER OF ATOMS" in line:
+                n_atoms = int(f.readline().split()[0])
+            elif b"BOX BOUNDS" in line:
+                box_bounds = np.array([f.readline().split()[:2] for _ in range(3)], dtype=float)
+            elif b"ATOMS" in line:
+                headers = line.decode().split()[2:]
+                data = np.loadtxt(list(islice(f, n_atoms)), ndmin=2)
+                if data.shape[0] != n_atoms:
+                    raise ValueError(f"Truncated frame at timestep {timestep} in {dumpfile}")
+                if last is not None and timestep <= last:
+                    if timestep < last:
+                        raise ValueError(f"Timestep goes back from {last} to {timestep} in {dumpfile}; "
+                                         f"output was appended past its restart checkpoint")
+                    continue
+                last = timestep
+                yield offset, timestep, box_bounds, headers, data
+
+
+def iter_dump_frames(dumpfile):
+    """Yield (timestep, box_bounds, headers, data) for every frame in a dump.
+
+    Only one frame is held in memory at a time; the ITEM: ATOMS block is
+    parsed straight into a float64 array of shape (n_atoms, n_columns).
+    """
+    for _, timestep, box_bounds, headers, data in _iter_raw_frames(dumpfile):
+        yield timestep, box_bounds, headers, data
+
+
+# ==========================
+# Per-species trajectories as dense (n_frames, n_sel, n_cols) arrays
+# ==========================
+def iter_species_chunks(dumpfile, atom_type=1, columns=('x', 'y', 'z'), scale=1.0,
+                        chunk_frames=1000):
+    """Yield (ids, timesteps, coords) chunks for the atoms of one type.
+
+    `coords` has shape (n_frames_in_chunk, n_sel, len(columns)) and rows are
+    sorted by atom id, so atom k is the same particle in every frame.
+    Pass atom_type=None to keep every atom.
+    """
+    ids = None
+    timesteps = []
+    frames = []
+    for timestep, _, headers, data in iter_dump_frames(dumpfile):
+        col_index = [headers.index(c) for c in columns]
+        frame_ids = data[:, headers.index('id')].astype(np.int64)
+        if atom_type is None:
+            mask = slice(None)
+        else:
+            mask = data[:, headers.index('type')].astype(np.int64) == atom_type
+        sel_ids = frame_ids[mask]
+        order = np.argsort(sel_ids, kind='stable')
+        sel_ids = sel_ids[order]
+
+        if ids is None:
+            ids = sel_ids
+        elif sel_ids.shape != ids.shape or not np.array_equal(sel_ids, ids):
+            raise ValueError(f"Selected atoms change at timestep {timestep} in {dumpfile}")
+
+        frames.append(data[mask][order][:, col_index] * scale)
+        timesteps.append(timestep)
+        if len(frames) == chunk_frames:
+            yield ids, np.array(timesteps), np.stack(frames)
+            timesteps, frames = [], []
+
+    if frames:
+        yield ids, np.array(timesteps), np.stack(frames)
+
+
+def read_species_trajectory(dumpfile, atom_type=1, columns=('x', 'y', 'z'), scale=1.0):
+    """Return (ids, timesteps, coords) with coords of shape (n_frames, n_sel, n_cols)."""
+    ids, steps, chunks = None, [], []
+    for ids, chunk_steps, chunk in iter_species_chunks(dumpfile, atom_type, columns, scale):
+        steps.append(chunk_steps)
+        chunks.append(chunk)
+    if ids is None:
+        raise ValueError(f"No frames found in {dumpfile}")
+    return ids, np.concatenate(steps), np.concatenate(chunks)
+
+
+# ==========================
+# Binary, memory-mapped trajectory cache
+# ==========================
+# Layout of <dump>.cache/:
+#   coords.f32  float32 (n_frames, n_atoms, 3), atoms sorted by id
+#   index.npz   timesteps, byte offsets and box bounds per frame; ids, types once
+#   meta.json   source size/mtime, columns, array shape and the timestep check
+#               (written last, marks a complete cache)
+TrajectoryCache = namedtuple('TrajectoryCache',
+                             ['ids', 'types', 'timesteps', 'offsets', 'box_bounds', 'coords'])
+
+
+def default_cache_dir(dumpfile):
+    return str(dumpfile) + ".cache"
+
+
+CACHE_VERSION = 2  # bump when the layout or the meta.json keys change
+
+
+def _source_signature(dumpfile):
+    st = os.stat(dumpfile)
+    return {'source_size': st.st_size, 'source_mtime_ns': st.st_mtime_ns}
+
+
+def _timestep_at(dumpfile, offset):
+    # Timestep of the frame whose ITEM: TIMESTEP line starts at offset, or None
+    with open(dumpfile, 'rb') as f:
+        f.seek(offset)
+        if not f.readline().startswith(b"ITEM: TIMESTEP"):
+            return None
+        try:
+            return int(f.readline().split()[0])
+        except (ValueError, IndexError):
+            return None
+
+
+def build_trajectory_cache(dumpfile, cache_dir=None, columns=('x', 'y', 'z')):
+    """Parse a text dump once and write the binary cache; returns cache_dir."""
+    cache_dir = cache_dir or default_cache_dir(dumpfile)
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    signature = _source_signature(dumpfile)
+    ids = types = None
+    timesteps, offsets, boxes = [], [], []
+    with stage("parse_dump", files=[dumpfile]) as st, open(os.path.join(cache_dir, "coords.f32"), 'wb') as out:
+        for offset, timestep, box_bounds, headers, data in _iter_raw_frames(dumpfile):
+            frame_ids = data[:, headers.index('id')].astype(np.int64)
+            order = np.argsort(frame_ids, kind='stable')
+            if ids is None:
+                ids = frame_ids[order]
+                types = data[order, headers.index('type')].astype(np.int32)
+            elif not np.array_equal(frame_ids[order], ids):
+                raise ValueError(f"Atom ids change at timestep {timestep} in {dumpfile}")
+            col_index = [headers.index(c) for c in columns]
+            out.write(np.ascontiguousarray(data[order][:, col_index], dtype=np.float32).tobytes())
+            timesteps.append(timestep)
+            offsets.append(offset)
+            boxes.append(box_bounds)
+        st['frames'] = len(timesteps)
+
+    if ids is None:
+        raise ValueError(f"No frames found in {dumpfile}")
+    np.savez(os.path.join(cache_dir, "index.npz"),
+             ids=ids, types=types,
+             timesteps=np.array(timesteps, dtype=np.int64),
+             offsets=np.array(offsets, dtype=np.int64),
+             box_bounds=np.array(boxes))
+    # _iter_raw_frames dropped repeated and rejected decreasing timesteps; recorded so a
+    # cache from an older reader (or a hand-edited index) is not trusted
+    steps = np.array(timesteps, dtype=np.int64)
+    meta = dict(signature, version=CACHE_VERSION, n_frames=len(timesteps), n_atoms=len(ids),
+                columns=list(columns), timesteps_increasing=bool(np.all(np.diff(steps) > 0)),
+                last_timestep=int(steps[-1]), last_offset=int(offsets[-1]))
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    return cache_dir
+
+
+def cache_is_fresh(dumpfile, cache_dir=None, columns=('x', 'y', 'z')):
+    # Same size and mtime, the requested columns, increasing timesteps, and the
+    # dump still has the cached last frame at its recorded offset
+    meta_path = os.path.join(cache_dir or default_cache_dir(dumpfile), "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    signature = _source_signature(dumpfile)
+    return (all(meta.get(k) == v for k, v in signature.items())
+            and meta.get('version') == CACHE_VERSION
+            and meta.get('columns') == list(columns)
+            and meta.get('timesteps_increasing') is True
+            and _timestep_at(dumpfile, meta['last_offset']) == meta['last_timestep'])
+
+
+def open_trajectory_cache(dumpfile, cache_dir=None, rebuild=False, columns=('x', 'y', 'z')):
+    """Return a TrajectoryCache whose coords is a read-only np.memmap.
+
+    The cache is (re)built when missing, when the dump's size or mtime
+    differs from the one it was built from, or when it holds other columns.
+    Slicing coords, e.g. cache.coords[::10, cache.types == 1], only touches
+    the pages it needs.
+    """
+    cache_dir = cache_dir or default_cache_dir(dumpfile)
+    if rebuild or not cache_is_fresh(dumpfile, cache_dir, columns):
+        build_trajectory_cache(dumpfile, cache_dir, columns)
+
+    with open(os.path.join(cache_dir, "meta.json"), 'r') as f:
+        meta = json.load(f)
+    index = np.load(os.path.join(cache_dir, "index.npz"))
+    coords = np.memmap(os.path.join(cache_dir, "coords.f32"), dtype=np.float32, mode='r',
+                       shape=(meta['n_frames'], meta['n_atoms'], len(meta['columns'])))
+    return TrajectoryCache(index['ids'], index['types'], index['timesteps'],
+                           index['offsets'], index['box_bounds'], coords)
@@ -0,0 +1,166 @@
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from .lammps_dump import open_trajectory_cache
+from .plot_Li_migration_XY import read_lammps_data
+
+DIRECTIONS = np.array(['+x', '-x', '+y', '-y', '+z', '-z'])
+
+# ==========================
+# Li sites and interstitial sites from the initial lattice
+# ==========================
+def build_sites(data_file, li_type=1, interstitials=True):
+    # Li sites are the Li positions in lammps.data. Interstitial candidates are the
+    # midpoints of nearest-neighbour Li-Li pairs (the dumbbell/bridge positions in
+    # the anti-perovskite), deduplicated. Returns (positions, is_interstitial, lo, length)
+    box_bounds, atoms = read_lammps_data(data_file, scale=1.0)
+    box_bounds = np.array(box_bounds)
+    lo, length = box_bounds[:, 0], box_bounds[:, 1] - box_bounds[:, 0]
+    li_sites = np.array([atom[2:] for atom in atoms if atom[1] == li_type])
+    li_sites = np.mod(li_sites - lo, length)
+    sites = [li_sites]
+
+    if interstitials and len(li_sites) > 1:
+        tree = cKDTree(li_sites, boxsize=length)
+        dist, _ = tree.query(li_sites, k=2)
+        nn = dist[:, 1].min()
+        pairs = tree.query_pairs(nn * 1.05, output_type='ndarray')
+        d = li_sites[pairs[:, 1]] - li_sites[pairs[:, 0]]
+        d -= length * np.round(d / length)
+        mid = np.mod(li_sites[pairs[:, 0]] + 0.5 * d, length)
+        mid = np.unique(np.round(mid, 3), axis=0)
+        sites.append(mid)
+
+    positions = np.concatenate(sites)
+    is_interstitial = np.arange(len(positions)) >= len(li_sites)
+    return positions, is_interstitial, lo, length
+
+# ==========================
+# Batched nearest-site assignment over streamed frame chunks
+# ==========================
+def assign_sites(dumpfile, sites, lo, length, li_type=1, chunk_frames=500, stride=1):
+    # Returns Li ids, timesteps and the (n_frames, n_li) nearest-site index array
+    cache = open_trajectory_cache(dumpfile)
+    li_mask = cache.types == li_type
+    tree = cKDTree(sites, boxsize=length)
+    n_frames = len(range(0, cache.coords.shape[0], stride))
+    assignment = np.empty((n_frames, int(li_mask.sum())), dtype=np.int32)
+
+    step = chunk_frames * stride
+    for out, start in enumerate(range(0, cache.coords.shape[0], step)):
+        block = cache.coords[start:start + step:stride, li_mask, :].astype(np.float64)
+        wrapped = np.mod(block - lo, length)
+        wrapped[wrapped >= length] = 0.0  # guard cKDTree's [0, boxsize) requirement
+        _, idx = tree.query(wrapped.reshape(-1, 3))
+        assignment[out * chunk_frames:out * chunk_frames + len(block)] = idx.reshape(len(block), -1)
+    return cache.ids[li_mask], cache.timesteps[::stride], assignment
+
+# ==========================
+# Hop extraction with a minimum-residence filter
+# ==========================
+def filter_rattling(track, min_residence):
+    # Run-length encode one atom's site track and drop visits shorter than
+    # min_residence frames (rattling/transient), merging neighbouring equal runs
+    change = np.flatnonzero(track[1:] != track[:-1]) + 1
+    starts = np.concatenate([[0], change])
+    lengths = np.diff(np.concatenate([starts, [len(track)]]))
+    values = track[starts]
+    keep = (lengths >= min_residence) | (np.arange(len(starts)) == 0)
+    starts, values = starts[keep], values[keep]
+    merged = np.concatenate([[True], values[1:] != values[:-1]])
+    starts, values = starts[merged], values[merged]
+    lengths = np.diff(np.concatenate([starts, [len(track)]]))
+    return starts, values, lengths
+
+
+def extract_hops(ids, assignment, sites, length, min_residence=5):
+    """Hop events as a DataFrame plus the residence run lengths (frames).
+
+    A hop is a change of assigned site that is followed by at least
+    min_residence frames in the new site.
+    """
+    rows, residences = [], []
+    for k in range(assignment.shape[1]):
+        starts, values, lengths = filter_rattling(assignment[:, k], min_residence)
+        residences.append(lengths[1:-1])  # first/last runs are censored by the trajectory ends
+        if len(values) < 2:
+            continue
+        d = sites[values[1:]] - sites[values[:-1]]
+        d -= length * np.round(d / length)
+        rows.append(np.column_stack([np.full(len(d), ids[k]), starts[1:], values[:-1], values[1:], d]))
+
+    columns = ['atom_id', 'frame', 'from_site', 'to_site', 'dx', 'dy', 'dz']
+    hops = pd.DataFrame(np.concatenate(rows) if rows else np.empty((0, 7)), columns=columns)
+    hops[['atom_id', 'frame', 'from_site', 'to_site']] = hops[['atom_id', 'frame', 'from_site', 'to_site']].astype(int)
+    d = hops[['dx', 'dy', 'dz']].to_numpy()
+    axis = np.argmax(np.abs(d), axis=1)
+    negative = d[np.arange(len(d)), axis] < 0
+    hops['direction'] = DIRECTIONS[2 * axis + negative.astype(int)]
+    return hops, np.concatenate(residences) if residences else np.array([], int)
+
+# ==========================
+# Rates, correlation factors, occupancies
+# ==========================
+def hop_statistics(hops, residences, assignment, is_interstitial, n_li, total_time_ps, frame_dt_ps):
+    jumps = hops[['dx', 'dy', 'dz']].to_numpy()
+    summary = {'n_hops': len(hops), 'n_li': n_li, 'total_time_ps': total_time_ps,
+               'jump_rate_per_ps': len(hops) / (n_li * total_time_ps),
+               'mean_residence_ps': residences.mean() * frame_dt_ps if len(residences) else np.nan,
+               'mean_jump_length_A': np.linalg.norm(jumps, axis=1).mean() if len(jumps) else np.nan}
+
+    # Correlation factor f = <|sum_i l_i|^2> / <sum_i |l_i|^2>, per atom sums, overall and by axis
+    per_atom = hops.groupby('atom_id')[['dx', 'dy', 'dz']]
+    R2 = (per_atom.sum() ** 2).sum()
+    l2 = (hops[['dx', 'dy', 'dz']] ** 2).sum()
+    for ax in 'xyz':
+        summary[f'f_{ax}'] = R2[f'd{ax}'] / l2[f'd{ax}'] if l2[f'd{ax}'] > 0 else np.nan
+    summary['f'] = R2.sum() / l2.sum() if l2.sum() > 0 else np.nan
+
+    # Hop-based tracer diffusivity (cm²/s), correlated and uncorrelated, to validate the MSD result
+    A2_ps_to_cm2_s = 1e-16 / 1e-12
+    summary['D_hop_cm2_s'] = R2.sum() / (6 * n_li * total_time_ps) * A2_ps_to_cm2_s
+    summary['D_hop_uncorrelated_cm2_s'] = l2.sum() / (6 * n_li * total_time_ps) * A2_ps_to_cm2_s
+
+    for direction in DIRECTIONS:
+        count = int((hops['direction'] == direction).sum()) if len(hops) else 0
+        summary[f'rate_{direction}_per_ps'] = count / (n_li * total_time_ps)
+
+    occupancy = np.bincount(assignment.ravel(), minlength=len(is_interstitial)) / assignment.shape[0]
+    summary['li_site_vacancy_fraction'] = 1.0 - np.minimum(occupancy[~is_interstitial], 1.0).mean()
+    summary['interstitial_occupancy'] = occupancy[is_interstitial].sum()
+    return summary, occupancy
+
+# ==========================
+# Main entry point
+# ==========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Li hop events and site occupancies from a LAMMPS dump")
+    parser.add_argument('--data', default='lammps.data')
+    parser.add_argument('--dump', default='traj_all.lammpstrj')
+    parser.add_argument('--timestep-fs', type=float, default=1.0)
+    parser.add_argument('--stride', type=int, default=1)
+    parser.add_argument('--min-residence', type=int, default=5, help="Frames a Li must stay to count a hop")
+    parser.add_argument('--no-interstitials', action='store_true')
+    args = parser.parse_args()
+
+    sites, is_interstitial, lo, length = build_sites(args.data, interstitials=not args.no_interstitials)
+    ids, timesteps, assignment = assign_sites(args.dump, sites, lo, length, stride=args.stride)
+    hops, residences = extract_hops(ids, assignment, sites, length, args.min_residence)
+
+    frame_dt_ps = float(np.median(np.diff(timesteps))) * args.timestep_fs * 1e-3
+    total_time_ps = (timesteps[-1] - timesteps[0]) * args.timestep_fs * 1e-3
+    summary, occupancy = hop_statistics(hops, residences, assignment, is_interstitial,
+                                        len(ids), total_time_ps, frame_dt_ps)
+
+    hops['time_ps'] = (timesteps[hops['frame'].to_numpy()] - timesteps[0]) * args.timestep_fs * 1e-3
+    hops.to_csv('li_hops.csv', index=False)
+    pd.DataFrame({'site': np.arange(len(sites)), 'x': sites[:, 0] + lo[0], 'y': sites[:, 1] + lo[1],
+                  'z': sites[:, 2] + lo[2], 'interstitial': is_interstitial,
+                  'occupancy': occupancy}).to_csv('li_site_occupancy.csv', index=False)
+    with open('li_hopping_summary.txt', 'w') as f:
+        for key, value in summary.items():
+            f.write(f"{key}: {value}\n")
+            print(f"{key}: {value}")
+    print("Results saved to li_hops.csv, li_site_occupancy.csv and li_hopping_summary.txt")
@@ -0,0 +1,185 @@
+import os
+import re
+import sys
+import numpy as np
+
+from .campaign import logical_lines, VARIABLE_PATTERN
+from .plot_Li_migration_XY import read_lammps_data
+
+# ==========================
+# Stand-in for the LAMMPS executable, for testing campaign.py without LAMMPS.
+#   python -m mlp_ap_se.lmp_stub -in in.ionic -log log.lammps [-var NAME VALUE ...]
+# It follows the run/restart/read_restart commands of the input and writes
+# synthetic outputs in the formats of in.ionic, in.expansion, in.conductivity
+# and in.greenkubo.
+# LMP_STUB_FAIL_AT=<step> makes it stop with an error once that step is passed
+# (after writing the restart files up to it), to exercise resuming.
+# ==========================
+KB_EV = 8.617e-5
+
+def parse_command_line(argv):
+    options, variables = {}, {}
+    i = 0
+    while i < len(argv):
+        if argv[i] == '-var':
+            variables[argv[i + 1]] = argv[i + 2]
+            i += 3
+        else:
+            options[argv[i].lstrip('-')] = argv[i + 1]
+            i += 2
+    return options, variables
+
+
+def read_input(path, variables):
+    # Command-line variables win over 'variable ... index' lines, as in LAMMPS
+    values = dict(variables)
+    commands = []
+    for line in logical_lines(open(path).read()):
+        tokens = line.split('#')[0].split()
+        if not tokens:
+            continue
+        if tokens[0] == 'variable' and tokens[2] == 'index':
+            values.setdefault(tokens[1], tokens[3])
+        elif tokens[0] == 'variable':
+            continue  # equal/atom-style variables are evaluated at run time in LAMMPS
+        else:
+            # Variables the stub does not evaluate (equal-style) are left as written
+            commands.append([VARIABLE_PATTERN.sub(lambda m: str(values.get(m.group(1), m.group(0))), t)
+                             for t in tokens])
+    return values, commands
+
+
+def box_lengths(data_file):
+    bounds, atoms = read_lammps_data(data_file, scale=1.0)
+    return np.array([b[1] - b[0] for b in bounds]), atoms
+
+# ==========================
+# Synthetic outputs
+# ==========================
+def write_ionic_outputs(values, data_file, start, end, rng, n_frames=200):
+    # Li random walk with an Arrhenius D; other species vibrate about their sites
+    length, atoms = box_lengths(data_file)
+    ids = np.array([a[0] for a in atoms])
+    types = np.array([a[1] for a in atoms])
+    x0 = np.array([a[2:] for a in atoms])
+    T = float(values['T'])
+    D = 1e-3 * np.exp(-0.3 / (KB_EV * T))  # Å²/fs
+    steps = np.linspace(start, end, n_frames + 1).astype(int)
+    dt = np.diff(steps).mean()
+    walk = np.cumsum(rng.normal(0, np.sqrt(2 * D * dt), (n_frames + 1, len(ids), 3)), axis=0)
+    walk[:, types != 1] = rng.normal(0, 0.1, ((n_frames + 1), np.sum(types != 1), 3))
+    walk[0] = 0.0
+    x = x0 + walk
+
+    with open("traj_all.lammpstrj", "a") as f:
+        for s, frame in zip(steps, np.mod(x, length)):
+            f.write(f"ITEM: TIMESTEP\n{s}\nITEM: NUMBER OF ATOMS\n{len(ids)}\nITEM: BOX BOUNDS pp pp pp\n"
+                    f"0 {length[0]}\n0 {length[1]}\n0 {length[2]}\nITEM: ATOMS id type x y z\n")
+            np.savetxt(f, np.column_stack([ids, types, frame]), fmt="%d %d %.5f %.5f %.5f")
+    msd = np.mean(np.sum(walk[:, types == 1] ** 2, axis=2), axis=1)
+    with open("msd_Li.out", "a") as f:
+        if start == 0 or not os.path.getsize("msd_Li.out"):
+            f.write("# Time-averaged data for fix msd_out\n# TimeStep c_msd_Li[4]\n")
+        np.savetxt(f, np.column_stack([steps, msd]), fmt="%d %.6f")
+
+
+def write_expansion_outputs(values, data_file, end, rng):
+    length, _ = box_lengths(data_file)
+    T = float(values['T'])
+    n = max(end // 1000, 10)
+    V = np.prod(length) * (1 + 9e-5 * (T - 300)) + rng.normal(0, 2, n) + 20 * np.exp(-np.arange(n) / 30)
+    np.savetxt(f"thermal_expansion_{values['T']}K.txt",
+               np.column_stack([np.arange(1, n + 1) * 1000, T + rng.normal(0, 5, n), V, V ** (1 / 3),
+                                V ** (1 / 3), V ** (1 / 3)]),
+               header="Time-averaged data for fix 2\nTimeStep c_myTemp v_V v_Lx v_Ly v_Lz")
+
+
+def write_conductivity_outputs(values, data_file, end, rng, n_chunks=60):
+    _, atoms = box_lengths(data_file)
+    total = len(atoms) * int(values['rep_x'])
+    T_hot, T_cold, T = float(values['T_hot']), float(values['T_cold']), float(values['T'])
+    with open("temp_profile.dat", "w") as f:
+        f.write("# Chunk-averaged data for fix aveT and group all\n# Timestep Number-of-chunks Total-count\n"
+                "# Chunk Coord1 Ncount v_temp1\n")
+        for b in range(end // 10000):
+            f.write(f"{(b + 1) * 10000} {n_chunks} {total}\n")
+            x = (np.arange(n_chunks) + 0.5) / n_chunks
+            profile = T + (T_hot - T_cold) / 2 * (1 - 2 * x) * ((x > 0.2) & (x < 0.8)) * (1 - np.exp(-b / 20))
+            profile += rng.normal(0, 5, n_chunks)
+            for c in range(n_chunks):
+                f.write(f"  {c + 1} {x[c]:.5f} {total // n_chunks} {profile[c]:.4f}\n")
+    steps = np.arange(0, end + 1, 10000)
+    # Finite-size effect: boundary scattering at the baths lowers k as 1/k = 1/k_bulk + c/Lx
+    power = 0.05 * (T_hot - T_cold) * 16 / (int(values['rep_x']) + 8)
+    EL = np.concatenate([[0], np.cumsum(-power + rng.normal(0, 1, len(steps) - 1))])
+    ER = np.concatenate([[0], np.cumsum(power + rng.normal(0, 1, len(steps) - 1))])
+    np.savetxt("heatflow.dat", np.column_stack([steps, EL, ER]), fmt="%d %.6f %.6f", header="Time E_Hot E_Cold")
+
+
+def write_greenkubo_outputs(values, data_file, start, end, rng, phi=0.99):
+    # AR(1) heat current per component: exponential HCACF with a 100-sample correlation time
+    length, _ = box_lengths(data_file)
+    rep = int(values['rep'])
+    sample = int(values['sample'])
+    steps = np.arange(start + sample, end + 1, sample)
+    noise = rng.normal(0, 50.0 * np.sqrt(1 - phi ** 2), (len(steps), 3))
+    J = np.empty_like(noise)
+    J[0] = noise[0] / np.sqrt(1 - phi ** 2)
+    for i in range(1, len(J)):
+        J[i] = phi * J[i - 1] + noise[i]
+    V = np.prod(length) * rep ** 3
+    with open("heatflux.dat", "a") as f:
+        if start == 0:
+            f.write("# Time-averaged data for fix flux_out\n"
+                    "# TimeStep c_flux[1] c_flux[2] c_flux[3] c_thermo_temp v_V\n")
+        np.savetxt(f, np.column_stack([steps, J, float(values['T']) + rng.normal(0, 3, len(steps)),
+                                       np.full(len(steps), V)]), fmt="%d %.6f %.6f %.6f %.3f %.3f")
+
+# ==========================
+# Main: walk the run commands
+# ==========================
+if __name__ == "__main__":
+    options, variables = parse_command_line(sys.argv[1:])
+    values, commands = read_input(options['in'], variables)
+    log = open(options.get('log', 'log.lammps'), "w")
+    fail_at = int(os.environ.get('LMP_STUB_FAIL_AT', 0))
+    rng = np.random.default_rng(int(values.get('seed', 0)))
+
+    step, restart_every, data_file, resumed = 0, None, "lammps.data", None
+    for tokens in commands:
+        if tokens[0] == 'read_restart':
+            if not os.path.exists(tokens[1]):
+                log.write(f"ERROR: Cannot open restart file {tokens[1]}\n")
+                sys.exit(1)
+            step = resumed = int(re.search(r"\.(\d+)\.", tokens[1]).group(1))
+            log.write(f"Reading restart file {tokens[1]} at step {step}\n")
+        elif tokens[0] == 'read_data':
+            data_file = tokens[1]
+        elif tokens[0] == 'restart':
+            restart_every = int(tokens[1])
+        elif tokens[0] == 'reset_timestep':
+            step = int(tokens[1])
+        elif tokens[0] == 'run':
+            target = int(tokens[1]) if 'upto' in tokens else step + int(tokens[1])
+            log.write(f"run {tokens[1]}{' upto' if 'upto' in tokens else ''}: steps {step} -> {target}\n")
+            if restart_every:
+                for s in range(restart_every * (step // restart_every + 1), target + 1, restart_every):
+                    if fail_at and s > fail_at:
+                        break
+                    with open(f"restart.{s}.bin", "w") as f:
+                        f.write(f"stub restart at step {s}\n")
+            if fail_at and target > fail_at:
+                log.write(f"ERROR: stub stopped at step {fail_at} (LMP_STUB_FAIL_AT)\n")
+                sys.exit(1)
+            step = target
+
+    if 'heat/flux' in open(options['in']).read():
+        production_start = int(values['npt_steps']) + int(values['nvt_steps'])
+        write_greenkubo_outputs(values, data_file, max(production_start, resumed or 0), step, rng)
+    elif 'msd' in open(options['in']).read():
+        write_ionic_outputs(values, data_file, 0 if resumed is None else resumed, step, rng)
+    elif 'thermal_expansion' in open(options['in']).read():
+        write_expansion_outputs(values, data_file, step, rng)
+    else:
+        write_conductivity_outputs(values, data_file, step, rng)
+    log.write(f"Total wall time: 0:00:00 (stub, {step} steps)\n")
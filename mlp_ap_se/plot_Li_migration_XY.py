@@ -0,0 +1,185 @@
+import argparse
+import numpy as np
+from .lammps_dump import read_species_trajectory, open_trajectory_cache
+from .instrument import stage
+from . import instrument
+
+# ==========================
+# Read LAMMPS data file to get initial structure
+# ==========================
+def read_lammps_data(filepath, scale=1.2):
+    with open(filepath, 'r') as f:
+        lines = f.readlines()
+
+    atoms_section = False
+    atoms = []
+
+    for i, line in enumerate(lines):
+        if "xlo xhi" in line:
+            x_bounds = list(map(float, line.strip().split()[0:2]))
+        elif "ylo yhi" in line:
+            y_bounds = list(map(float, line.strip().split()[0:2]))
+        elif "zlo zhi" in line:
+            z_bounds = list(map(float, line.strip().split()[0:2]))
+        elif "Atoms" in line:
+            atoms_section = True
+            header_line = i + 1
+        elif atoms_section and i > header_line:
+            if line.strip() == "":
+                break
+            parts = line.strip().split()
+            atom_id = int(parts[0])
+            atom_type = int(parts[1])
+            x, y, z = map(float, parts[-3:])
+            atoms.append((atom_id, atom_type, x * scale, y * scale, z * scale))
+
+    return [x_bounds, y_bounds, z_bounds], atoms
+
+# ==========================
+# Extract Li-ion trajectories (XY projection) from LAMMPS dump
+# ==========================
+def extract_li_trajectories_xy(dumpfile, scale=1.2, li_type=1, stride=1, use_cache=True):
+    # Returns Li ids (sorted) and an (n_frames, n_li, 2) array of XY positions.
+    # With use_cache the dump is parsed once into a memory-mapped binary cache
+    # (<dump>.cache/) and later calls only slice it; otherwise frames are
+    # streamed from the text file
+    with stage("extract_li_xy", files=[dumpfile]) as st:
+        if use_cache:
+            cache = open_trajectory_cache(dumpfile)
+            li_mask = cache.types == li_type
+            traj = cache.coords[::stride, li_mask, :2].astype(np.float64) * scale
+            st['frames'] = len(traj)
+            return cache.ids[li_mask], traj
+
+        li_ids, _, traj = read_species_trajectory(dumpfile, atom_type=li_type,
+                                                  columns=('x', 'y'), scale=scale)
+        st['frames'] = len(traj)
+        return li_ids, traj[::stride]
+
+def extract_li_trajectories_dict(dumpfile, scale=1.2, li_type=1):
+    # The earlier return value of extract_li_trajectories_xy: {Li id: (n_frames, 2) XY positions}
+    li_ids, traj = extract_li_trajectories_xy(dumpfile, scale=scale, li_type=li_type)
+    return {int(atom_id): traj[:, k] for k, atom_id in enumerate(li_ids)}
+
+# ==========================
+# Accumulate a Li probability-density map in streaming frame chunks
+# ==========================
+PLANES = {'xy': (0, 1, 2), 'xz': (0, 2, 1), 'yz': (1, 2, 0)}
+
+def accumulate_li_density(dumpfile, li_type=1, plane='xy', slab=None, bins=300,
+                          chunk_frames=500, stride=1, scale=1.0):
+    # Histograms positions projected on `plane` (optionally only those whose third
+    # coordinate lies in slab=(lo, hi)) chunk by chunk from the memory-mapped cache,
+    # so memory and render cost do not grow with trajectory length.
+    # Returns x/y bin edges and the probability density (Å^-2), shape (bins, bins)
+    a, b, c = PLANES[plane]
+    with stage("li_density", files=[dumpfile]) as st:
+        cache = open_trajectory_cache(dumpfile)
+        li_mask = cache.types == li_type
+        lo = cache.box_bounds[0, :, 0]
+        length = cache.box_bounds[0, :, 1] - lo
+        x_edges = np.linspace(lo[a], lo[a] + length[a], bins + 1) * scale
+        y_edges = np.linspace(lo[b], lo[b] + length[b], bins + 1) * scale
+
+        hist = np.zeros((bins, bins))
+        step = chunk_frames * stride
+        for start in range(0, cache.coords.shape[0], step):
+            block = cache.coords[start:start + step:stride, li_mask, :].reshape(-1, 3)
+            block = (block - lo) % length + lo  # wrap back into the primary cell
+            if slab is not None:
+                block = block[(block[:, c] >= slab[0]) & (block[:, c] < slab[1])]
+            h, _, _ = np.histogram2d(block[:, a] * scale, block[:, b] * scale, bins=[x_edges, y_edges])
+            hist += h
+        st['frames'] = len(range(0, cache.coords.shape[0], stride))
+
+    cell_area = (x_edges[1] - x_edges[0]) * (y_edges[1] - y_edges[0])
+    density = hist / max(hist.sum(), 1.0) / cell_area
+    return x_edges, y_edges, density
+
+# ==========================
+# Static lattice sites from the initial structure
+# ==========================
+def plot_static_sites(ax, atoms, plane='xy', slab=None):
+    a, b, c = PLANES[plane]
+    species = [(1, 'green', 120, 'Li$^+$'), (2, 'blue', 220, 'Cl$^-$'),
+               (3, 'red', 180, 'O$^{2-}$'), (4, 'saddlebrown', 220, 'Br$^-$')]
+    for atom_type, color, size, label in species:
+        coords = np.array([atom[2:] for atom in atoms if atom[1] == atom_type]).reshape(-1, 3)
+        if slab is not None:
+            coords = coords[(coords[:, c] >= slab[0]) & (coords[:, c] < slab[1])]
+        if len(coords):
+            ax.scatter(coords[:, a], coords[:, b], c=color, s=size, label=label, edgecolors='k', zorder=10)
+
+# ==========================
+# Main plotting function
+# ==========================
+def plot_structure_and_li_trajectories_xy(data_file, dump_file, output_img, mode='density',
+                                          plane='xy', slab=None, bins=300, dpi=600, show=True):
+    # mode='density': one imshow of the Li probability density (cost independent of run length)
+    # mode='lines':   one line per Li atom through every frame (slow and overplotted for long runs; XY only)
+    if mode == 'lines' and plane != 'xy':
+        raise ValueError(f"mode='lines' draws XY trajectories only; got plane={plane!r}")
+    # matplotlib is only imported here, so read_lammps_data etc. stay cheap to import
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    # Set global font style
+    plt.rcParams['font.family'] = 'Times New Roman'
+    plt.rcParams['mathtext.fontset'] = 'stix'  # For consistent LaTeX-style superscripts
+
+    scale = 1.0
+    box_bounds, atoms = read_lammps_data(data_file, scale=scale)
+
+    fig, ax = plt.subplots(figsize=(8, 8))
+
+    if mode == 'density':
+        x_edges, y_edges, density = accumulate_li_density(dump_file, li_type=1, plane=plane,
+                                                          slab=slab, bins=bins, scale=scale)
+        np.savez(output_img.rsplit('.', 1)[0] + "_density.npz",
+                 x_edges=x_edges, y_edges=y_edges, density=density)
+        positive = density[density > 0]
+        norm = LogNorm(vmin=positive.min(), vmax=positive.max()) if positive.size else None
+        im = ax.imshow(density.T, origin='lower', cmap='viridis', norm=norm, interpolation='nearest',
+                       extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]), zorder=1)
+        fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04, label='Li$^+$ probability density (Å$^{-2}$)')
+        title = f"Li$^+$ Probability Density in {plane.upper()} Plane"
+    else:
+        _, li_traj = extract_li_trajectories_xy(dump_file, scale=scale, li_type=1)
+        # Plot Li⁺ trajectories
+        for k in range(li_traj.shape[1]):
+            ax.plot(li_traj[:, k, 0], li_traj[:, k, 1], color='lightgreen', linewidth=0.7, alpha=0.7, zorder=1)
+        title = "Li$^+$ Trajectories in XY Plane"
+
+    # Plot static initial positions
+    plot_static_sites(ax, atoms, plane=plane, slab=slab)
+
+    ax.set_xlabel(f"{plane[0].upper()} (Å)", fontsize=14)
+    ax.set_ylabel(f"{plane[1].upper()} (Å)", fontsize=14)
+    ax.set_aspect('equal')
+    ax.set_title(title, fontsize=18)
+
+    # Legend inside upper right
+    ax.legend(loc='upper right', fontsize=12, frameon=True)
+
+    plt.tight_layout()
+    with stage("render", dpi=dpi):
+        plt.savefig(output_img, dpi=dpi)
+    if show:
+        plt.show()
+    plt.close(fig)
+
+# ==========================
+# Main entry point
+# ==========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Li probability density / trajectories over the initial structure")
+    instrument.add_report_argument(parser)
+    args = parser.parse_args()
+    instrument.start("plot_Li_migration_XY", args.report)
+    plot_structure_and_li_trajectories_xy(
+        data_file="lammps.data",
+        dump_file="traj_all.lammpstrj",
+        output_img="Li_XY_fulltrajectory_scaled.png"
+    )
+    if instrument.finish("Li_migration_report.json"):
+        print("Run report saved to Li_migration_report.json")
\ No newline at end of file
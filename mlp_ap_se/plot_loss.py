@@ -0,0 +1,204 @@
+import os
+import time
+import argparse
+import numpy as np
+
+# Font size configuration
+title_fontsize = 18
+label_fontsize = 14
+legend_fontsize = 12
+
+# Column layout of a DeePMD v1 lcurve.out, used only when the file has no header
+LEGACY_COLUMNS = ['step', 'rmse_val', 'rmse_trn', 'rmse_e_val', 'rmse_e_trn',
+                  'rmse_f_val', 'rmse_f_trn', 'rmse_v_val', 'rmse_v_trn', 'lr']
+
+# Panels: (output file, title, y label, [(column, legend label)], log scale)
+PANELS = [
+    ("total_rmse_evolution.png", "Total RMSE Evolution During Training", "Total RMSE",
+     [("rmse_val", "Validation RMSE"), ("rmse_trn", "Training RMSE")], False),
+    ("energy_rmse_evolution.png", "Energy RMSE Evolution During Training", "Energy RMSE",
+     [("rmse_e_val", "Validation Energy RMSE"), ("rmse_e_trn", "Training Energy RMSE")], False),
+    ("force_rmse_evolution.png", "Force RMSE Evolution During Training", "Force RMSE",
+     [("rmse_f_val", "Validation Force RMSE"), ("rmse_f_trn", "Training Force RMSE")], False),
+    ("virial_rmse_evolution.png", "Virial RMSE Evolution During Training", "Virial RMSE",
+     [("rmse_v_val", "Validation Virial RMSE"), ("rmse_v_trn", "Training Virial RMSE")], False),
+    ("learning_rate_evolution.png", "Learning Rate Evolution During Training", "Learning Rate",
+     [("lr", "Learning Rate")], True),
+    ("all_rmse_metrics_evolution_log.png", "All RMSE Metrics Evolution During Training", "RMSE Values (log scale)",
+     [("rmse_val", "Validation Total RMSE"), ("rmse_trn", "Training Total RMSE"),
+      ("rmse_e_val", "Validation Energy RMSE"), ("rmse_e_trn", "Training Energy RMSE"),
+      ("rmse_f_val", "Validation Force RMSE"), ("rmse_f_trn", "Training Force RMSE"),
+      ("rmse_v_val", "Validation Virial RMSE"), ("rmse_v_trn", "Training Virial RMSE")], True),
+]
+
+# === Incremental lcurve.out reader ===
+class LcurveTail:
+    # Keeps the byte offset of the last complete line read; each poll parses only
+    # the rows appended since, into a NumPy buffer that grows by doubling
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.offset = 0
+        self.pending = b""
+        self.columns = None
+        self.buffer = None
+        self.n_rows = 0
+
+    @property
+    def data(self):
+        return self.buffer[:self.n_rows] if self.buffer is not None else np.empty((0, 0))
+
+    def _read_header(self, lines):
+        # The header is the first comment line naming a 'step' column ("#  step  rmse_val ... lr")
+        for line in lines:
+            tokens = line.decode().lstrip('#').split()
+            if line.startswith(b'#') and 'step' in tokens:
+                return tokens
+        return None
+
+    def poll(self):
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+            self.offset = f.tell()
+        text = self.pending + chunk
+        cut = text.rfind(b"\n") + 1
+        self.pending = text[cut:]
+        lines = text[:cut].splitlines()
+
+        if self.columns is None:
+            self.columns = self._read_header(lines)
+        rows = [line for line in lines if line.strip() and not line.startswith(b'#')]
+        if not rows:
+            return 0
+        new = np.loadtxt(rows, ndmin=2)
+        if self.columns is None:
+            self.columns = LEGACY_COLUMNS[:new.shape[1]]
+
+        if self.buffer is None:
+            self.buffer = np.empty((max(1024, 2 * len(new)), new.shape[1]))
+        elif self.n_rows + len(new) > len(self.buffer):
+            grown = np.empty((2 * (self.n_rows + len(new)), self.buffer.shape[1]))
+            grown[:self.n_rows] = self.buffer[:self.n_rows]
+            self.buffer = grown
+        self.buffer[self.n_rows:self.n_rows + len(new)] = new
+        self.n_rows += len(new)
+        return len(new)
+
+    def column(self, name):
+        return self.data[:, self.columns.index(name)]
+
+def wait_for_rows(tail, interval):
+    # Training may not have written lcurve.out, or only its header, yet
+    while not (os.path.exists(tail.file_path) and tail.poll() and tail.columns):
+        print(f"Waiting for the first rows of {tail.file_path} ...")
+        time.sleep(interval)
+
+def load_lcurve(file_path):
+    # One-shot read: (column names, rows)
+    tail = LcurveTail(file_path)
+    tail.poll()
+    return tail.columns, tail.data
+
+# === Plateau / divergence detection on the validation RMSE ===
+def check_training(steps, values, window=50, plateau_tol=0.01, divergence_factor=3.0):
+    # Divergence: non-finite values, or the recent median far above the best seen.
+    # Plateau: the median of the last `window` rows improved by less than
+    # plateau_tol (relative) on the `window` rows before it
+    if len(values) == 0:
+        return []
+    messages = []
+    if not np.all(np.isfinite(values[-window:])):
+        messages.append(f"DIVERGENCE: non-finite RMSE at step {int(steps[-1])}")
+        return messages
+    recent = np.median(values[-window:])
+    if recent > divergence_factor * np.nanmin(values):
+        messages.append(f"DIVERGENCE: recent RMSE {recent:.3e} is {recent / np.nanmin(values):.1f}x the best "
+                        f"({np.nanmin(values):.3e}) at step {int(steps[-1])}")
+    if len(values) >= 2 * window:
+        previous = np.median(values[-2 * window:-window])
+        if (previous - recent) / previous < plateau_tol:
+            messages.append(f"PLATEAU: RMSE changed {100 * (previous - recent) / previous:.2f}% over the last "
+                            f"{int(steps[-1] - steps[-window])} steps")
+    return messages
+
+# === One shared figure for all panels ===
+def create_figure(columns, backend=None):
+    # matplotlib is imported on first use, so load_lcurve/check_training stay cheap to import
+    import matplotlib
+    if backend:
+        matplotlib.use(backend)
+    import matplotlib.pyplot as plt
+
+    # Set global font to Times New Roman for all plots
+    plt.rcParams['font.family'] = 'Times New Roman'
+
+    fig, axes = plt.subplots(2, 3, figsize=(24, 12))
+    lines = []
+    for ax, (_, title, ylabel, series, log) in zip(axes.ravel(), PANELS):
+        for name, label in series:
+            if name in columns:
+                line, = ax.plot([], [], label=label, linestyle='-', marker='.')
+                lines.append((line, name))
+        ax.set_xlabel("Step", fontsize=label_fontsize)
+        ax.set_ylabel(ylabel, fontsize=label_fontsize)
+        if log:
+            ax.set_yscale("log")
+        ax.set_title(title, fontsize=title_fontsize)
+        if ax.lines:
+            ax.legend(fontsize=legend_fontsize, loc='upper right')
+        else:
+            ax.set_visible(False)  # e.g. no virial columns in this lcurve.out
+        ax.grid()
+    fig.tight_layout()
+    return fig, axes, lines
+
+def update_figure(fig, axes, lines, tail, output_dir="."):
+    steps = tail.column('step')
+    for line, name in lines:
+        line.set_data(steps, tail.column(name))
+    for ax in axes.ravel():
+        ax.relim()
+        ax.autoscale_view()
+    fig.canvas.draw()
+    # Every panel is cropped out of the one rendered figure under its usual file name
+    renderer = fig.canvas.get_renderer()
+    for ax, (output_img, *_) in zip(axes.ravel(), PANELS):
+        if ax.get_visible():
+            extent = ax.get_tightbbox(renderer).transformed(fig.dpi_scale_trans.inverted())
+            fig.savefig(os.path.join(output_dir, output_img), dpi=300, bbox_inches=extent.expanded(1.02, 1.02))
+    fig.savefig(os.path.join(output_dir, "lcurve_panels.png"), dpi=150)
+
+def validation_column(columns):
+    for name in ('rmse_val', 'rmse_f_val', 'rmse_e_val'):
+        if name in columns:
+            return name
+    return columns[1]
+
+# === Main program ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plot (or monitor) DeePMD training curves from lcurve.out")
+    parser.add_argument('file_path', nargs='?', default="./lcurve.out")
+    parser.add_argument('--monitor', action='store_true', help="Keep tailing lcurve.out while training runs")
+    parser.add_argument('--interval', type=float, default=60.0, help="Polling interval in monitor mode (s)")
+    parser.add_argument('--numb-steps', type=int, default=None, help="Stop monitoring at this step (training.numb_steps)")
+    args = parser.parse_args()
+
+    tail = LcurveTail(args.file_path)
+    if args.monitor:
+        wait_for_rows(tail, args.interval)
+    elif not tail.poll():
+        raise SystemExit(f"No data rows in {args.file_path}")
+    fig, axes, lines = create_figure(tail.columns, backend='Agg')
+    val_name = validation_column(tail.columns)
+
+    while True:
+        update_figure(fig, axes, lines, tail)
+        for message in check_training(tail.column('step'), tail.column(val_name)):
+            print(message)
+        if not args.monitor or (args.numb_steps and tail.n_rows and tail.column('step')[-1] >= args.numb_steps):
+            break
+        while tail.poll() == 0:
+            time.sleep(args.interval)
+        print(f"Read {tail.n_rows} rows, last step {int(tail.column('step')[-1])}")
+    import matplotlib.pyplot as plt
+    plt.close(fig)
@@ -0,0 +1,137 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from itertools import product
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .lammps_dump import open_trajectory_cache
+from .species import TYPE_NAMES
+
+# ==========================
+# Periodic cell-list neighbour search (orthorhombic box)
+# ==========================
+def neighbor_pairs(positions, box_length, rcut):
+    """All ordered pairs (i, j), i != j, closer than rcut, with their distances.
+
+    Atoms are binned into cells of side >= rcut and only the 27 surrounding
+    cells are searched, using a padded (n_cells, max_occupancy) table so each
+    neighbour offset is one vectorised gather. Boxes with fewer than three
+    cells per side fall back to all-pairs minimum image.
+    """
+    positions = np.mod(positions, box_length)
+    n_atoms = len(positions)
+    n_cells = np.floor(box_length / rcut).astype(int)
+
+    if np.any(n_cells < 3):
+        d = positions[None, :, :] - positions[:, None, :]
+        d -= box_length * np.round(d / box_length)
+        r = np.sqrt(np.einsum('ijk,ijk->ij', d, d))
+        i, j = np.nonzero((r < rcut) & ~np.eye(n_atoms, dtype=bool))
+        return i, j, r[i, j]
+
+    cell_xyz = np.minimum((positions / box_length * n_cells).astype(int), n_cells - 1)
+    cell_id = np.ravel_multi_index(cell_xyz.T, n_cells)
+    order = np.argsort(cell_id, kind='stable')
+    counts = np.bincount(cell_id, minlength=np.prod(n_cells))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    max_occ = counts.max()
+    table = np.full((np.prod(n_cells), max_occ), -1, dtype=np.int64)
+    slot = np.arange(n_atoms) - starts[cell_id[order]]
+    table[cell_id[order], slot] = order
+
+    I, J, R = [], [], []
+    atoms = np.arange(n_atoms)
+    for offset in product((-1, 0, 1), repeat=3):
+        neighbor_cell = np.ravel_multi_index(((cell_xyz + offset) % n_cells).T, n_cells)
+        cand = table[neighbor_cell]                                  # (n_atoms, max_occ)
+        valid = (cand >= 0) & (cand != atoms[:, None])
+        d = positions[np.where(valid, cand, 0)] - positions[:, None, :]
+        d -= box_length * np.round(d / box_length)
+        r = np.sqrt(np.einsum('ijk,ijk->ij', d, d))
+        hit = valid & (r < rcut)
+        ii, kk = np.nonzero(hit)
+        I.append(ii)
+        J.append(cand[ii, kk])
+        R.append(r[ii, kk])
+    return np.concatenate(I), np.concatenate(J), np.concatenate(R)
+
+# ==========================
+# Per-worker histogram accumulation over a range of frames
+# ==========================
+def _histogram_frames(dumpfile, frames, rmax, n_bins, n_types):
+    cache = open_trajectory_cache(dumpfile)
+    types = cache.types.astype(np.int64) - 1
+    hist = np.zeros(n_types * n_types * n_bins)
+    volume_sum = 0.0
+    for f in frames:
+        box = cache.box_bounds[f]
+        length = box[:, 1] - box[:, 0]
+        i, j, r = neighbor_pairs(cache.coords[f].astype(np.float64) - box[:, 0], length, rmax)
+        bins = (r / rmax * n_bins).astype(np.int64)
+        pair = types[i] * n_types + types[j]
+        hist += np.bincount(pair * n_bins + bins, minlength=hist.size)
+        volume_sum += np.prod(length)
+    return hist.reshape(n_types, n_types, n_bins), volume_sum, len(frames)
+
+
+def partial_rdf(dumpfile, rmax=6.0, n_bins=200, stride=1, workers=None, frames_per_task=50):
+    """Partial g_ab(r) and running coordination numbers n_ab(r) for every species pair.
+
+    Frames are spread over a process pool; each worker memory-maps the
+    trajectory cache itself and returns a histogram that is summed as it
+    arrives. Returns (r, g, cn, type_ids) with g/cn of shape (n_types, n_types, n_bins).
+    """
+    cache = open_trajectory_cache(dumpfile)
+    type_ids = np.arange(1, int(cache.types.max()) + 1)
+    n_types = len(type_ids)
+    counts = np.bincount(cache.types, minlength=n_types + 1)[1:].astype(float)
+    min_half_box = 0.5 * np.min(cache.box_bounds[:, :, 1] - cache.box_bounds[:, :, 0])
+    if rmax > min_half_box:
+        raise ValueError(f"rmax = {rmax} Å exceeds half the smallest box length ({min_half_box:.3f} Å)")
+
+    frames = np.arange(0, cache.coords.shape[0], stride)
+    tasks = [frames[k:k + frames_per_task] for k in range(0, len(frames), frames_per_task)]
+    hist = np.zeros((n_types, n_types, n_bins))
+    volume_sum, n_frames = 0.0, 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_histogram_frames, dumpfile, t, rmax, n_bins, n_types) for t in tasks]
+        for future in as_completed(futures):
+            h, v, n = future.result()
+            hist += h
+            volume_sum += v
+            n_frames += n
+
+    edges = np.linspace(0.0, rmax, n_bins + 1)
+    r = 0.5 * (edges[1:] + edges[:-1])
+    shell = 4.0 / 3.0 * np.pi * (edges[1:] ** 3 - edges[:-1] ** 3)
+    volume = volume_sum / n_frames
+    pair_counts = counts[:, None] * counts[None, :] - np.diag(counts)  # ordered pairs, i != j
+    with np.errstate(divide='ignore', invalid='ignore'):
+        g = hist * volume / (n_frames * pair_counts[:, :, None] * shell)
+        cn = np.cumsum(hist, axis=2) / (n_frames * counts[:, None, None])
+    return r, np.nan_to_num(g), np.nan_to_num(cn), type_ids
+
+# ==========================
+# Main entry point
+# ==========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partial RDFs and coordination numbers from a LAMMPS dump")
+    parser.add_argument('--dump', default='traj_all.lammpstrj')
+    parser.add_argument('--rmax', type=float, default=6.0)
+    parser.add_argument('--bins', type=int, default=200)
+    parser.add_argument('--stride', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='rdf_partial.csv')
+    args = parser.parse_args()
+
+    r, g, cn, type_ids = partial_rdf(args.dump, args.rmax, args.bins, args.stride, args.workers)
+    table = {'r': r}
+    for a, b in product(range(len(type_ids)), repeat=2):
+        if a > b:
+            continue
+        name = f"{TYPE_NAMES.get(type_ids[a], type_ids[a])}-{TYPE_NAMES.get(type_ids[b], type_ids[b])}"
+        table[f"g_{name}"] = g[a, b]
+        table[f"cn_{name}"] = cn[a, b]
+    pd.DataFrame(table).to_csv(args.output, index=False)
+    print(f"Partial RDFs for {len(type_ids)} species written to {os.path.abspath(args.output)}")
@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import argparse
+import importlib.util
+
+# ==========================
+# Content-addressed cache of analysis results.
+#   result_cache.enable()                         # done by the scripts unless --no-cache
+#   res = result_cache.cached("analyze_run", [temp_file, energy_file, data_file],
+#                             {'target_rel_err': 0.05}, lambda: ...)
+# The key is a SHA-256 of the analysis name, its parameters, the contents of its
+# input files and the source of the modules that compute it, so an unchanged run
+# directory is never re-analysed and any edit to an input or the code is a miss.
+# Entries (pickled result dicts with their arrays) live in one local store that
+# is trimmed to a size limit, least recently used first. With no active cache
+# (the default for library calls) cached() just calls compute().
+# ==========================
+ENV_DIR = "AP_RESULT_CACHE"          # store location; "0" disables the cache in the scripts
+ENV_MAX_MB = "AP_RESULT_CACHE_MB"
+DEFAULT_MAX_MB = 2048
+ENTRY_SUFFIX = ".pkl"
+
+_active = None
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "mlp-ap-se", "results")
+
+
+def _sha256_file(path, block=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(block), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _atomic_write(path, payload):
+    # Write beside the target and rename, so readers (and pool workers) never see a partial file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+class ResultCache:
+    def __init__(self, root=None, max_mb=None):
+        self.root = root or default_cache_dir()
+        self.max_bytes = int((max_mb if max_mb is not None else DEFAULT_MAX_MB) * 1024 ** 2)
+        self.hits = 0
+        self.misses = 0
+        self._code_hashes = {}
+        self._size = None      # running estimate of the store size, from one walk per process
+        os.makedirs(os.path.join(self.root, "files"), exist_ok=True)
+        os.makedirs(os.path.join(self.root, "entries"), exist_ok=True)
+
+    # ---------- Keys ----------
+    def file_hash(self, path):
+        # Content hash of an input file, remembered per (path, size, mtime) so an
+        # unchanged multi-GB dump is read once, not on every lookup
+        st = os.stat(path)
+        stamp = f"{os.path.abspath(path)}\0{st.st_size}\0{st.st_mtime_ns}".encode()
+        memo = os.path.join(self.root, "files", hashlib.sha256(stamp).hexdigest())
+        try:
+            with open(memo) as f:
+                digest = f.read().strip()
+            os.utime(memo)
+            if len(digest) == 64:
+                return digest
+        except OSError:
+            pass
+        digest = _sha256_file(path)
+        _atomic_write(memo, digest.encode())
+        return digest
+
+    def code_hash(self, modules):
+        key = tuple(modules)
+        if key not in self._code_hashes:
+            h = hashlib.sha256()
+            for name in modules:
+                # Names are modules of this package; find_spec also resolves one running as __main__
+                spec = importlib.util.find_spec(f"{__package__}.{name}")
+                source = spec.origin if spec else None
+                h.update(name.encode())
+                if source and os.path.exists(source):
+                    h.update(_sha256_file(source).encode())
+            self._code_hashes[key] = h.hexdigest()
+        return self._code_hashes[key]
+
+    def key(self, name, files, params=None, modules=()):
+        description = {'name': name, 'params': params or {}, 'code': self.code_hash(modules),
+                       'inputs': [self.file_hash(f) for f in files]}
+        return hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode()).hexdigest()
+
+    # ---------- Entries ----------
+    def entry_path(self, key):
+        return os.path.join(self.root, "entries", key[:2], key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        # Returns (True, value) on a hit; touching the entry marks it recently used
+        path = self.entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+        return True, value
+
+    def put(self, key, value):
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        _atomic_write(path, payload)
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += len(payload)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _files(self):
+        listing = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:  # removed by another process meanwhile
+                    continue
+                listing.append((st.st_mtime, st.st_size, path))
+        return listing
+
+    def size(self):
+        return sum(size for _, size, _ in self._files())
+
+    def evict(self, max_bytes=None):
+        # Drop least recently used files (results and file-hash memos) until under the limit
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        listing = sorted(self._files())
+        total = sum(size for _, size, _ in listing)
+        removed = 0
+        for _, size, path in listing:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+    def clear(self):
+        return self.evict(0)
+
+    def stats(self):
+        listing = self._files()
+        entries = [f for f in listing if f[2].endswith(ENTRY_SUFFIX)]
+        return {'root': self.root, 'entries': len(entries), 'size_mb': sum(f[1] for f in listing) / 1024 ** 2,
+                'max_mb': self.max_bytes / 1024 ** 2,
+                'oldest_use': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(min(f[0] for f in entries)))
+                if entries else None}
+
+    def cached(self, name, files, params, compute, modules=()):
+        key = self.key(name, files, params, modules)
+        hit, value = self.get(key)
+        if hit:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+# ==========================
+# Module-level switch used by the scripts and the library functions
+# ==========================
+def enable(root=None, max_mb=None):
+    """Activate the cache for this process (store from $AP_RESULT_CACHE unless given). Returns it or None."""
+    global _active
+    root = root or os.environ.get(ENV_DIR)
+    if root == '0':
+        _active = None
+        return None
+    if max_mb is None and os.environ.get(ENV_MAX_MB):
+        max_mb = float(os.environ[ENV_MAX_MB])
+    _active = ResultCache(root, max_mb)
+    return _active
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def active():
+    return _active
+
+
+def cached(name, files, params, compute, modules=()):
+    # compute() directly unless a cache is active; modules: names whose source is part of the key
+    if _active is None:
+        return compute()
+    return _active.cached(name, files, params, compute, modules)
+
+
+def add_cache_arguments(parser):
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f"Recompute instead of reusing cached results (store: ${ENV_DIR} or {default_cache_dir()})")
+    parser.add_argument('--cache-dir', default=None, help="Result cache location")
+    parser.add_argument('--cache-max-mb', type=float, default=None,
+                        help=f"Result cache size limit, LRU eviction (default ${ENV_MAX_MB} or {DEFAULT_MAX_MB})")
+
+
+def enable_from_args(args):
+    if args.no_cache:
+        disable()
+        return None
+    return enable(args.cache_dir, args.cache_max_mb)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or trim the analysis result cache")
+    parser.add_argument('--cache-dir', default=None)
+    parser.add_argument('--max-mb', type=float, default=None, help="Evict down to this size (default: the limit)")
+    parser.add_argument('--clear', action='store_true', help="Remove every cached result")
+    args = parser.parse_args()
+
+    root = args.cache_dir or os.environ.get(ENV_DIR)
+    cache = ResultCache(root if root != '0' else None)
+    if args.clear:
+        print(f"Removed {cache.clear()} files from {cache.root}")
+    elif args.max_mb is not None:
+        print(f"Removed {cache.evict(int(args.max_mb * 1024 ** 2))} files from {cache.root}")
+    print(json.dumps(cache.stats(), indent=2))
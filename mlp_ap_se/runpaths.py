@@ -0,0 +1,25 @@
+import os
+import re
+
+# ==========================
+# Run parameters read from a run directory path
+# ==========================
+# Temperature and composition of a run come from its path, e.g. runs/Li3OCl0.5Br0.5/600K/
+# or .../T600/ (the layout campaign.py writes). A temperature needs the K suffix or the
+# T prefix, so seed or date directories (1/, 2024/) are not one
+TEMP_PATTERN = re.compile(r'^(?=T|.*K$)(?:T[_-]?)?(\d+(?:\.\d+)?)\s*K?$', re.IGNORECASE)
+COMP_PATTERN = re.compile(r'Li\d*O(?:Cl[\d.]*)?(?:Br[\d.]*)?')
+
+
+def parse_run_path(run_dir):
+    # (temperature, composition) from the innermost matching path components; None if absent
+    temperature, composition = None, None
+    for part in reversed(os.path.normpath(os.path.abspath(run_dir)).split(os.sep)):
+        if temperature is None:
+            m = TEMP_PATTERN.match(part)
+            if m:
+                temperature = float(m.group(1))
+                continue
+        if composition is None and COMP_PATTERN.search(part):
+            composition = COMP_PATTERN.search(part).group(0)
+    return temperature, composition
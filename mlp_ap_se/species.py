@@ -0,0 +1,10 @@
+# ==========================
+# Species data: LAMMPS type IDs used throughout the package
+# ==========================
+# The same order as the DP model type_map and the mass commands of the in.* templates
+TYPE_NAMES = {1: 'Li', 2: 'Cl', 3: 'O', 4: 'Br'}
+TYPE_MASSES = {1: 6.941, 2: 35.45, 3: 16.00, 4: 79.904}
+TYPE_CHARGES = {1: 1.0, 2: -1.0, 3: -2.0, 4: -1.0}   # formal charges (e)
+
+# Element -> LAMMPS type ID
+TYPE_IDS = {name: t for t, name in TYPE_NAMES.items()}
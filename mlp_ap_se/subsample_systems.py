@@ -0,0 +1,197 @@
+import os
+import glob
+import json
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from .audit_systems import load_training_input, periodic_pairs
+
+# ==========================
+# Structural fingerprint of one frame
+# ==========================
+def frame_fingerprint(coord, box, types, n_types, rcut=6.0, n_radial=16, r_angular=3.5, n_angular=12):
+    """Smooth radial and angular histograms of one frame, flattened to a vector.
+
+    Radial part: for every (center type, neighbour type) pair, Gaussians on a
+    grid up to rcut, damped by a cosine cutoff and averaged over the centers.
+    Angular part: for every center type, the distribution of cos(theta) between
+    neighbour pairs within r_angular (the first shell).
+    """
+    center, neighbor, vec = periodic_pairs(coord, box, rcut)
+    r = np.linalg.norm(vec, axis=1)
+    n_center = np.bincount(types, minlength=n_types).astype(float)
+    n_center[n_center == 0] = 1.0
+
+    mu = np.linspace(0.5, rcut, n_radial)
+    sigma = mu[1] - mu[0]
+    weight = 0.5 * (np.cos(np.pi * r / rcut) + 1.0)
+    g = np.exp(-0.5 * ((r[:, None] - mu) / sigma) ** 2) * weight[:, None]
+    pair = types[center] * n_types + types[neighbor]
+    radial = np.zeros((n_types * n_types, n_radial))
+    np.add.at(radial, pair, g)
+    radial = radial.reshape(n_types, n_types, n_radial) / n_center[:, None, None]
+
+    # Padded (n_atoms, max_neighbours) table of first-shell unit vectors
+    close = r < r_angular
+    c, u = center[close], vec[close] / r[close, None]
+    n_atoms = len(types)
+    counts = np.bincount(c, minlength=n_atoms)
+    order = np.argsort(c, kind='stable')
+    slot = np.arange(len(c)) - np.concatenate([[0], np.cumsum(counts)[:-1]])[c[order]]
+    table = np.zeros((n_atoms, max(counts.max(), 1), 3))
+    table[c[order], slot] = u[order]
+    valid = np.arange(table.shape[1]) < counts[:, None]
+    cos = np.einsum('aik,ajk->aij', table, table)
+    mask = valid[:, :, None] & valid[:, None, :] & ~np.eye(table.shape[1], dtype=bool)
+    bins = np.minimum(((cos + 1.0) / 2.0 * n_angular).astype(int), n_angular - 1)
+    a = np.broadcast_to(types[:, None, None], cos.shape)
+    angular = np.bincount((a * n_angular + bins)[mask], minlength=n_types * n_angular).astype(float)
+    angular = angular.reshape(n_types, n_angular) / n_center[:, None]
+
+    return np.concatenate([radial.ravel(), angular.ravel()])
+
+# ==========================
+# Fingerprints of a whole system (runs in a worker process)
+# ==========================
+def read_system_types(system, type_map):
+    # Atom types remapped from the system's type_map.raw onto input.json's type_map
+    types = np.loadtxt(os.path.join(system, "type.raw"), dtype=int, ndmin=1)
+    map_file = os.path.join(system, "type_map.raw")
+    if os.path.exists(map_file):
+        system_map = list(np.loadtxt(map_file, dtype=str, ndmin=1))
+        types = np.array([type_map.index(system_map[t]) for t in types])
+    return types
+
+
+def system_fingerprints(system, type_map, rcut):
+    # Returns (system, [(set name, frame index)], (n_frames, n_features) float32)
+    types = read_system_types(system, type_map)
+    frames, features = [], []
+    for s in sorted(glob.glob(os.path.join(system, "set.*"))):
+        coord = np.load(os.path.join(s, "coord.npy"), mmap_mode='r')
+        box = np.load(os.path.join(s, "box.npy"), mmap_mode='r')
+        for i in range(len(coord)):
+            features.append(frame_fingerprint(coord[i], box[i], types, len(type_map), rcut))
+            frames.append((os.path.basename(s), i))
+    return system, frames, np.array(features, dtype=np.float32)
+
+
+def _system_fingerprints_star(args):
+    return system_fingerprints(*args)
+
+# ==========================
+# Farthest-point sampling
+# ==========================
+def farthest_point_sampling(features, budget, seeds=()):
+    """Indices of `budget` rows of features chosen greedily to be maximally spread.
+
+    Selection starts from seeds (e.g. one frame per system); each step adds the
+    row farthest from everything chosen so far. Near-duplicate frames are
+    never picked while anything more distant remains.
+
+    Cost: one matrix-vector product per pick, O(budget * n * n_features) time
+    in total, with O(n) memory beyond features. Squared distances come from
+    |a|^2 + |b|^2 - 2 a.b with the row norms computed once.
+    """
+    n = len(features)
+    budget = min(budget, n)
+    sq = np.einsum('ij,ij->i', features, features)
+    selected = list(dict.fromkeys(int(s) for s in seeds))[:budget]
+    if not selected:
+        centred = features - features.mean(axis=0)
+        selected = [int(np.argmax(np.einsum('ij,ij->i', centred, centred)))]
+    min_dist = np.full(n, np.inf, dtype=features.dtype)
+    for k in selected:
+        np.minimum(min_dist, sq + sq[k] - 2 * (features @ features[k]), out=min_dist)
+    min_dist[selected] = 0  # rounding must not make a chosen row look distant
+    while len(selected) < budget:
+        k = int(np.argmax(min_dist))
+        selected.append(k)
+        np.minimum(min_dist, sq + sq[k] - 2 * (features @ features[k]), out=min_dist)
+        min_dist[k] = 0
+    return np.array(selected)
+
+# ==========================
+# Writing the pruned systems and the new input.json
+# ==========================
+def write_pruned_system(system, picks, out_dir):
+    # All per-frame arrays of the chosen (set, frame) pairs go into a single set.000
+    os.makedirs(os.path.join(out_dir, "set.000"), exist_ok=True)
+    for name in ("type.raw", "type_map.raw", "nopbc"):
+        if os.path.exists(os.path.join(system, name)):
+            with open(os.path.join(system, name)) as src, open(os.path.join(out_dir, name), "w") as dst:
+                dst.write(src.read())
+    sets = sorted({s for s, _ in picks})
+    arrays = set.intersection(*[{os.path.basename(p) for p in glob.glob(os.path.join(system, s, "*.npy"))}
+                                for s in sets])
+    for array in sorted(arrays):
+        parts = []
+        for s in sets:
+            rows = [i for ss, i in picks if ss == s]
+            parts.append(np.load(os.path.join(system, s, array), mmap_mode='r')[rows])
+        np.save(os.path.join(out_dir, "set.000", array), np.concatenate(parts))
+
+
+def write_pruned_input(input_file, systems, output_input):
+    # Same training input with the training systems replaced. Every path is written relative
+    # to the new file, including the validation systems kept from the original input
+    with open(input_file) as f:
+        config = json.load(f)
+    source = os.path.dirname(os.path.abspath(input_file))
+    base = os.path.dirname(os.path.abspath(output_input))
+    training_data = config['training'].get('training_data', config['training'])
+    training_data['systems'] = [os.path.relpath(s, base) for s in systems]
+    validation_data = config['training'].get('validation_data')
+    if validation_data and validation_data.get('systems'):
+        kept = validation_data['systems']
+        rebased = [os.path.relpath(os.path.join(source, s), base) for s in ([kept] if isinstance(kept, str) else kept)]
+        validation_data['systems'] = rebased[0] if isinstance(kept, str) else rebased
+    with open(output_input, "w") as f:
+        json.dump(config, f, indent=4)
+
+# ==========================
+# Main entry point
+# ==========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fingerprint every training frame and keep a diverse subset")
+    parser.add_argument('input', nargs='?', default='input.json')
+    budget = parser.add_mutually_exclusive_group(required=True)
+    budget.add_argument('--budget', type=int, help="Number of frames to keep")
+    budget.add_argument('--fraction', type=float, help="Fraction of frames to keep")
+    parser.add_argument('--output-dir', default='pruned_systems')
+    parser.add_argument('--output-input', default='input_pruned.json')
+    parser.add_argument('--no-system-seeds', action='store_true',
+                        help="Do not force at least one frame from every system")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    systems, type_map, rcut, _ = load_training_input(args.input)
+    tasks = [(s, type_map, rcut) for s in systems]
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(_system_fingerprints_star, tasks, chunksize=max(1, len(tasks) // 64)))
+
+    owner = np.concatenate([np.full(len(frames), k) for k, (_, frames, _) in enumerate(results)])
+    features = np.concatenate([f for _, _, f in results])
+    scale = features.std(axis=0)
+    features /= np.where(scale > 0, scale, 1.0)  # every histogram bin on an equal footing
+
+    n_keep = args.budget if args.budget is not None else int(round(args.fraction * len(features)))
+    seeds = [] if args.no_system_seeds else np.flatnonzero(np.diff(owner, prepend=-1))
+    selected = np.sort(farthest_point_sampling(features, n_keep, seeds))
+
+    base = os.path.commonpath(systems)
+    offsets = np.concatenate([[0], np.cumsum([len(frames) for _, frames, _ in results])])
+    pruned = []
+    for k, (system, frames, _) in enumerate(results):
+        picks = [frames[i - offsets[k]] for i in selected[owner[selected] == k]]
+        if not picks:
+            continue
+        out_dir = os.path.join(os.path.abspath(args.output_dir), os.path.relpath(system, base))
+        write_pruned_system(system, picks, out_dir)
+        pruned.append(out_dir)
+    write_pruned_input(args.input, pruned, args.output_input)
+
+    print(f"Kept {len(selected)} of {len(features)} frames ({len(selected) / len(features):.1%}) "
+          f"from {len(pruned)} of {len(systems)} systems")
+    print(f"Pruned systems written to {os.path.abspath(args.output_dir)}, training input to {args.output_input}")
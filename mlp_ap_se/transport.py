@@ -0,0 +1,317 @@
+import numpy as np
+
+from .lammps_dump import open_trajectory_cache, increasing_rows
+from .species import TYPE_NAMES, TYPE_MASSES, TYPE_CHARGES
+from .uncertainty import required_length
+from .instrument import stage
+from .result_cache import cached
+
+# Exact SI values (same as scipy.constants, without importing scipy at start-up)
+kB = 1.380649e-23          # J/K
+e_charge = 1.602176634e-19  # C
+A2_PER_FS_TO_CM2_PER_S = 1e-16 / 1e-15
+
+
+# ------------------------ Read POSCAR for volume and Li count ----------------------------
+def read_poscar(poscar_path='POSCAR'):
+    with open(poscar_path, 'r') as f:
+        lines = f.readlines()
+
+    scale = float(lines[1].strip())
+    lattice = np.array([
+        list(map(float, lines[2].split())),
+        list(map(float, lines[3].split())),
+        list(map(float, lines[4].split())),
+    ])
+    lattice *= scale
+
+    volume = abs(np.linalg.det(lattice))  # Supercell volume in Å³
+
+    elements = lines[5].split()
+    numbers = list(map(int, lines[6].split()))
+
+    if 'Li' in elements:
+        li_index = elements.index('Li')
+        li_count = numbers[li_index]
+    else:
+        raise ValueError('Li element not found in POSCAR.')
+
+    return volume, li_count
+
+
+# ------------------------ Unwrapping ----------------------------
+def unwrap_coordinates(coords, box_lengths):
+    """Undo periodic wrapping of (n_frames, n_atoms, 3) coordinates.
+
+    box_lengths is (3,) or (n_frames, 3); frame-to-frame jumps larger than
+    half a box length are taken to be boundary crossings.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    box_lengths = np.asarray(box_lengths, dtype=np.float64)
+    if box_lengths.ndim == 2:
+        box_lengths = box_lengths[1:, None, :]
+    steps = np.diff(coords, axis=0)
+    steps -= box_lengths * np.round(steps / box_lengths)
+    unwrapped = np.empty_like(coords)
+    unwrapped[0] = coords[0]
+    np.cumsum(steps, axis=0, out=unwrapped[1:])
+    unwrapped[1:] += coords[0]
+    return unwrapped
+
+
+def unwrapped_sum(coords, box_lengths, atoms=slice(None), chunk_frames=1000):
+    """Sum over the selected atoms of their unwrapped coordinates, shape (n_frames, 3).
+
+    Equal to unwrap_coordinates(coords[:, atoms], box_lengths).sum(axis=1), but
+    computed frame chunk by frame chunk, so neither the selection nor the
+    unwrapped array is held in memory (coords may be the trajectory memmap).
+    """
+    n_frames = coords.shape[0]
+    box_lengths = np.asarray(box_lengths, dtype=np.float64)
+    total = np.empty((n_frames, 3))
+    total[0] = np.sum(coords[0][atoms], axis=0, dtype=np.float64)
+    for start in range(1, n_frames, chunk_frames):
+        end = min(start + chunk_frames, n_frames)
+        steps = np.diff(np.asarray(coords[start - 1:end][:, atoms], dtype=np.float64), axis=0)
+        box = box_lengths[start:end, None, :] if box_lengths.ndim == 2 else box_lengths
+        steps -= box * np.round(steps / box)
+        total[start:end] = steps.sum(axis=1)
+    return np.cumsum(total, axis=0)
+
+
+# ------------------------ Multi-time-origin MSD via FFT ----------------------------
+def msd_fft(positions, atom_chunk=256):
+    """Multi-origin MSD averaged over atoms, for every lag 0..n_frames-1.
+
+    positions: unwrapped (n_frames, n_atoms, 3). Uses the FFT algorithm
+    MSD(m) = S1(m) - 2 S2(m) (O(N log N) per atom); atoms are processed in
+    chunks so the complex spectrum never exceeds atom_chunk atoms.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    n_frames, n_atoms, _ = positions.shape
+    lag_count = n_frames - np.arange(n_frames)
+
+    # S1 only depends on the atom-summed squared norms, via prefix sums
+    sq = np.einsum('fad,fad->f', positions, positions)
+    prefix = np.concatenate([[0.0], np.cumsum(sq)])
+    m = np.arange(n_frames)
+    s1 = (2 * prefix[-1] - prefix[m] - (prefix[-1] - prefix[n_frames - m])) / lag_count
+
+    # S2: the sum of per-atom autocorrelations is the inverse FFT of the summed power spectrum
+    from scipy.fft import rfft, irfft, next_fast_len
+    nfft = next_fast_len(2 * n_frames)
+    power = np.zeros(nfft // 2 + 1)
+    for start in range(0, n_atoms, atom_chunk):
+        spectrum = rfft(positions[:, start:start + atom_chunk, :], n=nfft, axis=0)
+        power += np.einsum('fad,fad->f', spectrum, spectrum.conj()).real
+    s2 = irfft(power, n=nfft)[:n_frames] / lag_count
+
+    return (s1 - 2 * s2) / n_atoms
+
+
+def collective_msd(positions, charges):
+    """MSD of the charge displacement sum_i q_i r_i (not normalised per atom)."""
+    dipole = np.einsum('fad,a->fd', np.asarray(positions, dtype=np.float64), charges)
+    return msd_fft(dipole[:, None, :])
+
+
+# ------------------------ Diffusive window selection and fitting ----------------------------
+def select_fit_window(lag_time, msd, tol=0.15, max_frac=0.5, smooth_frac=0.02):
+    """Pick [start, end) where MSD ~ t: local slope d ln MSD / d ln t within tol of 1.
+
+    The ballistic/caging region at short lags is skipped and lags beyond
+    max_frac of the run are dropped, where few time origins remain.
+    """
+    n = len(lag_time)
+    end = max(int(n * max_frac), 4)
+    t = lag_time[1:end]
+    y = np.maximum(msd[1:end], np.finfo(float).tiny)
+    beta = np.gradient(np.log(y), np.log(t))
+    width = max(int(n * smooth_frac), 1)
+    beta = np.convolve(beta, np.ones(width) / width, mode='same')
+
+    diffusive = np.flatnonzero(np.abs(beta - 1.0) < tol)
+    start = diffusive[0] + 1 if diffusive.size else int(0.1 * n)
+    if end - start < 3:
+        start = max(end - 3, 1)
+    return start, end
+
+
+def fit_diffusivity(lag_time_fs, msd_A2, window=None, dim=3):
+    """Return (D in cm²/s, slope in Å²/fs, intercept, (start, end))."""
+    if window is None:
+        window = select_fit_window(lag_time_fs, msd_A2)
+    start, end = window
+    slope, intercept = np.polyfit(lag_time_fs[start:end], msd_A2[start:end], 1)
+    D_cm2_s = slope / (2 * dim) * A2_PER_FS_TO_CM2_PER_S
+    return D_cm2_s, slope, intercept, window
+
+
+def nernst_einstein_conductivity(D_cm2_s, n_ions, volume_A3, T, charge=1.0):
+    c_ion_cm3 = n_ions / (volume_A3 * 1e-24)
+    return D_cm2_s * (charge * e_charge) ** 2 * c_ion_cm3 / (kB * T)  # S/cm
+
+
+def collective_conductivity(slope_A2_fs, volume_A3, T, dim=3):
+    # sigma = lim <|sum q_i dr_i|^2> e^2 / (2 dim V kB T t)
+    slope_cm2_s = slope_A2_fs * A2_PER_FS_TO_CM2_PER_S
+    return slope_cm2_s * e_charge ** 2 / (2 * dim * volume_A3 * 1e-24 * kB * T)  # S/cm
+
+
+# ------------------------ Block (time-segment) error bars ----------------------------
+def block_slopes(positions, lag_time_fs, n_blocks=5, charges=None):
+    """Diffusive MSD slope (Å²/fs) fitted independently in n_blocks time segments.
+
+    With charges, the collective MSD of sum_i q_i r_i is used instead of the
+    tracer MSD. The spread of the block slopes gives the standard error.
+    """
+    n_frames = positions.shape[0]
+    block_len = n_frames // n_blocks
+    slopes = np.full(n_blocks, np.nan)
+    if block_len < 8:
+        return slopes
+    for b in range(n_blocks):
+        seg = positions[b * block_len:(b + 1) * block_len]
+        msd = msd_fft(seg) if charges is None else collective_msd(seg, charges)
+        _, slopes[b], _, _ = fit_diffusivity(lag_time_fs[:block_len], msd)
+    return slopes
+
+
+def block_error(value, slopes, n_frames, target_rel_err):
+    # SEM of value from the relative spread of the block slopes, and the number of
+    # frames needed to reach target_rel_err
+    slopes = slopes[np.isfinite(slopes)]
+    if len(slopes) < 2 or np.mean(slopes) == 0:
+        return np.nan, np.nan
+    rel_sem = np.std(slopes, ddof=1) / np.sqrt(len(slopes)) / abs(np.mean(slopes))
+    return abs(value) * rel_sem, required_length(n_frames, 1.0, rel_sem, target_rel_err)
+
+
+# ------------------------ Full trajectory analysis ----------------------------
+def analyze_trajectory(dumpfile, T, timestep_fs=1.0, stride=1, species=None, com_correction=True,
+                       n_blocks=5, target_rel_err=0.05):
+    """Multi-origin tracer, charge and Li-collective MSDs from a dump.
+
+    Returns a dict with lag times (fs), per-species MSD/D/sigma_NE, the
+    charge MSD with the total conductivity, and the Li Haven ratio. Each
+    quantity X comes with X_err from n_blocks time blocks and n_frames_required,
+    the trajectory length for a target_rel_err relative standard error.
+    Reused from the result cache while the dump and the parameters are unchanged.
+    """
+    params = {'T': T, 'timestep_fs': timestep_fs, 'stride': stride, 'species': species,
+              'com_correction': com_correction, 'n_blocks': n_blocks, 'target_rel_err': target_rel_err}
+    return cached("transport.analyze_trajectory", [dumpfile], params,
+                  lambda: _analyze_trajectory(dumpfile, **params), modules=('transport', 'lammps_dump', 'uncertainty'))
+
+
+def _analyze_trajectory(dumpfile, T, timestep_fs, stride, species, com_correction, n_blocks, target_rel_err):
+    with stage("open_cache", files=[dumpfile]) as st:
+        cache = open_trajectory_cache(dumpfile)
+        st['frames'] = len(cache.timesteps)
+    timesteps = cache.timesteps[::stride]
+    box = cache.box_bounds[::stride]
+    box_lengths = box[:, :, 1] - box[:, :, 0]
+    volume_A3 = float(np.mean(np.prod(box_lengths, axis=1)))
+    lag_time_fs = (timesteps - timesteps[0]) * timestep_fs
+
+    present = [t for t in np.unique(cache.types) if t in TYPE_NAMES]
+    species = present if species is None else [t for t in species if t in present]
+
+    # Only the analysed species are unwrapped in full; every type contributes its
+    # summed unwrapped positions to the centre of mass and the charge dipole
+    coords = cache.coords[::stride]
+    n_frames = len(timesteps)
+    with stage("load_unwrap", frames=n_frames) as st:
+        unwrapped = {}
+        mass_sum, dipole = np.zeros((n_frames, 3)), np.zeros((n_frames, 3))
+        total_mass = total_charge = 0.0
+        for t in present:
+            atoms = cache.types == t
+            n_atoms = int(np.count_nonzero(atoms))
+            if t in species:
+                unwrapped[t] = unwrap_coordinates(coords[:, atoms, :], box_lengths)
+                summed = unwrapped[t].sum(axis=1)
+            else:
+                summed = unwrapped_sum(coords, box_lengths, atoms)
+            mass_sum += TYPE_MASSES[t] * summed
+            dipole += TYPE_CHARGES[t] * summed
+            total_mass += TYPE_MASSES[t] * n_atoms
+            total_charge += TYPE_CHARGES[t] * n_atoms
+        st['input_bytes'] = n_frames * int(np.count_nonzero(np.isin(cache.types, present))) * 3 * 4  # float32 pages of the memmap
+
+    if com_correction:
+        com = mass_sum / total_mass
+        for t in unwrapped:
+            unwrapped[t] -= com[:, None, :]
+        dipole -= total_charge * com
+
+    result = {'lag_time_fs': lag_time_fs, 'volume_A3': volume_A3, 'T': T, 'species': {}}
+    with stage("msd_fits", frames=len(timesteps)):
+        for t in species:
+            name = TYPE_NAMES[t]
+            n_ions = unwrapped[t].shape[1]
+            msd = msd_fft(unwrapped[t])
+            D, slope, intercept, window = fit_diffusivity(lag_time_fs, msd)
+            sigma_NE = nernst_einstein_conductivity(D, n_ions, volume_A3, T, abs(TYPE_CHARGES[t]))
+            D_err, n_required = block_error(D, block_slopes(unwrapped[t], lag_time_fs, n_blocks),
+                                            len(lag_time_fs), target_rel_err)
+            result['species'][name] = {
+                'n_ions': n_ions, 'msd': msd, 'D_cm2_s': D, 'fit': (slope, intercept), 'window': window,
+                'sigma_NE_S_cm': sigma_NE, 'D_err': D_err,
+                'sigma_NE_err': sigma_NE * D_err / D if D else np.nan, 'n_frames_required': n_required,
+            }
+
+        # Charge MSD over all ions -> total ionic conductivity; the MSD of the dipole
+        # sum_i q_i r_i is the tracer MSD of a single 'atom' at the dipole
+        charge_msd = msd_fft(dipole[:, None, :])
+        _, slope, intercept, window = fit_diffusivity(lag_time_fs, charge_msd)
+        sigma = collective_conductivity(slope, volume_A3, T)
+        sigma_err, n_required = block_error(sigma, block_slopes(dipole[:, None, :], lag_time_fs, n_blocks),
+                                            len(lag_time_fs), target_rel_err)
+        result['charge'] = {'msd': charge_msd, 'fit': (slope, intercept), 'window': window,
+                            'sigma_S_cm': sigma, 'sigma_err': sigma_err, 'n_frames_required': n_required}
+
+        # Li-only collective MSD -> D_sigma and Haven ratio H_R = D* / D_sigma
+        if 1 in unwrapped and 'Li' in result['species']:
+            li = unwrapped[1]
+            li_msd = collective_msd(li, np.ones(li.shape[1]))
+            _, slope, intercept, window = fit_diffusivity(lag_time_fs, li_msd)
+            D_sigma = slope / 6 * A2_PER_FS_TO_CM2_PER_S / li.shape[1]
+            result['li_collective'] = {
+                'msd': li_msd, 'fit': (slope, intercept), 'window': window, 'D_sigma_cm2_s': D_sigma,
+                'sigma_S_cm': collective_conductivity(slope, volume_A3, T),
+                'haven_ratio': result['species']['Li']['D_cm2_s'] / D_sigma if D_sigma > 0 else np.nan,
+            }
+    return result
+
+
+# ------------------------ Single-origin MSD from msd_Li.out ----------------------------
+def load_msd_file(msd_file='msd_Li.out', timestep_fs=1.0):
+    # Returns lag time (fs, first row = 0) and MSD (Å²) from fix ave/time output
+    data = np.loadtxt(msd_file, comments='#', ndmin=2)
+    data = data[increasing_rows(data[:, 0], msd_file)]
+    return (data[:, 0] - data[0, 0]) * timestep_fs, data[:, 1]
+
+
+def analyze_msd_file(msd_file='msd_Li.out', poscar='POSCAR', T=600.0, timestep_fs=1.0):
+    """Linear fit of the whole msd_Li.out and Nernst–Einstein conductivity.
+
+    The fit error is the single-origin standard error, which underestimates
+    the true uncertainty; analyze_trajectory gives proper error bars.
+    """
+    return cached("transport.analyze_msd_file", [msd_file, poscar], {'T': T, 'timestep_fs': timestep_fs},
+                  lambda: _analyze_msd_file(msd_file, poscar, T, timestep_fs), modules=('transport',))
+
+
+def _analyze_msd_file(msd_file, poscar, T, timestep_fs):
+    volume_A3, n_li = read_poscar(poscar)
+    with stage("load_msd_file", files=[msd_file]) as st:
+        lag_time_fs, msd_A2 = load_msd_file(msd_file, timestep_fs)
+        st['rows'] = len(lag_time_fs)
+    fit, cov = np.polyfit(lag_time_fs, msd_A2, 1, cov=True)
+    D_cm2_s = fit[0] / 6 * A2_PER_FS_TO_CM2_PER_S
+    D_err = np.sqrt(cov[0, 0]) / 6 * A2_PER_FS_TO_CM2_PER_S
+    sigma = nernst_einstein_conductivity(D_cm2_s, n_li, volume_A3, T)
+    return {'T': T, 'volume_A3': volume_A3, 'n_Li': n_li, 'c_ion_cm3': n_li / (volume_A3 * 1e-24),
+            'lag_time_fs': lag_time_fs, 'msd_A2': msd_A2, 'fit': fit,
+            'D_cm2_s': D_cm2_s, 'D_err': D_err, 'sigma_S_cm': sigma, 'sigma_err': sigma * D_err / D_cm2_s}
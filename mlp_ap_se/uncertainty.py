@@ -0,0 +1,155 @@
+import numpy as np
+
+# ==========================
+# Error estimates for correlated MD time series, shared by the MSD, NEMD and
+# thermal-expansion analyses. Everything is batched in NumPy: bootstrap
+# replicas are drawn as one (n_boot, n) index array, never in a Python loop.
+# ==========================
+
+
+# ------------------------ Flyvbjerg–Petersen block averaging ----------------------------
+def blocking_levels(x, min_blocks=4):
+    """Standard error of the mean at every blocking level.
+
+    Returns (block_sizes, sem, sem_err); consecutive pairs are averaged at each
+    level until fewer than min_blocks blocks remain.
+    """
+    x = np.asarray(x, dtype=float)
+    sizes, sems, errs = [], [], []
+    size = 1
+    while len(x) >= min_blocks:
+        n = len(x)
+        var = np.var(x, ddof=1) / n
+        sems.append(np.sqrt(var))
+        errs.append(np.sqrt(var) / np.sqrt(2 * (n - 1)))
+        sizes.append(size)
+        x = 0.5 * (x[:n - n % 2:2] + x[1:n - n % 2:2])
+        size *= 2
+    return np.array(sizes), np.array(sems), np.array(errs)
+
+
+def block_sem(x, min_blocks=4):
+    """Plateau value of the blocking SEM (first level consistent with all later ones)."""
+    sizes, sems, errs = blocking_levels(x, min_blocks)
+    if len(sems) == 0:
+        return np.nan
+    for i in range(len(sems)):
+        if np.all(np.abs(sems[i:] - sems[i]) <= errs[i:] + errs[i]):
+            return sems[i]
+    return sems.max()
+
+
+# ------------------------ Statistical inefficiency ----------------------------
+def autocorrelation(x):
+    """Normalised autocorrelation function C(t) via FFT (C(0) = 1)."""
+    from scipy.fft import rfft, irfft, next_fast_len
+    x = np.asarray(x, dtype=float) - np.mean(x)
+    n = len(x)
+    nfft = next_fast_len(2 * n)
+    f = rfft(x, n=nfft)
+    acf = irfft(f * f.conj(), n=nfft)[:n] / (n - np.arange(n))
+    return acf / acf[0] if acf[0] > 0 else acf
+
+
+def statistical_inefficiency(x):
+    """g = 1 + 2 sum_t (1 - t/N) C(t), summed up to the first zero crossing of C."""
+    n = len(x)
+    if n < 3:
+        return 1.0
+    acf = autocorrelation(x)
+    t = np.arange(1, n)
+    crossing = np.flatnonzero(acf[1:] <= 0)
+    cut = crossing[0] if crossing.size else n - 1
+    g = 1.0 + 2.0 * np.sum((1.0 - t[:cut] / n) * acf[1:cut + 1])
+    return max(g, 1.0)
+
+
+def effective_samples(x):
+    return len(x) / statistical_inefficiency(x)
+
+
+# ------------------------ Equilibration / steady-state detection ----------------------------
+def detect_equilibration(x, n_candidates=100, min_remaining=0.2):
+    """Index t0 that maximises the effective samples (N - t0) / g(t0) of x[t0:].
+
+    Discarding the transient lowers g; discarding production data lowers N,
+    so the maximum marks the start of the stationary region. At most
+    n_candidates start points are tried and at least min_remaining of the
+    series is kept. Returns (t0, g, n_eff).
+    """
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    if n < 10:
+        return 0, statistical_inefficiency(x), float(n)
+    last = max(int(n * (1.0 - min_remaining)), 1)
+    candidates = np.unique(np.linspace(0, last, min(n_candidates, last + 1)).astype(int))
+    g = np.array([statistical_inefficiency(x[t0:]) for t0 in candidates])
+    n_eff = (n - candidates) / g
+    best = int(np.argmax(n_eff))
+    return int(candidates[best]), float(g[best]), float(n_eff[best])
+
+
+# ------------------------ Bootstrap ----------------------------
+def bootstrap_indices(n, n_boot=1000, block_size=1, rng=None):
+    """(n_boot, n) resampling indices; block_size > 1 gives a moving-block bootstrap."""
+    rng = np.random.default_rng(rng)
+    block_size = int(max(1, min(block_size, n)))
+    n_blocks = int(np.ceil(n / block_size))
+    starts = rng.integers(0, n - block_size + 1, size=(n_boot, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block_size)).reshape(n_boot, -1)
+    return idx[:, :n]
+
+
+def bootstrap_ci(x, statistic=np.mean, n_boot=1000, ci=0.95, block_size=None, rng=None):
+    """Return (estimate, std, (low, high)) of statistic(x).
+
+    statistic must accept an axis keyword (np.mean, np.median, ...). The block
+    size defaults to the statistical inefficiency so correlated samples are
+    resampled together.
+    """
+    x = np.asarray(x, dtype=float)
+    if block_size is None:
+        block_size = int(np.ceil(statistical_inefficiency(x)))
+    reps = statistic(x[bootstrap_indices(len(x), n_boot, block_size, rng)], axis=1)
+    alpha = (1.0 - ci) / 2
+    low, high = np.quantile(reps, [alpha, 1 - alpha])
+    return statistic(x), np.std(reps, ddof=1), (low, high)
+
+
+def batched_slope(x, Y):
+    """Least-squares slopes of every row of Y (n_rep, n) against x (n,) or (n_rep, n)."""
+    x = np.broadcast_to(np.asarray(x, dtype=float), np.shape(Y))
+    xm = x - x.mean(axis=1, keepdims=True)
+    ym = Y - Y.mean(axis=1, keepdims=True)
+    return np.sum(xm * ym, axis=1) / np.sum(xm * xm, axis=1)
+
+
+def bootstrap_slope(x, y, n_boot=1000, ci=0.95, block_size=1, rng=None):
+    """Pairs (block) bootstrap of a linear-fit slope; returns (slope, std, (low, high))."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    idx = bootstrap_indices(len(x), n_boot, block_size, rng)
+    reps = batched_slope(x[idx], y[idx])
+    reps = reps[np.isfinite(reps)]
+    alpha = (1.0 - ci) / 2
+    low, high = np.quantile(reps, [alpha, 1 - alpha])
+    return batched_slope(x, y[None, :])[0], np.std(reps, ddof=1), (low, high)
+
+
+# ------------------------ Run-length planning ----------------------------
+def required_length(n_samples, mean, sem, target_rel_err):
+    """Samples needed for sem/|mean| <= target_rel_err, using sem ~ 1/sqrt(N)."""
+    if not np.isfinite(sem) or mean == 0:
+        return np.nan
+    rel = sem / abs(mean)
+    return int(np.ceil(n_samples * (rel / target_rel_err) ** 2))
+
+
+def summarize(x, target_rel_err=0.01):
+    """Mean, blocking SEM, g, N_eff and the run length needed for target_rel_err."""
+    x = np.asarray(x, dtype=float)
+    mean = float(np.mean(x))
+    sem = float(block_sem(x))
+    return {'mean': mean, 'sem': sem, 'g': statistical_inefficiency(x),
+            'n_samples': len(x), 'n_eff': effective_samples(x),
+            'n_required': required_length(len(x), mean, sem, target_rel_err)}
@@ -0,0 +1,228 @@
+import os
+import argparse
+import numpy as np
+from scipy.spatial import cKDTree
+from concurrent.futures import ProcessPoolExecutor
+
+from .species import TYPE_NAMES, TYPE_MASSES, TYPE_CHARGES, TYPE_IDS
+
+# Room-temperature lattice constants (Å) of the end members; Li3OCl1-xBrx follows Vegard's law
+LATTICE_CL = 3.91
+LATTICE_BR = 4.02
+
+# ==========================
+# LAMMPS data file written directly from symbols / positions / cell
+# ==========================
+def lammps_cell(cell):
+    # LAMMPS restricted triclinic cell (a along x, b in the xy plane):
+    # returns (lx, ly, lz, xy, xz, yz) and the matching lower-triangular cell
+    a, b, c = np.asarray(cell, dtype=float)
+    lx = np.linalg.norm(a)
+    xy = b @ a / lx
+    ly = np.sqrt(b @ b - xy ** 2)
+    xz = c @ a / lx
+    yz = (b @ c - xy * xz) / ly
+    lz = np.sqrt(c @ c - xz ** 2 - yz ** 2)
+    return (lx, ly, lz, xy, xz, yz), np.array([[lx, 0, 0], [xy, ly, 0], [xz, yz, lz]])
+
+
+def format_lammps_data(symbols, positions, cell, comment="Li3OCl1-xBrx (Li=1, Cl=2, O=3, Br=4)", n_types=None):
+    # Type IDs come from TYPE_IDS, so an absent species keeps its slot (Li3OBr: types 1, 3, 4).
+    # The declared type count is the highest type present unless n_types asks for more
+    # (the in.* templates set the mass of all four types, so they need n_types=4)
+    (lx, ly, lz, xy, xz, yz), lmp_cell = lammps_cell(cell)
+    frac = np.linalg.solve(np.asarray(cell, dtype=float).T, np.asarray(positions, dtype=float).T).T
+    frac = np.mod(frac, 1.0)
+    xyz = frac @ lmp_cell
+    types = np.array([TYPE_IDS[s] for s in symbols])
+    n_types = max(int(types.max()), n_types or 0)
+
+    lines = [comment, "", f"{len(types)} atoms", f"{n_types} atom types", "",
+             f"0.0 {lx:.10f} xlo xhi", f"0.0 {ly:.10f} ylo yhi", f"0.0 {lz:.10f} zlo zhi"]
+    if max(abs(xy), abs(xz), abs(yz)) > 1e-8:
+        lines.append(f"{xy:.10f} {xz:.10f} {yz:.10f} xy xz yz")
+    lines += ["", "Masses", ""]
+    lines += [f"{t} {TYPE_MASSES[t]}  # {TYPE_NAMES[t]}" for t in range(1, n_types + 1)]
+    lines += ["", "Atoms # atomic", ""]
+    body = np.column_stack([np.arange(1, len(types) + 1), types, xyz])
+    lines += [f"{int(i)} {int(t)} {x:.10f} {y:.10f} {z:.10f}" for i, t, x, y, z in body]
+    return "\n".join(lines) + "\n"
+
+
+def write_lammps_data(filename, symbols, positions, cell, comment="Li3OCl1-xBrx (Li=1, Cl=2, O=3, Br=4)",
+                      n_types=None):
+    with open(filename, "w") as f:
+        f.write(format_lammps_data(symbols, positions, cell, comment, n_types))
+
+# ==========================
+# POSCAR conversion (single file or a batch in a process pool)
+# ==========================
+def default_output(poscar):
+    # dir/POSCAR -> dir/lammps.data, name.vasp -> name.data
+    base = os.path.basename(poscar)
+    if base.upper() in ("POSCAR", "CONTCAR"):
+        return os.path.join(os.path.dirname(poscar), "lammps.data")
+    return os.path.splitext(poscar)[0] + ".data"
+
+
+def convert(poscar, output=None, n_types=None):
+    from ase.io import read
+
+    atoms = read(poscar, format='vasp')
+    output = output or default_output(poscar)
+    write_lammps_data(output, atoms.get_chemical_symbols(), atoms.get_positions(), atoms.get_cell(),
+                      f"Converted from {poscar} (Li=1, Cl=2, O=3, Br=4)", n_types)
+    return output
+
+
+def convert_batch(poscars, workers=None, n_types=None):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(convert, poscars, [None] * len(poscars), [n_types] * len(poscars),
+                             chunksize=max(1, len(poscars) // 64)))
+
+# ==========================
+# Li3OCl1-xBrx supercells with substitution, vacancies and interstitials
+# ==========================
+def antiperovskite_supercell(reps=(3, 3, 3), br_fraction=0.0, lattice=None, biaxial=1.0):
+    # Cubic antiperovskite: O at the body centre, Cl/Br at the corner, Li at the face
+    # centres. biaxial scales x and y (in-plane strain) as in the training systems
+    if lattice is None:
+        lattice = (1 - br_fraction) * LATTICE_CL + br_fraction * LATTICE_BR
+    basis = np.array([[0.5, 0.5, 0.5], [0.0, 0.0, 0.0], [0.5, 0.5, 0.0], [0.5, 0.0, 0.5], [0.0, 0.5, 0.5]])
+    symbols = np.array(['O', 'Cl', 'Li', 'Li', 'Li'])
+    shifts = np.stack(np.meshgrid(*[np.arange(n) for n in reps], indexing='ij'), -1).reshape(-1, 1, 3)
+    frac = ((basis[None] + shifts) / np.array(reps)).reshape(-1, 3)
+    cell = np.diag(np.array(reps) * lattice * np.array([biaxial, biaxial, 1.0]))
+    return np.tile(symbols, len(shifts)), frac @ cell, cell
+
+
+def substitute(symbols, old, new, count, rng):
+    # Replace `count` randomly chosen `old` atoms by `new`
+    symbols = symbols.copy()
+    sites = np.flatnonzero(symbols == old)
+    symbols[rng.choice(sites, size=count, replace=False)] = new
+    return symbols
+
+
+def remove_random(symbols, positions, element, count, rng):
+    sites = rng.choice(np.flatnonzero(symbols == element), size=count, replace=False)
+    keep = np.setdiff1d(np.arange(len(symbols)), sites)
+    return symbols[keep], positions[keep]
+
+
+def add_interstitials(symbols, positions, cell, count, element='Li', grid=8, rng=None):
+    # Each new atom goes to the grid point farthest from all atoms (largest empty
+    # sphere), ties broken at random. The grid and the periodic distances assume an
+    # orthorhombic cell, as generated here; sheared cells are rejected
+    cell = np.asarray(cell, dtype=float)
+    if np.any(np.abs(cell - np.diag(np.diag(cell))) > 1e-8):
+        raise ValueError("Interstitials can only be placed in an orthorhombic cell")
+    rng = np.random.default_rng(rng)
+    length = np.diag(cell)
+    n = np.maximum((grid * length / length.min()).astype(int), 1)
+    points = np.stack(np.meshgrid(*[np.arange(k) / k for k in n], indexing='ij'), -1).reshape(-1, 3) * length
+    for _ in range(count):
+        dist, _ = cKDTree(np.mod(positions, length), boxsize=length).query(points)
+        best = np.flatnonzero(dist > dist.max() - 1e-6)
+        positions = np.vstack([positions, points[rng.choice(best)]])
+        symbols = np.append(symbols, element)
+    return symbols, positions
+
+
+def generate_structure(reps=(3, 3, 3), br_fraction=0.0, li_vacancies=0, schottky=False,
+                       li_interstitials=0, lattice=None, biaxial=1.0, seed=None):
+    """Li3OCl1-xBrx supercell with Br on a random br_fraction of the halide sites.
+
+    li_vacancies Li are removed at random; with schottky an equal number of
+    halide ions is removed too (Li-Cl Schottky pairs). li_interstitials Li
+    are added in the largest voids; with as many Li vacancies (no schottky)
+    they form Frenkel pairs. The cell must stay neutral in formal charges
+    (TYPE_CHARGES): any other defect combination raises ValueError.
+    """
+    rng = np.random.default_rng(seed)
+    symbols, positions, cell = antiperovskite_supercell(reps, br_fraction, lattice, biaxial)
+    n_halide = int(np.sum(symbols == 'Cl'))
+    symbols = substitute(symbols, 'Cl', 'Br', int(round(br_fraction * n_halide)), rng)
+    if li_vacancies:
+        symbols, positions = remove_random(symbols, positions, 'Li', li_vacancies, rng)
+        if schottky:
+            halide = 'Cl' if np.any(symbols == 'Cl') else 'Br'
+            symbols, positions = remove_random(symbols, positions, halide, li_vacancies, rng)
+    if li_interstitials:
+        symbols, positions = add_interstitials(symbols, positions, cell, li_interstitials, rng=rng)
+    net_charge = sum(TYPE_CHARGES[TYPE_IDS[s]] for s in symbols)
+    if abs(net_charge) > 1e-8:
+        raise ValueError(f"Defects leave a net charge of {net_charge:+g} e: use schottky with Li vacancies, "
+                         f"or as many Li vacancies as interstitials (Frenkel pairs)")
+    return symbols, positions, cell
+
+
+def composition_name(br_fraction):
+    # Same naming as the training systems: Li3OCl, Li3OCl0.75Br0.25, ..., Li3OBr
+    if br_fraction == 0:
+        return "Li3OCl"
+    if br_fraction == 1:
+        return "Li3OBr"
+    return f"Li3OCl{1 - br_fraction:g}Br{br_fraction:g}"
+
+
+def _generate_one(task):
+    output, kwargs, n_types = task
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    symbols, positions, cell = generate_structure(**kwargs)
+    write_lammps_data(output, symbols, positions, cell,
+                      f"{composition_name(kwargs['br_fraction'])} {' '.join(map(str, kwargs['reps']))} supercell "
+                      f"(Li=1, Cl=2, O=3, Br=4)", n_types)
+    return output
+
+# ==========================
+# Main entry point
+# ==========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="POSCAR -> LAMMPS data conversion and Li3OCl1-xBrx supercell generation")
+    parser.set_defaults(poscars=['POSCAR'], output=None, workers=None, n_types=None)
+    N_TYPES_HELP = "Atom types to declare (default: the highest type ID present; the in.* templates need 4)"
+    sub = parser.add_subparsers(dest='command')
+
+    p = sub.add_parser('convert', help="Convert POSCAR files (default: ./POSCAR -> ./lammps.data)")
+    p.add_argument('poscars', nargs='*', default=['POSCAR'])
+    p.add_argument('-o', '--output', default=None, help="Output file (single POSCAR only)")
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('--n-types', type=int, default=None, help=N_TYPES_HELP)
+
+    g = sub.add_parser('generate', help="Build doped/defective supercells, one directory per composition")
+    g.add_argument('--br', type=float, nargs='+', default=[0.0], help="Br fraction(s) x of the halide sites")
+    g.add_argument('--reps', type=int, nargs=3, default=[3, 3, 3])
+    g.add_argument('--lattice', type=float, default=None, help="Lattice constant (Å); default Vegard's law")
+    g.add_argument('--biaxial', type=float, nargs='+', default=[1.0], help="In-plane strain factor(s)")
+    g.add_argument('--li-vacancies', type=int, default=0)
+    g.add_argument('--schottky', action='store_true', help="Remove one halide per Li vacancy")
+    g.add_argument('--li-interstitials', type=int, default=0,
+                   help="Li in the largest voids; needs as many --li-vacancies (Frenkel pairs) to stay neutral")
+    g.add_argument('--seeds', type=int, default=1, help="Random configurations per composition")
+    g.add_argument('--output-dir', default='structures')
+    g.add_argument('--workers', type=int, default=None)
+    g.add_argument('--n-types', type=int, default=None, help=N_TYPES_HELP)
+    args = parser.parse_args()
+
+    if args.command != 'generate':
+        if args.output and len(args.poscars) == 1:
+            outputs = [convert(args.poscars[0], args.output, args.n_types)]
+        else:
+            outputs = convert_batch(args.poscars, args.workers, args.n_types)
+        print(f"Converted {len(outputs)} structure(s): {', '.join(outputs[:5])}{' ...' if len(outputs) > 5 else ''}")
+    else:
+        tasks = []
+        for x in args.br:
+            for strain in args.biaxial:
+                for seed in range(args.seeds):
+                    folder = os.path.join(args.output_dir, composition_name(x), f"biaxial_{strain:g}")
+                    if args.seeds > 1:
+                        folder = os.path.join(folder, f"seed_{seed}")
+                    kwargs = dict(reps=tuple(args.reps), br_fraction=x, li_vacancies=args.li_vacancies,
+                                  schottky=args.schottky, li_interstitials=args.li_interstitials,
+                                  lattice=args.lattice, biaxial=strain, seed=seed)
+                    tasks.append((os.path.join(folder, "lammps.data"), kwargs, args.n_types))
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            outputs = list(pool.map(_generate_one, tasks))
+        print(f"Generated {len(outputs)} structure(s) under {os.path.abspath(args.output_dir)}")
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mlp_ap_se import analyze_nemd
+
+
+def synthetic_lengths(k_bulk=2.0, c=30.0, lengths=(50.0, 100.0, 200.0, 400.0)):
+    # 1/k = 1/k_bulk + c/L, with phonon-boundary scattering c in m·K/W·Å
+    length_x = np.array(lengths)
+    return length_x, 1.0 / (1.0 / k_bulk + c / length_x)
+
+
+def test_fit_size_extrapolation_recovers_exact_bulk_value():
+    length_x, k = synthetic_lengths()
+    fit = analyze_nemd.fit_size_extrapolation(length_x, k, 0.01 * k)
+    assert fit['k_bulk'] == pytest.approx(2.0, rel=1e-10)
+    assert fit['slope'] == pytest.approx(30.0, rel=1e-10)
+    assert fit['chi2_red'] == pytest.approx(0.0, abs=1e-12)
+    assert fit['n_runs'] == 4
+
+
+def test_fit_size_extrapolation_error_bar_from_noisy_seeds():
+    rng = np.random.default_rng(3)
+    length_x, k = synthetic_lengths()
+    fits = []
+    for _ in range(400):
+        noisy = k * (1 + 0.02 * rng.standard_normal(k.size))
+        fits.append(analyze_nemd.fit_size_extrapolation(length_x, noisy, 0.02 * noisy))
+    k_bulk = np.array([f['k_bulk'] for f in fits])
+    assert k_bulk.mean() == pytest.approx(2.0, rel=0.02)
+    # Quoted error matches the scatter of the estimate (chi² scaling only inflates it)
+    assert np.median([f['k_bulk_err'] for f in fits]) == pytest.approx(k_bulk.std(), rel=0.35)
+
+
+def test_fit_size_extrapolation_needs_two_lengths():
+    fit = analyze_nemd.fit_size_extrapolation([100.0, 100.0, np.nan], [1.5, 1.6, 1.7], [0.1, 0.1, 0.1])
+    assert np.isnan(fit['k_bulk']) and np.isnan(fit['k_bulk_err'])
+    assert fit['n_runs'] == 2
+
+
+def test_tables_of_failed_ensemble_are_empty():
+    # Every run failed: only run_dir and error columns
+    runs_df = pd.DataFrame({'run_dir': ['a', 'b'], 'error': ['boom', 'boom']})
+    lengths_df = analyze_nemd.length_table(runs_df)
+    assert lengths_df.empty and list(lengths_df.columns) == analyze_nemd.LENGTH_COLUMNS
+    fits_df = analyze_nemd.extrapolation_table(lengths_df)
+    assert fits_df.empty and list(fits_df.columns) == analyze_nemd.FIT_COLUMNS
+
+
+def test_length_table_averages_seeds():
+    length_x, k = synthetic_lengths(lengths=(50.0, 100.0))
+    runs_df = pd.DataFrame({'composition': 'Li3OCl', 'T': 600, 'replicate_x': [1, 1, 2, 2],
+                            'length_x': np.repeat(length_x, 2), 'k': np.repeat(k, 2) + [-0.1, 0.1, -0.1, 0.1],
+                            'k_err': 0.05})
+    table = analyze_nemd.length_table(runs_df)
+    np.testing.assert_allclose(table['k_mean'], k)
+    np.testing.assert_allclose(table['k_sem'], np.std([-0.1, 0.1], ddof=1) / np.sqrt(2))
+    assert table['n_seeds'].tolist() == [2, 2]
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from mlp_ap_se.arrhenius import fit_arrhenius, analyze_runs, arrhenius_table, RUN_COLUMNS, kB_eV
+from mlp_ap_se.runpaths import parse_run_path
+
+
+def arrhenius_sigma(T, Ea=0.35, A=5e4):
+    # sigma T = A exp(-Ea / kB T)
+    return A * np.exp(-Ea / (kB_eV * T)) / T
+
+
+def test_fit_arrhenius_recovers_activation_energy():
+    T = np.array([500.0, 600.0, 700.0, 800.0, 1000.0])
+    Ea, Ea_err, sigma_300 = fit_arrhenius(T, arrhenius_sigma(T))
+    assert Ea == pytest.approx(0.35, rel=1e-9)
+    assert Ea_err == pytest.approx(0.0, abs=1e-9)
+    assert sigma_300 == pytest.approx(arrhenius_sigma(300.0), rel=1e-9)
+
+
+def test_fit_arrhenius_with_noise_has_an_error_bar():
+    rng = np.random.default_rng(0)
+    T = np.linspace(500.0, 1000.0, 6)
+    Ea, Ea_err, _ = fit_arrhenius(T, arrhenius_sigma(T) * np.exp(rng.normal(scale=0.05, size=T.size)))
+    assert abs(Ea - 0.35) < 4 * Ea_err
+    assert 0 < Ea_err < 0.05
+
+
+def test_fit_arrhenius_skips_unusable_points():
+    T = np.array([600.0, 800.0, 900.0])
+    Ea, Ea_err, _ = fit_arrhenius(T, [arrhenius_sigma(600.0), np.nan, arrhenius_sigma(900.0)])
+    assert Ea == pytest.approx(0.35) and np.isnan(Ea_err)  # two points: no error estimate
+    assert np.isnan(fit_arrhenius([600.0], [1e-3])[0])
+
+
+def test_arrhenius_table_per_composition():
+    import pandas as pd
+    T = np.array([600.0, 800.0, 1000.0])
+    sigma = np.concatenate([arrhenius_sigma(T, 0.3), arrhenius_sigma(T, 0.4)])
+    runs = pd.DataFrame({'composition': ['Li3OCl'] * 3 + ['Li3OBr'] * 3, 'T': np.tile(T, 2),
+                         'sigma_S_cm': sigma, 'D_cm2_s': sigma * np.tile(T, 2)})
+    table = arrhenius_table(runs).set_index('composition')
+    assert table.loc['Li3OCl', 'Ea_eV'] == pytest.approx(0.3)
+    assert table.loc['Li3OBr', 'Ea_eV'] == pytest.approx(0.4)
+
+
+def test_analyze_runs_without_runs():
+    runs = analyze_runs([])
+    assert runs.empty and list(runs.columns) == RUN_COLUMNS
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("runs/Li3OCl0.5Br0.5/600K", (600.0, "Li3OCl0.5Br0.5")),
+    ("runs/Li3OCl/T800/seed_1", (800.0, "Li3OCl")),
+    ("runs/Li3OBr/700.5K/2", (700.5, "Li3OBr")),
+    ("runs/Li3OCl/2024/1", (None, "Li3OCl")),
+])
+def test_parse_run_path(path, expected):
+    assert parse_run_path(path) == expected
@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pytest
+
+from mlp_ap_se import campaign
+from mlp_ap_se.lammps_dump import iter_dump_frames
+
+
+def template(kind):
+    with open(os.path.join(campaign.TEMPLATE_DIR, campaign.KINDS[kind])) as f:
+        return f.read()
+
+
+def commands(text):
+    # (command, tokens) of every active (uncommented) logical line
+    found = []
+    for line in campaign.logical_lines(text):
+        tokens = line.split('#')[0].split()
+        if tokens:
+            found.append((tokens[0], tokens))
+    return found
+
+
+def test_render_input_sets_parameters_and_model():
+    text = campaign.render_input(template('ionic'), {'T': 800}, model="/models/graph.pb")
+    assert "variable        T index 800" in text
+    assert ('pair_style', ['pair_style', 'deepmd', '/models/graph.pb']) in commands(text)
+    assert "read_restart" not in text
+
+
+def test_resumed_greenkubo_input_does_not_rebuild_the_cell():
+    # Checkpoint in production: NPT (100000) and NVT (100000) are done
+    text = campaign.render_input(template('greenkubo'), {'T': 600}, restart=(300000, "restart.300000.bin"))
+    cmds = commands(text)
+    names = [c for c, _ in cmds]
+    assert names.index('read_restart') < names.index('run')
+    assert 'read_data' not in names and 'replicate' not in names
+    assert not any(c == 'velocity' and 'create' in tokens for c, tokens in cmds)
+    runs = [tokens for c, tokens in cmds if c == 'run']
+    assert runs == [['run', '1200000', 'upto']]
+    assert "# replicate" in text  # kept as a comment, not silently dropped
+    fixes = [tokens for c, tokens in cmds if c == 'fix' and 'flux_out' in tokens]
+    assert fixes and 'append' in fixes[0] and 'file' not in fixes[0]
+
+
+def test_resumed_ionic_input_appends_to_the_dump():
+    text = campaign.render_input(template('ionic'), {}, restart=(500000, "restart.500000.bin"))
+    cmds = commands(text)
+    assert ['dump_modify', 'traj_all', 'append', 'yes'] in [tokens for _, tokens in cmds]
+    assert [tokens for c, tokens in cmds if c == 'run'] == [['run', '1200000', 'upto']]
+
+
+def test_resumed_conductivity_keeps_the_timestep_of_the_checkpoint():
+    # Checkpoint during the NEMD run: setup up to it is skipped, including both reset_timestep
+    text = campaign.render_input(template('conductivity'), {}, restart=(1000000, "restart.1000000.bin"))
+    names = [c for c, _ in commands(text)]
+    assert 'reset_timestep' not in names and 'replicate' not in names
+    assert [tokens for c, tokens in commands(text) if c == 'run'] == [['run', '2000000', 'upto']]
+
+
+def test_check_resume_input_rejects_replicate_after_read_restart():
+    with pytest.raises(ValueError, match="replicate"):
+        campaign.check_resume_input("read_restart restart.100.bin\nreplicate 3 3 3\nrun 1000 upto\n")
+    with pytest.raises(ValueError, match="change_box"):
+        campaign.check_resume_input("read_restart restart.100.bin\nchange_box all x scale 2\nrun 1000 upto\n")
+    campaign.check_resume_input("read_restart restart.100.bin\nrun 1000 upto\nchange_box all boundary f p p\n")
+
+
+def write_frames(path, steps, mode="w"):
+    with open(path, mode) as f:
+        for step in steps:
+            f.write(f"ITEM: TIMESTEP\n{step}\nITEM: NUMBER OF ATOMS\n1\nITEM: BOX BOUNDS pp pp pp\n"
+                    "0 1\n0 1\n0 1\nITEM: ATOMS id type x y z\n1 1 0.1 0.2 0.3\n")
+
+
+def test_truncate_outputs_cuts_everything_past_the_checkpoint(tmp_path):
+    text = template('ionic')
+    values = campaign.template_defaults(text)
+    steps = range(0, 600, 100)
+    write_frames(tmp_path / "traj_all.lammpstrj", steps)
+    (tmp_path / "msd_Li.out").write_text("# Time-averaged data\n# TimeStep c_msd_Li[4]\n"
+                                         + "".join(f"{s} {s * 0.01}\n" for s in steps))
+    (tmp_path / "rdf.out").write_text("# a\n# b\n# c\n" + "".join(f"{s} 2\n1 0.5 1.0\n2 1.5 1.2\n" for s in steps))
+
+    cut = campaign.truncate_outputs(str(tmp_path), text, values, 300)
+    assert sorted(cut) == ['msd_Li.out', 'rdf.out', 'traj_all.lammpstrj']
+    assert [s for s, *_ in iter_dump_frames(tmp_path / "traj_all.lammpstrj")] == [0, 100, 200, 300]
+    assert np.loadtxt(tmp_path / "msd_Li.out")[:, 0].tolist() == [0, 100, 200, 300]
+    rdf_lines = (tmp_path / "rdf.out").read_text().splitlines()
+    assert len(rdf_lines) == 3 + 4 * 3 and rdf_lines[-3] == "300 2"
+
+    # The resumed run rewrites its restart step: the reader keeps one copy
+    write_frames(tmp_path / "traj_all.lammpstrj", range(300, 600, 100), mode="a")
+    assert [s for s, *_ in iter_dump_frames(tmp_path / "traj_all.lammpstrj")] == list(steps)
+    # Nothing past the checkpoint: nothing to cut
+    assert campaign.truncate_outputs(str(tmp_path), text, values, 500) == []
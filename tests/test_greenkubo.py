@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from mlp_ap_se import greenkubo
+
+
+def write_flux(path, n_rows, header=True):
+    rows = np.column_stack([np.arange(n_rows) * 10, np.ones((n_rows, 3)), np.full(n_rows, 300.0),
+                            np.full(n_rows, 1000.0)])
+    with open(path, "w") as f:
+        if header:
+            f.write("# Time-averaged data for fix flux_out\n# TimeStep c_flux[1] c_flux[2] c_flux[3] v_T v_V\n")
+        np.savetxt(f, rows)
+    return str(path)
+
+
+@pytest.mark.parametrize("n_rows,header", [(0, False), (0, True), (1, True)])
+def test_short_flux_file_is_reported(tmp_path, n_rows, header):
+    path = write_flux(tmp_path / "heatflux.dat", n_rows, header)
+    with pytest.raises(ValueError, match="heatflux.dat; at least two"):
+        greenkubo.hcacf_file(path, 5)
+    with pytest.raises(ValueError, match="heatflux.dat; at least two"):
+        greenkubo.green_kubo([path], max_lag_ps=0.05, workers=1)
+
+
+def test_hcacf_of_constant_flux(tmp_path):
+    path = write_flux(tmp_path / "heatflux.dat", 50)
+    res = greenkubo.hcacf_file(path, 5, chunk_rows=7)
+    assert res['n_rows'] == 50 and res['dt_ps'] == pytest.approx(0.01)
+    np.testing.assert_allclose(res['acf'], 1.0)
@@ -0,0 +1,58 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from mlp_ap_se.lammps_dump import (increasing_rows, iter_dump_frames, open_trajectory_cache, cache_is_fresh,
+                                   default_cache_dir)
+
+
+def write_dump(path, steps, n_atoms=4, seed=0):
+    rng = np.random.default_rng(seed)
+    with open(path, "w") as f:
+        for step in steps:
+            f.write(f"ITEM: TIMESTEP\n{step}\nITEM: NUMBER OF ATOMS\n{n_atoms}\n"
+                    "ITEM: BOX BOUNDS pp pp pp\n0 10\n0 10\n0 10\nITEM: ATOMS id type x y z\n")
+            for i in rng.permutation(n_atoms):
+                x, y, z = rng.uniform(0, 10, 3)
+                f.write(f"{i + 1} {1 + i % 2} {x} {y} {z}\n")
+
+
+def test_increasing_rows_drops_repeats_and_rejects_going_back():
+    assert increasing_rows([0, 100, 200, 200, 300], "f").tolist() == [0, 1, 2, 4]
+    assert increasing_rows([200, 300], "f", after=200).tolist() == [1]
+    with pytest.raises(ValueError, match="goes back"):
+        increasing_rows([0, 100, 50], "f")
+
+
+def test_dump_frames_skip_restart_repeats(tmp_path):
+    dump = tmp_path / "traj.lammpstrj"
+    write_dump(dump, [0, 100, 200, 200, 300])
+    assert [step for step, *_ in iter_dump_frames(dump)] == [0, 100, 200, 300]
+    write_dump(dump, [0, 100, 200, 100])
+    with pytest.raises(ValueError, match="goes back"):
+        list(iter_dump_frames(dump))
+
+
+def test_cache_sorts_atoms_and_tracks_columns(tmp_path):
+    dump = tmp_path / "traj.lammpstrj"
+    write_dump(dump, [0, 10, 20])
+    cache = open_trajectory_cache(dump)
+    assert cache.ids.tolist() == [1, 2, 3, 4]
+    assert cache.coords.shape == (3, 4, 3)
+    assert cache.timesteps.tolist() == [0, 10, 20]
+    assert cache_is_fresh(dump)
+    assert not cache_is_fresh(dump, columns=('x', 'y'))
+
+    with open(os.path.join(default_cache_dir(dump), "meta.json")) as f:
+        meta = json.load(f)
+    assert meta['columns'] == ['x', 'y', 'z'] and meta['timesteps_increasing']
+
+    # Same size and mtime but another last frame: not trusted
+    st = os.stat(dump)
+    text = dump.read_text().replace("TIMESTEP\n20\n", "TIMESTEP\n30\n")
+    dump.write_text(text)
+    os.utime(dump, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert not cache_is_fresh(dump)
+    assert open_trajectory_cache(dump).timesteps.tolist() == [0, 10, 30]
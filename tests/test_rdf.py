@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from mlp_ap_se.rdf import neighbor_pairs
+
+
+def all_pairs(positions, box_length, rcut):
+    # Minimum-image distances of every ordered pair i != j
+    d = positions[None, :, :] - positions[:, None, :]
+    d -= box_length * np.round(d / box_length)
+    r = np.sqrt(np.einsum('ijk,ijk->ij', d, d))
+    i, j = np.nonzero((r < rcut) & ~np.eye(len(positions), dtype=bool))
+    return i, j, r[i, j]
+
+
+def as_set(i, j, r):
+    return {(a, b): d for a, b, d in zip(i.tolist(), j.tolist(), r.tolist())}
+
+
+@pytest.mark.parametrize("box_length, rcut", [
+    (np.array([15.0, 16.0, 17.0]), 4.5),   # cell list (3+ cells per side)
+    (np.array([8.0, 8.0, 8.0]), 3.5),      # all-pairs fallback
+])
+def test_neighbor_pairs_matches_all_pairs(box_length, rcut):
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-5, 25, (300, 3))  # also outside the box: wrapped first
+    found = as_set(*neighbor_pairs(positions, box_length, rcut))
+    expected = as_set(*all_pairs(np.mod(positions, box_length), box_length, rcut))
+    assert found.keys() == expected.keys()
+    np.testing.assert_allclose([found[k] for k in expected], list(expected.values()), rtol=1e-12)
+
+
+def test_neighbor_pairs_are_symmetric():
+    rng = np.random.default_rng(1)
+    i, j, _ = neighbor_pairs(rng.uniform(0, 12, (200, 3)), np.array([12.0, 12.0, 12.0]), 3.0)
+    assert set(zip(i.tolist(), j.tolist())) == set(zip(j.tolist(), i.tolist()))
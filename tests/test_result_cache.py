@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+import pytest
+
+from mlp_ap_se import result_cache
+from mlp_ap_se.result_cache import ResultCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "store"))
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_key_follows_content_and_params(cache, tmp_path):
+    data = write(tmp_path / "temp_profile.dat", "1 2 3\n")
+    key = cache.key("analyze_run", [data], {'target_rel_err': 0.05})
+    assert key == cache.key("analyze_run", [data], {'target_rel_err': 0.05})
+    assert key != cache.key("analyze_run", [data], {'target_rel_err': 0.01})
+    assert key != cache.key("load_msd_file", [data], {'target_rel_err': 0.05})
+    # Same content under another path is the same input
+    copy = write(tmp_path / "copy.dat", "1 2 3\n")
+    assert key == cache.key("analyze_run", [copy], {'target_rel_err': 0.05})
+    # An edited file is a miss, even with an unchanged size
+    write(tmp_path / "temp_profile.dat", "1 2 4\n")
+    assert key != cache.key("analyze_run", [data], {'target_rel_err': 0.05})
+
+
+def test_key_follows_code(cache, tmp_path):
+    data = write(tmp_path / "msd.out", "0 0\n")
+    assert cache.key("x", [data], modules=("transport",)) != cache.key("x", [data], modules=("rdf",))
+
+
+def test_cached_round_trip_and_counters(cache, tmp_path):
+    data = write(tmp_path / "msd.out", "0 0\n")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'D': 1.5e-5, 'msd': np.arange(4.0)}
+
+    first = cache.cached("msd", [data], {}, compute)
+    second = cache.cached("msd", [data], {}, compute)
+    assert len(calls) == 1 and (cache.hits, cache.misses) == (1, 1)
+    np.testing.assert_array_equal(second['msd'], first['msd'])
+    assert cache.get("0" * 64) == (False, None)
+
+
+def test_module_level_cached_is_a_passthrough_unless_enabled(tmp_path):
+    data = write(tmp_path / "msd.out", "0 0\n")
+    calls = []
+    result_cache.disable()
+    try:
+        result_cache.cached("msd", [data], {}, lambda: calls.append(1))
+        result_cache.cached("msd", [data], {}, lambda: calls.append(1))
+        assert len(calls) == 2
+        active = result_cache.enable(str(tmp_path / "store"))
+        result_cache.cached("msd", [data], {}, lambda: calls.append(1))
+        result_cache.cached("msd", [data], {}, lambda: calls.append(1))
+        assert len(calls) == 3 and active.hits == 1
+    finally:
+        result_cache.disable()
+
+
+def test_evict_removes_least_recently_used_first(cache):
+    keys = [f"{i:064x}" for i in range(4)]
+    for age, key in enumerate(keys):
+        cache.put(key, b"x" * 1000)
+        os.utime(cache.entry_path(key), (1000 + age, 1000 + age))
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0])[0]
+    size = cache.size()
+    removed = cache.evict(size - 1)
+    assert removed == 1
+    assert [cache.get(k)[0] for k in keys] == [True, False, True, True]
+
+
+def test_put_trims_the_store_to_its_limit(tmp_path):
+    cache = ResultCache(str(tmp_path / "store"), max_mb=0.01)
+    for i in range(10):
+        cache.put(f"{i:064x}", b"x" * 4000)
+    assert cache.size() <= cache.max_bytes
+    assert cache.get(f"{9:064x}")[0]
+
+
+def test_clear_empties_the_store(cache, tmp_path):
+    data = write(tmp_path / "msd.out", "0 0\n")
+    cache.cached("msd", [data], {}, lambda: 1)
+    assert cache.stats()['entries'] == 1
+    cache.clear()
+    assert cache.size() == 0 and cache.stats()['entries'] == 0
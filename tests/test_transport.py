@@ -0,0 +1,62 @@
+import numpy as np
+
+from mlp_ap_se.transport import msd_fft, collective_msd, unwrap_coordinates, unwrapped_sum, fit_diffusivity
+
+
+def brute_force_msd(positions):
+    # Average over every time origin and atom, lag by lag
+    n_frames = len(positions)
+    return np.array([np.mean(np.sum((positions[m:] - positions[:n_frames - m]) ** 2, axis=-1))
+                     for m in range(n_frames)])
+
+
+def random_walk(n_frames=200, n_atoms=7, step=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.normal(scale=step, size=(n_frames, n_atoms, 3)), axis=0) + rng.uniform(0, 5, (n_atoms, 3))
+
+
+def test_msd_fft_matches_brute_force():
+    positions = random_walk()
+    np.testing.assert_allclose(msd_fft(positions), brute_force_msd(positions), rtol=1e-10, atol=1e-8)
+    # Atom chunking does not change the result
+    np.testing.assert_allclose(msd_fft(positions, atom_chunk=2), msd_fft(positions), rtol=1e-12, atol=1e-10)
+
+
+def test_collective_msd_is_msd_of_the_charge_sum():
+    positions = random_walk(n_atoms=4)
+    charges = np.array([1.0, 1.0, -1.0, -2.0])
+    dipole = np.einsum('fad,a->fd', positions, charges)
+    np.testing.assert_allclose(collective_msd(positions, charges), brute_force_msd(dipole[:, None, :]),
+                               rtol=1e-10, atol=1e-10)
+
+
+def test_unwrap_recovers_wrapped_walk():
+    box = np.array([5.0, 6.0, 7.0])
+    positions = random_walk(step=0.5)
+    unwrapped = unwrap_coordinates(np.mod(positions, box), box)
+    # Unwrapping starts from the wrapped first frame: equal up to a whole-box shift per atom
+    np.testing.assert_allclose(unwrapped - unwrapped[0], positions - positions[0], atol=1e-9)
+
+
+def test_unwrap_with_per_frame_box():
+    # (n_frames, 3) box lengths, as read from the dump of an NPT run
+    n_frames = 100
+    box = np.tile([5.0, 6.0, 7.0], (n_frames, 1))
+    positions = random_walk(n_frames=n_frames, step=0.4, seed=1)
+    unwrapped = unwrap_coordinates(np.mod(positions, box[:, None, :]), box)
+    np.testing.assert_allclose(unwrapped - unwrapped[0], positions - positions[0], atol=1e-9)
+
+
+def test_unwrapped_sum_matches_full_unwrap():
+    box = np.array([5.0, 6.0, 7.0])
+    wrapped = np.mod(random_walk(n_atoms=9), box).astype(np.float32)
+    atoms = np.arange(9) % 3 == 0
+    expected = unwrap_coordinates(wrapped[:, atoms], box).sum(axis=1)
+    np.testing.assert_allclose(unwrapped_sum(wrapped, box, atoms, chunk_frames=17), expected, rtol=1e-6, atol=1e-4)
+
+
+def test_fit_diffusivity_on_linear_msd():
+    lag = np.arange(1000.0)
+    D, slope, intercept, _ = fit_diffusivity(lag, 0.06 * lag + 2.0, window=(100, 900))
+    assert np.isclose(slope, 0.06) and np.isclose(intercept, 2.0)
+    assert np.isclose(D, 0.06 / 6 * 0.1)  # Å²/fs -> cm²/s